@@ -0,0 +1,79 @@
+"""Бенчмарк пакетного API get_recommendations_batch.
+
+Перед замером полным перебором сверяет пакетный путь со скалярным
+get_recommendation на всех руках из 2 и 3 карт против всех карт дилера
+и всех комбинаций флагов дабла/сплита.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_batch
+"""
+
+import itertools
+import time
+
+import numpy as np
+
+from strategy import (
+    ACTION_CODES, encode_cards, encode_hands,
+    get_recommendation, get_recommendations_batch,
+)
+
+RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+
+
+def check_equivalence() -> int:
+    """Сверить пакетный и скалярный пути. Возвращает число проверенных рук."""
+    hands, dealers, doubles, splits = [], [], [], []
+    for n in (2, 3):
+        for cards in itertools.product(RANKS, repeat=n):
+            for d in RANKS:
+                for can_double, can_split in itertools.product((True, False), repeat=2):
+                    hands.append(list(cards))
+                    dealers.append(d)
+                    doubles.append(can_double)
+                    splits.append(can_split)
+
+    actions = get_recommendations_batch(
+        encode_hands(hands, max_cards=3), encode_cards(dealers),
+        can_double=np.array(doubles), can_split=np.array(splits),
+    )
+    for i, code in enumerate(actions):
+        expected = get_recommendation(hands[i], dealers[i], doubles[i], splits[i])["action"]
+        if ACTION_CODES[code] != expected:
+            raise AssertionError(
+                f"{hands[i]} vs {dealers[i]} (double={doubles[i]}, split={splits[i]}): "
+                f"batch={ACTION_CODES[code]} scalar={expected}"
+            )
+    return len(hands)
+
+
+def main() -> None:
+    checked = check_equivalence()
+    print(f"Совпадение со скалярным путём: {checked} рук")
+
+    rng = np.random.default_rng(1)
+    n = 2_000_000
+    values = np.array([2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10, 11], dtype=np.uint8)
+    hands = np.zeros((n, 4), dtype=np.uint8)
+    hands[:, :2] = rng.choice(values, size=(n, 2))
+    third = rng.random(n) < 0.3
+    hands[third, 2] = rng.choice(values, size=int(third.sum()))
+    dealers = rng.choice(values, size=n)
+
+    start = time.perf_counter()
+    get_recommendations_batch(hands, dealers)
+    batch = time.perf_counter() - start
+
+    sample = [[str(v) if v != 11 else "A" for v in row if v] for row in hands[:100_000]]
+    sample_dealers = [str(v) if v != 11 else "A" for v in dealers[:100_000]]
+    start = time.perf_counter()
+    for cards, d in zip(sample, sample_dealers):
+        get_recommendation(cards, d)
+    scalar = time.perf_counter() - start
+
+    print(f"get_recommendation:        {len(sample) / scalar:12,.0f} рук/с")
+    print(f"get_recommendations_batch: {n / batch:12,.0f} рук/с")
+
+
+if __name__ == "__main__":
+    main()
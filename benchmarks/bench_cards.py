@@ -0,0 +1,129 @@
+"""Бенчмарк разбора карт: стоимость одной карты при подсчёте и оценке руки.
+
+Сравнивает текущие пути (коды рангов, таблица написаний) с прежней
+реализацией: upper()/strip() и поиск по кортежам на каждую карту.
+Пакетный ввод CardCounter.add_cards (буфер кодов, строка рангов)
+сравнивается с циклом add_code по тем же картам.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_cards
+"""
+
+import random
+import timeit
+
+from card_counter import COUNTING_SYSTEMS, CardCounter, HI_LO
+from game_state import Hand
+from strategy import card_value, hand_value, RANK_LABELS
+
+RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A", "В", "Д", "К", "Т"]
+
+
+def _legacy_card_value(rank: str) -> int:
+    rank = rank.upper().strip()
+    if rank in ("10", "В", "Д", "К", "J", "Q", "K", "T"):
+        return 10
+    if rank in ("Т", "A", "1", "ACE"):
+        return 11
+    if rank.isdigit():
+        return int(rank)
+    return 0
+
+
+def _legacy_count(cards: list[str]) -> int:
+    running = 0
+    for rank in cards:
+        running += HI_LO.get(_legacy_card_value(rank), 0)
+    return running
+
+
+def _legacy_count_all(cards: list[str]) -> None:
+    # По отдельному словарю и сложению на каждую систему и побочный счёт
+    systems = [dict(enumerate(s.tags)) for s in COUNTING_SYSTEMS.values()]
+    systems += [{11: 1}, {10: 1}]
+    counts = [0] * len(systems)
+    for rank in cards:
+        v = _legacy_card_value(rank)
+        for i, tags in enumerate(systems):
+            counts[i] += tags.get(v, 0)
+
+
+def _legacy_hand_value(cards: list[str]) -> tuple[int, bool]:
+    values = [_legacy_card_value(c) for c in cards]
+    total = sum(values)
+    aces = values.count(11)
+    while total > 21 and aces > 0:
+        total -= 10
+        aces -= 1
+    return total, aces > 0
+
+
+def _legacy_hand_refresh(cards: list[str]) -> None:
+    # Прежний Hand: total, is_soft, is_blackjack, is_bust — каждый через hand_value
+    for _ in range(4):
+        _legacy_hand_value(cards)
+
+
+def _per_card_ns(stmt, n_cards: int, number: int = 20) -> float:
+    best = min(timeit.repeat(stmt, number=number, repeat=5))
+    return best / (number * n_cards) * 1e9
+
+
+def main() -> None:
+    rng = random.Random(1)
+    shoe = [rng.choice(RANKS) for _ in range(6 * 52)]
+    hands = [[rng.choice(RANKS) for _ in range(3)] for _ in range(2000)]
+    hand_cards = 3 * len(hands)
+    # Записанные шу для пакетного ввода: 100 шу по 8 колод
+    recorded = bytes(rng.choice(range(2, 12)) for _ in range(100 * 8 * 52))
+    recorded_text = "".join("T" if c == 10 else RANK_LABELS[c] for c in recorded)
+
+    def bulk_loop() -> None:
+        counter = CardCounter(total_decks=800)
+        for code in recorded:
+            counter.add_code(code)
+
+    def count_new() -> None:
+        counter = CardCounter()
+        for rank in shoe:
+            counter.add_card(rank)
+
+    def count_all_systems() -> None:
+        counter = CardCounter(systems=tuple(COUNTING_SYSTEMS), side_counts=True)
+        for rank in shoe:
+            counter.add_card(rank)
+
+    def hand_new() -> None:
+        hand = Hand()
+        for cards in hands:
+            hand.clear()
+            for c in cards:
+                hand.add(c)
+            hand.total, hand.is_soft, hand.is_blackjack, hand.is_bust
+
+    def hand_legacy() -> None:
+        for cards in hands:
+            _legacy_hand_refresh(cards)
+
+    rows = [
+        ("card_value", lambda: [_legacy_card_value(r) for r in shoe],
+         lambda: [card_value(r) for r in shoe], len(shoe)),
+        ("подсчёт Hi-Lo", lambda: _legacy_count(shoe), count_new, len(shoe)),
+        ("Hi-Lo + 5 систем", lambda: _legacy_count_all(shoe), count_all_systems, len(shoe)),
+        ("hand_value", lambda: [_legacy_hand_value(h) for h in hands],
+         lambda: [hand_value(h) for h in hands], hand_cards),
+        ("Hand + 4 свойства", hand_legacy, hand_new, hand_cards),
+        ("add_cards, байты", bulk_loop,
+         lambda: CardCounter(total_decks=800).add_cards(recorded), len(recorded)),
+        ("add_cards, строка", bulk_loop,
+         lambda: CardCounter(total_decks=800).add_cards(recorded_text), len(recorded)),
+    ]
+    print(f"{'операция':<20}{'было, нс/карта':>16}{'стало, нс/карта':>17}{'ускорение':>11}")
+    for name, old, new, n in rows:
+        before = _per_card_ns(old, n)
+        after = _per_card_ns(new, n)
+        print(f"{name:<20}{before:>16.0f}{after:>17.0f}{before / after:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
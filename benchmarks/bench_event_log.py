@@ -0,0 +1,124 @@
+"""Бенчмарк журнала событий: запись месяца игры и воспроизведение через mmap.
+
+Генерирует журнал из `--shoes` шу (по умолчанию ~месяц игры за одним
+столом: 8 часов в день, ~60 рук в час), сверяет состояние, восстановленное
+из журнала, с живой сессией в случайных точках и меряет скорость
+записи, полного воспроизведения и отмены.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_event_log --shoes 400
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from event_log import EventLog, LogReader
+from session_manager import TableSession
+
+RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+
+
+def _state(game, counter) -> tuple:
+    s = game.stats
+    return (
+        game.dealer.cards, game.player.cards, game.others_cards, game.input_mode,
+        counter.running_count, counter.cards_dealt, counter.composition,
+        s.hands_played, s.wins, s.losses, s.pushes, s.blackjacks,
+        s.net2, s.sq4, s.drawdown2, s.count_breakdown(),
+    )
+
+
+def _play(session: TableSession, shoes: int, rng: random.Random, checkpoints: set[int]) -> dict:
+    """Сыграть `shoes` шу; вернуть {номер события: состояние} для точек проверки."""
+    expected = {}
+
+    def check():
+        n = len(session.log)
+        if n in checkpoints:
+            expected[n] = _state(session.game, session.counter)
+
+    for _ in range(shoes):
+        session.new_shoe()
+        check()
+        while session.counter.penetration < 0.75:
+            for _ in range(3):
+                session.add_card(rng.choice(RANKS))
+                check()
+            if rng.random() < 0.1:
+                session.undo()
+                check()
+            session.set_input_mode("others")
+            check()
+            for _ in range(rng.randint(0, 4)):
+                session.add_card(rng.choice(RANKS))
+                check()
+            session.record_result(rng.choice(("win", "loss", "push")))
+            check()
+    return expected
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shoes", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.bjlog")
+        # Примерно 300 событий на шу — точки проверки раскиданы по журналу
+        checkpoints = set(rng.sample(range(1, args.shoes * 300), 200))
+
+        log = EventLog(path)
+        session = TableSession("bench", log=log)
+        start = time.perf_counter()
+        expected = _play(session, args.shoes, rng, checkpoints)
+        write_s = time.perf_counter() - start
+        n_events = len(log)
+
+        with LogReader(path) as reader:
+            for n, state in expected.items():
+                assert _state(*reader.replay(n)) == state, f"расхождение на событии {n}"
+            start = time.perf_counter()
+            game, counter = reader.replay()
+            replay_s = time.perf_counter() - start
+        assert _state(game, counter) == _state(session.game, session.counter)
+
+        # Продолжение сессии из файла
+        start = time.perf_counter()
+        resumed = TableSession("bench", log=EventLog(path))
+        resume_s = time.perf_counter() - start
+        assert _state(resumed.game, resumed.counter) == _state(session.game, session.counter)
+
+        for _ in range(3):
+            session.add_card("5")
+        start = time.perf_counter()
+        for _ in range(3):
+            session.undo()
+        undo_us = (time.perf_counter() - start) / 3 * 1e6
+
+        # Отмена убирает только карту: смена режима после неё остаётся
+        session.add_card("5")
+        session.set_input_mode("others")
+        session.undo()
+        assert session.game.input_mode == "others"
+        resumed.log.close()
+        resumed = TableSession("bench", log=EventLog(path))
+        assert _state(resumed.game, resumed.counter) == _state(session.game, session.counter)
+        log.close()
+        resumed.log.close()
+        size_kb = os.path.getsize(path) / 1024
+
+    print(f"Проверено точек:        {len(expected)}")
+    print(f"Событий в журнале:      {n_events:,} ({size_kb:,.0f} КБ)")
+    print(f"Запись:                 {n_events / write_s:,.0f} событий/с")
+    print(f"Полное воспроизведение: {replay_s * 1000:.0f} мс ({n_events / replay_s:,.0f} событий/с)")
+    print(f"Продолжение сессии:     {resume_s * 1000:.1f} мс")
+    print(f"Отмена карты:           {undo_us:.0f} мкс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Задержка «клик → отрисовка» окна помощника (offscreen Qt).
+
+Окно BlackjackAssistant создаётся на платформе offscreen, фильтр событий
+приложения считает перерисовки (Paint) и смены стиля (StyleChange —
+каждый setStyleSheet). Два сценария:
+
+- одиночные клики: время от нажатия до конца отрисовки кадра;
+- пачки кликов: `--burst` нажатий приходят в очередь событий разом
+  (быстрый ввод), время до отрисовки последнего и число перерисовок.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_gui --hands 200 --burst 8
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QEvent, QObject, QTimer  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+import main as gui  # noqa: E402
+
+RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+
+
+class _EventCounter(QObject):
+    """Считает события Paint и StyleChange во всём приложении."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.paints = 0
+        self.styles = 0
+
+    def eventFilter(self, obj, event) -> bool:
+        kind = event.type()
+        if kind == QEvent.Paint:
+            self.paints += 1
+        elif kind == QEvent.StyleChange:
+            self.styles += 1
+        return False
+
+
+def _hand_actions(window, i: int) -> list:
+    """Действия одной раздачи: дилер, две свои, две чужие, результат."""
+    r = RANKS
+    return [
+        lambda: window._on_card_click(r[i % 13]),
+        lambda: window._on_card_click(r[(i * 7 + 3) % 13]),
+        lambda: window._on_card_click(r[(i * 5 + 1) % 13]),
+        lambda: window._set_input_mode("others"),
+        lambda: window._on_card_click(r[(i * 3 + 2) % 13]),
+        lambda: window._on_card_click(r[(i * 11 + 4) % 13]),
+        lambda: window._record_result(("win", "loss", "push")[i % 3]),
+    ]
+
+
+def _drain(app: QApplication) -> None:
+    """Обработать все события, включая отложенные таймеры нулевой задержки."""
+    for _ in range(3):
+        app.processEvents()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hands", type=int, default=200)
+    parser.add_argument("--burst", type=int, default=8, help="кликов в пачке")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    gui.LOG_PATH = os.path.join(tempfile.mkdtemp(), "events.bjlog")
+    window = gui.BlackjackAssistant()
+    window.show()
+    counter = _EventCounter()
+    app.installEventFilter(counter)
+    _drain(app)
+
+    # Одиночные клики
+    latencies = []
+    counter.paints = counter.styles = 0
+    n_clicks = 0
+    for i in range(args.hands):
+        for action in _hand_actions(window, i):
+            start = time.perf_counter()
+            action()
+            _drain(app)
+            latencies.append(time.perf_counter() - start)
+            n_clicks += 1
+    single_paints, single_styles = counter.paints, counter.styles
+
+    # Пачки кликов: все нажатия уже в очереди, обрабатываются за один проход
+    burst_times = []
+    counter.paints = counter.styles = 0
+    n_bursts = 0
+    for i in range(args.hands):
+        actions = [a for k in range(args.burst) for a in _hand_actions(window, i + k)][:args.burst]
+        for action in actions:
+            QTimer.singleShot(0, action)
+        start = time.perf_counter()
+        _drain(app)
+        burst_times.append(time.perf_counter() - start)
+        n_bursts += 1
+    burst_paints, burst_styles = counter.paints, counter.styles
+
+    ms = sorted(x * 1000 for x in latencies)
+    q = statistics.quantiles(ms, n=100)
+    print(f"Одиночные клики ({n_clicks}):")
+    print(f"  задержка клик→кадр: p50 {q[49]:.3f} мс, p99 {q[98]:.3f} мс")
+    print(f"  setStyleSheet на клик: {single_styles / n_clicks:.1f}, "
+          f"Paint на клик: {single_paints / n_clicks:.1f}")
+    bq = statistics.quantiles(sorted(x * 1000 for x in burst_times), n=100)
+    print(f"Пачки по {args.burst} кликов ({n_bursts}):")
+    print(f"  до последнего кадра: p50 {bq[49]:.3f} мс, p99 {bq[98]:.3f} мс")
+    print(f"  setStyleSheet на пачку: {burst_styles / n_bursts:.1f}, "
+          f"Paint на пачку: {burst_paints / n_bursts:.1f}")
+    window.session.log.close()
+
+
+if __name__ == "__main__":
+    main()
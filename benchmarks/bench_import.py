@@ -0,0 +1,116 @@
+"""Бенчмарк импорта истории раздач: записей в секунду и память.
+
+Генерирует синтетическую историю (раздачи из настоящих шу, игрок
+ошибается в ~5% решений) в CSV и JSONL во временном каталоге, затем
+импортирует её hand_history.import_history. Пиковая память Python
+(tracemalloc) сравнивается для файлов разного размера — она не должна
+расти вместе с файлом.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_import --hands 200000
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import tempfile
+import tracemalloc
+
+import hand_history
+from simulator import build_shoe
+from strategy import RANK_LABELS, get_action, hand_value_codes
+
+_LABELS = {**{v: RANK_LABELS[v] for v in range(2, 12)}, 10: "T"}
+
+
+def _hands(n: int, decks: int, seed: int):
+    """Синтетические раздачи: словари с ключами формата истории."""
+    rng = random.Random(seed)
+    shoe: list[int] = []
+    pos = cut = 0
+    shoe_id = 0
+    for _ in range(n):
+        if pos >= cut:
+            shoe = build_shoe(decks) + build_shoe(1)
+            rng.shuffle(shoe)
+            pos, cut = 0, int(decks * 52 * 0.75)
+            shoe_id += 1
+        p1, up, p2, hole = shoe[pos:pos + 4]
+        pos += 4
+        player = [p1, p2]
+        actions = []
+        while True:
+            if hand_value_codes(player)[0] >= 21:
+                break
+            first = len(player) == 2
+            action = get_action([RANK_LABELS[c] for c in player], RANK_LABELS[up],
+                                can_double=first, can_split=False)
+            if rng.random() < 0.05:
+                action = "H" if action == "S" else "S"
+            actions.append(action)
+            if action in "SPR":
+                break
+            player.append(shoe[pos])
+            pos += 1
+            if action == "D":
+                break
+        dealer = [up, hole]
+        while hand_value_codes(dealer)[0] < 17:
+            dealer.append(shoe[pos])
+            pos += 1
+        others = shoe[pos:pos + rng.randrange(4)]
+        pos += len(others)
+        yield {
+            "shoe": shoe_id, "decks": decks,
+            "dealer": " ".join(_LABELS[c] for c in dealer),
+            "player": " ".join(_LABELS[c] for c in player),
+            "others": " ".join(_LABELS[c] for c in others),
+            "actions": "".join(actions),
+            "result": rng.choice(("win", "loss", "push")),
+        }
+
+
+def _write(path: str, n: int, fmt: str) -> None:
+    fields = ["shoe", "decks", "dealer", "player", "others", "actions", "result"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fields)
+            writer.writeheader()
+            writer.writerows(_hands(n, 6, 1))
+        else:
+            for hand in _hands(n, 6, 1):
+                f.write(json.dumps(hand) + "\n")
+
+
+def _measure(path: str) -> tuple[hand_history.ImportReport, int]:
+    tracemalloc.start()
+    replayer = hand_history.import_history(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return replayer.report, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hands", type=int, default=200_000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    print(f"{'файл':<12}{'записей':>10}{'МБ':>8}{'записей/с':>12}{'по стратегии':>14}{'пик памяти':>12}")
+    for fmt in ("csv", "jsonl"):
+        for n in (args.hands // 10, args.hands):
+            path = os.path.join(directory, f"history_{n}.{fmt}")
+            _write(path, n, fmt)
+            # Скорость — без tracemalloc, память — отдельным прогоном
+            report = hand_history.import_history(path).report
+            _, peak = _measure(path)
+            size = os.path.getsize(path) / 1e6
+            print(f"{fmt:<12}{report.rows:>10,d}{size:>8.1f}{report.rows_per_second:>12,.0f}"
+                  f"{report.accuracy:>13.1f}%{peak / 1e6:>10.1f}МБ")
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Бенчмарк памяти: байт на сессию стола и на снимок состояния.
+
+Сессия — TableSession (GameState + CardCounter + SessionStats) с типичной
+раздачей на руках. Снимок — глубокая копия GameState и CardCounter,
+как при хранении истории состояний. Память меряется tracemalloc.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_memory --sessions 10000
+"""
+
+import argparse
+import copy
+import pickle
+import random
+import tracemalloc
+
+from session_manager import TableSession
+
+RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+
+
+def _fill(session: TableSession, rng: random.Random) -> None:
+    """Типичная раздача: карта дилера, 2-3 своих, пара чужих, немного статистики."""
+    for _ in range(rng.randint(3, 4)):
+        session.add_card(rng.choice(RANKS))
+    session.set_input_mode("others")
+    for _ in range(2):
+        session.add_card(rng.choice(RANKS))
+    session.stats.record_win()
+
+
+def _measure(factory, n: int) -> tuple[float, list]:
+    """Средний прирост памяти на объект, байт."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(i) for i in range(n)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / n, objects
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10_000)
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    def make_session(i: int) -> TableSession:
+        session = TableSession(f"table-{i}")
+        _fill(session, rng)
+        return session
+
+    per_session, sessions = _measure(make_session, args.sessions)
+
+    def make_snapshot(i: int):
+        session = sessions[i]
+        return copy.deepcopy((session.game, session.counter))
+
+    per_snapshot, snapshots = _measure(make_snapshot, args.sessions)
+    pickled = sum(len(pickle.dumps(s, protocol=pickle.HIGHEST_PROTOCOL))
+                  for s in snapshots[:1000]) / min(1000, len(snapshots))
+
+    print(f"Сессия (в памяти):     {per_session:8.0f} байт")
+    print(f"Снимок (deepcopy):     {per_snapshot:8.0f} байт")
+    print(f"Снимок (pickle):       {pickled:8.0f} байт")
+
+
+if __name__ == "__main__":
+    main()
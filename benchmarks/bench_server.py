@@ -0,0 +1,159 @@
+"""Нагрузочный тест сервера рекомендаций: задержки p50/p99 при тысячах клиентов.
+
+Запускает server.py отдельным процессом и открывает `--clients`
+одновременных соединений (keep-alive HTTP или WebSocket), распределённых
+по `--procs` процессам-клиентам. Каждый клиент — своя сессия: вводит
+карты, запрашивает состояние и записывает результаты рук, делая паузу
+`--interval` секунд между запросами (как устройство за столом);
+--interval 0 — запросы подряд, предельная пропускная способность.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_server --clients 2000 --requests 50 --mode http
+    python -m benchmarks.bench_server --clients 2000 --requests 50 --mode ws --interval 0
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from multiprocessing import Pool
+
+RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+
+
+def _script(rng: random.Random, n: int) -> list[tuple[str, dict]]:
+    """Последовательность операций клиента: раздача за раздачей."""
+    ops: list[tuple[str, dict]] = []
+    while len(ops) < n:
+        ops += [("card", {"rank": rng.choice(RANKS)}) for _ in range(3)]
+        ops.append(("state", {}))
+        ops.append(("result", {"result": rng.choice(("win", "loss", "push"))}))
+    return ops[:n]
+
+
+async def _pause(interval: float) -> None:
+    """Пауза между запросами со случайным сдвигом, чтобы клиенты не шли в ногу."""
+    if interval > 0:
+        await asyncio.sleep(interval * random.uniform(0.5, 1.5))
+
+
+async def _http_client(port: int, client: str, ops, interval: float, latencies: list[float]) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for op, args in ops:
+        await _pause(interval)
+        body = json.dumps(args).encode()
+        method = "GET" if op == "state" else "POST"
+        request = (
+            f"{method} /{op} HTTP/1.1\r\nHost: localhost\r\nX-Client-Id: {client}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body) if method == 'POST' else 0}\r\n\r\n"
+        ).encode() + (body if method == "POST" else b"")
+        start = time.perf_counter()
+        writer.write(request)
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+        payload = await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+        assert head.startswith(b"HTTP/1.1 200"), head + payload
+    writer.close()
+
+
+async def _ws_client(port: int, client: str, ops, interval: float, latencies: list[float]) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write((
+        f"GET /ws?client={client} HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\n"
+        f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+    ).encode())
+    head = await reader.readuntil(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 101"), head
+    mask = b"\x00\x00\x00\x00"  # нулевая маска: данные не меняются
+    for i, (op, args) in enumerate(ops):
+        await _pause(interval)
+        data = json.dumps({"op": op, "id": i, **args}).encode()
+        start = time.perf_counter()
+        writer.write(bytes((0x81, 0x80 | len(data))) + mask + data)
+        _, b1 = await reader.readexactly(2)
+        length = b1 & 0x7F
+        if length == 126:
+            length = int.from_bytes(await reader.readexactly(2), "big")
+        payload = await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+        assert b'"error"' not in payload, payload
+    writer.write(bytes((0x88, 0x80)) + mask)
+    writer.close()
+
+
+def _worker(task: tuple[str, int, int, int, int, float]) -> list[float]:
+    mode, port, first, count, requests, interval = task
+    latencies: list[float] = []
+    client = _http_client if mode == "http" else _ws_client
+
+    async def run() -> None:
+        await asyncio.gather(*(
+            client(port, f"bench-{i}", _script(random.Random(i), requests), interval, latencies)
+            for i in range(first, first + count)
+        ))
+
+    asyncio.run(run())
+    return latencies
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=50, help="запросов на клиента")
+    parser.add_argument("--mode", choices=("http", "ws"), default="http")
+    parser.add_argument("--interval", type=float, default=1.0, help="с между запросами клиента")
+    parser.add_argument("--procs", type=int, default=4, help="процессов-клиентов")
+    args = parser.parse_args()
+
+    port = _free_port()
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen(
+        [sys.executable, "server.py", "--port", str(port), "--max-sessions", str(args.clients * 2)],
+        cwd=root, stdout=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+
+        per_proc = -(-args.clients // args.procs)
+        tasks = [
+            (args.mode, port, first, min(per_proc, args.clients - first), args.requests, args.interval)
+            for first in range(0, args.clients, per_proc)
+        ]
+        start = time.perf_counter()
+        with Pool(len(tasks)) as pool:
+            latencies = [x for part in pool.map(_worker, tasks) for x in part]
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies.sort()
+    ms = [x * 1000 for x in latencies]
+    q = statistics.quantiles(ms, n=100)
+    print(f"Режим:        {args.mode}, {args.clients} клиентов × {args.requests} запросов,"
+          f" пауза {args.interval} с")
+    print(f"Пропускная:   {len(ms) / elapsed:,.0f} запросов/с")
+    print(f"Задержка:     p50 {q[49]:.2f} мс, p90 {q[89]:.2f} мс, p99 {q[98]:.2f} мс, макс {ms[-1]:.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Бенчмарк реестра сессий: операции в секунду и память на 10 000 столов.
+
+Открывает N столов, затем через asyncio гоняет по ним случайный поток
+операций (карта, отмена, рекомендация, новая раздача) и печатает
+пропускную способность и резидентную память процесса.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_sessions --tables 10000 --ops 500000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from session_manager import SessionRegistry
+
+RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+
+
+def rss_mb() -> float:
+    """Текущая резидентная память процесса, МБ (Linux: /proc, иначе пик)."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def _client(registry: SessionRegistry, table_ids: list[str], n_ops: int, seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(n_ops):
+        table_id = rng.choice(table_ids)
+        roll = rng.random()
+        if roll < 0.6:
+            try:
+                await registry.add_card(table_id, rng.choice(RANKS))
+            except ValueError:  # раздача переполнена
+                await registry.new_hand(table_id)
+        elif roll < 0.7:
+            await registry.undo(table_id)
+        elif roll < 0.95:
+            await registry.recommendation(table_id)
+        else:
+            await registry.new_hand(table_id)
+
+
+async def run(n_tables: int, n_ops: int, n_clients: int) -> None:
+    base = rss_mb()
+    registry = SessionRegistry()
+    table_ids = [f"table-{i}" for i in range(n_tables)]
+
+    start = time.perf_counter()
+    for table_id in table_ids:
+        registry.open(table_id)
+    opened = time.perf_counter() - start
+    after_open = rss_mb()
+
+    per_client = n_ops // n_clients
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(registry, table_ids, per_client, seed) for seed in range(n_clients)
+    ))
+    elapsed = time.perf_counter() - start
+    total_ops = per_client * n_clients
+
+    print(f"Столов:              {len(registry)}")
+    print(f"Открытие:            {n_tables / opened:,.0f} столов/с")
+    print(f"Операции:            {total_ops / elapsed:,.0f} оп/с ({n_clients} клиентов)")
+    print(f"Память после open:   {after_open - base:.1f} МБ "
+          f"({(after_open - base) * 1024 * 1024 / n_tables:,.0f} байт/стол)")
+    print(f"Память после работы: {rss_mb() - base:.1f} МБ (RSS всего {rss_mb():.1f} МБ)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=10_000)
+    parser.add_argument("--ops", type=int, default=500_000)
+    parser.add_argument("--clients", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.tables, args.ops, args.clients))
+
+
+if __name__ == "__main__":
+    main()
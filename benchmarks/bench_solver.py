@@ -0,0 +1,56 @@
+"""Бенчмарк решателя базовой стратегии: время полного решения и распределения дилера.
+
+Решает таблицы для бесконечной колоды и шу из 1, 6 и 8 колод в текущем
+процессе и на пуле из всех ядер (результаты должны совпасть), плюс цена
+одного распределения дилера dealer_probs.dealer_distribution.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_solver
+"""
+
+import argparse
+import os
+import random
+import time
+
+import ev_calculator
+from dealer_probs import dealer_distribution
+from rules import Rules
+from strategy_solver import solve
+
+
+def _dealer_us(n: int = 2000) -> float:
+    rng = random.Random(1)
+    comps = [tuple(rng.randint(16, 32) for _ in range(9)) + (rng.randint(96, 128),) for _ in range(n)]
+    start = time.perf_counter()
+    for comp in comps:
+        dealer_distribution(7, comp)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def _timed(rules: Rules, infinite: bool, workers: int) -> tuple[float, tuple]:
+    ev_calculator.clear_caches()
+    start = time.perf_counter()
+    tables = solve(rules, infinite, workers)
+    return time.perf_counter() - start, tables
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"Распределение дилера: {_dealer_us():.1f} мкс")
+    print(f"{'шу':<12}{'1 процесс':>12}{f'{args.workers} проц.':>12}")
+    for label, decks, infinite in (("бесконечный", 6, True), ("1 колода", 1, False),
+                                   ("6 колод", 6, False), ("8 колод", 8, False)):
+        rules = Rules(decks=decks)
+        serial, tables = _timed(rules, infinite, 1)
+        parallel, same = _timed(rules, infinite, args.workers)
+        if same != tables:
+            raise RuntimeError(f"{label}: таблицы пула и одного процесса разошлись")
+        print(f"{label:<12}{serial:>11.2f}с{parallel:>11.2f}с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Время запуска: окно до первого интерактивного кадра и импорт ядра без Qt.
+
+Каждый замер — отдельный «холодный» процесс Python (`--runs` раз, берётся
+медиана):
+
+- headless: импорт strategy, card_counter, game_state, session_manager и
+  cli; проверяется, что ни PyQt5, ни numpy не загружены;
+- gui: процесс поднимает QApplication и окно BlackjackAssistant (offscreen)
+  и сообщает о первом кадре окна (событие Paint) и о моменте, когда
+  очередь событий после него пуста — окно отвечает на клики.
+  Время считается от запуска процесса, т.е. с запуском интерпретатора.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_startup --runs 15
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEADLESS = """
+import sys
+import strategy, card_counter, game_state, session_manager, cli
+loaded = [m for m in ("PyQt5", "numpy") if m in sys.modules]
+assert not loaded, loaded
+"""
+
+GUI = """
+import os, sys, time
+os.environ["QT_QPA_PLATFORM"] = "offscreen"
+import main as gui
+from PyQt5.QtCore import QEvent, QObject, QTimer
+from PyQt5.QtWidgets import QApplication
+imported = time.perf_counter()
+gui.LOG_PATH = sys.argv[1]
+app = QApplication(sys.argv)
+app.setStyle("Fusion")
+window = gui.BlackjackAssistant()
+built = time.perf_counter()
+marks = {}
+
+def interactive():
+    marks["interactive"] = time.perf_counter()
+    print(*(f"{k}={v!r}" for k, v in
+            dict(imported=imported, built=built, **marks).items()), flush=True)
+    app.quit()
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if obj is window and event.type() == QEvent.Paint and "paint" not in marks:
+            marks["paint"] = time.perf_counter()
+            QTimer.singleShot(0, interactive)
+        return False
+
+first_paint = FirstPaint()
+app.installEventFilter(first_paint)
+window.show()
+app.exec_()
+"""
+
+
+def _run(code: str, *args: str) -> tuple[float, dict[str, float]]:
+    """(с от запуска процесса до конца, отметки времени процесса в с от запуска)."""
+    start = time.perf_counter()
+    # Отметки процесса — в его perf_counter; сдвиг считается по его запуску
+    out = subprocess.run(
+        [sys.executable, "-c", "import time; _t0 = time.perf_counter()\n"
+         + code.replace("time.perf_counter()", "(time.perf_counter() - _t0)"), *args],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    elapsed = time.perf_counter() - start
+    marks = {}
+    for item in out.split():
+        key, _, value = item.partition("=")
+        marks[key] = float(value)
+    return elapsed, marks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=15)
+    args = parser.parse_args()
+
+    bare = statistics.median(_run("pass")[0] for _ in range(args.runs))
+    headless = statistics.median(_run(HEADLESS)[0] for _ in range(args.runs))
+
+    log = os.path.join(tempfile.mkdtemp(), "events.bjlog")
+    runs = [_run(GUI, log) for _ in range(args.runs)]
+    total = statistics.median(r[0] for r in runs)
+    mark = {k: statistics.median(r[1][k] for r in runs) * 1000
+            for k in ("imported", "built", "paint", "interactive")}
+
+    print(f"Пустой процесс Python:      {bare * 1000:6.1f} мс")
+    print(f"Импорт ядра без Qt (cli):   {headless * 1000:6.1f} мс "
+          f"(+{(headless - bare) * 1000:.1f} мс к пустому)")
+    print(f"Окно, процесс целиком:      {total * 1000:6.1f} мс")
+    print(f"  импорты (Qt + ядро):      {mark['imported']:6.1f} мс")
+    print(f"  окно построено:           {mark['built']:6.1f} мс")
+    print(f"  первый кадр:              {mark['paint']:6.1f} мс")
+    print(f"  интерактивно:             {mark['interactive']:6.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Бенчмарк стратегии: get_recommendation против скомпилированной таблицы.
+
+Цель — в 10 раз быстрее get_recommendation. Её даёт lookup_action (по
+малым целым); get_action на строках до неё не дотягивает — вызывающие,
+у которых карты уже в кодах, идут через lookup_action и recommend_codes.
+
+Отдельно — цена отклонений по счёту: get_recommendation с true_count и
+deviation_action (порог ячейки + сравнение) против lookup_action.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_strategy
+"""
+
+import itertools
+import timeit
+
+from strategy import (
+    get_recommendation, get_action, lookup_action, deviation_action, action_index,
+    recommend_codes, parse_cards, card_value, KIND_HARD, FLAG_DOUBLE, FLAG_SPLIT,
+)
+
+# Во сколько раз быстрее get_recommendation должен быть быстрый путь
+TARGET_SPEEDUP = 10
+
+RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+
+
+def _states() -> list[tuple[list[str], str]]:
+    """Все двухкарточные руки против всех карт дилера."""
+    return [
+        ([a, b], d)
+        for a, b in itertools.combinations_with_replacement(RANKS, 2)
+        for d in RANKS
+    ]
+
+
+def _per_call_ns(func, states, repeat: int = 5) -> float:
+    number = 20
+
+    def run() -> None:
+        for cards, dealer in states:
+            func(cards, dealer)
+
+    best = min(timeit.repeat(run, number=number, repeat=repeat))
+    return best / (number * len(states)) * 1e9
+
+
+def main() -> None:
+    states = _states()
+
+    # Проверка совпадения действий перед замером
+    code_states = [(parse_cards(cards), card_value(dealer)) for cards, dealer in states]
+    for (cards, dealer), (codes, up) in zip(states, code_states):
+        rec = get_recommendation(cards, dealer)
+        assert rec["action"] == get_action(cards, dealer)
+        assert rec == recommend_codes(codes, up)
+
+    slow = _per_call_ns(get_recommendation, states)
+    fast = _per_call_ns(get_action, states)
+    by_codes = _per_call_ns(recommend_codes, code_states)
+    with_tc = _per_call_ns(lambda c, d: get_recommendation(c, d, true_count=2.5), states)
+
+    flags = FLAG_DOUBLE | FLAG_SPLIT
+    int_states = [(t, d) for t in range(4, 22) for d in range(2, 12)]
+    number = 200
+    best = min(timeit.repeat(
+        lambda: [lookup_action(KIND_HARD, t, d, flags) for t, d in int_states],
+        number=number, repeat=5,
+    ))
+    lookup = best / (number * len(int_states)) * 1e9
+    cells = [action_index(KIND_HARD, t, d, flags) for t, d in int_states]
+    best = min(timeit.repeat(
+        lambda: [deviation_action(i, 2.5) for i in cells], number=number, repeat=5))
+    deviation = best / (number * len(cells)) * 1e9
+
+    print(f"get_recommendation: {slow:8.0f} нс/вызов")
+    print(f"recommend_codes:    {by_codes:8.0f} нс/вызов  (x{slow / by_codes:.1f})")
+    print(f"get_action:         {fast:8.0f} нс/вызов  (x{slow / fast:.1f})")
+    print(f"lookup_action:      {lookup:8.0f} нс/вызов  (x{slow / lookup:.1f})")
+    print(f"get_recommendation + TC: {with_tc:5.0f} нс/вызов  (+{with_tc - slow:.0f} нс на отклонения)")
+    print(f"deviation_action:   {deviation:8.0f} нс/вызов")
+    for name, ns in (("get_action", fast), ("lookup_action", lookup)):
+        verdict = "достигнута" if slow / ns >= TARGET_SPEEDUP else "не достигнута"
+        print(f"Цель x{TARGET_SPEEDUP} для {name}: {verdict}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""Набор бенчмарков горячих путей с базовыми замерами и сравнением.
+
+Микробенчмарки: card_value, hand_value, get_recommendation,
+CardCounter.add_card / add_cards / true_count, GameState.add_card /
+undo_last. Макробенчмарк: полный шу из 6 колод через GameState, счётчик и
+рекомендации, как за столом. Если установлен PyQt5 — ещё и обновление
+окна (BlackjackAssistant._update_display, offscreen).
+
+Результат каждого бенчмарка — наносекунды на операцию (лучший из многих
+коротких повторов). Повторы чередуются с эталонной нагрузкой чистого
+Python, её время сохраняется рядом с результатом: при сравнении
+бенчмарки сопоставляются в долях эталона, так что общее замедление
+машины (другая машина, соседи по виртуалке) не выглядит регрессией.
+Замеры хранятся в JSON; режим сравнения отмечает регрессии больше
+порога и завершается с кодом 1.
+
+Запуск из корня репозитория:
+    python -m benchmarks.suite                          # замер
+    python -m benchmarks.suite --save                   # записать базовый замер
+    python -m benchmarks.suite --compare                # сравнить с базовым
+    python -m benchmarks.suite --compare --threshold 0.2 --only counter
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import timeit
+
+from card_counter import CardCounter
+from game_state import GameState
+from strategy import card_value, get_recommendation, hand_value
+
+RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.15   # регрессия — медленнее базового замера больше чем на 15%
+
+_REPEAT = 25               # много коротких повторов: минимум ловит «тихие» окна машины
+_MIN_TIME = 0.02           # с на один повтор (подбор числа прогонов)
+_RECHECKS = 2              # перезамеров бенчмарка, вышедшего за порог (шум машины)
+
+
+def _shoe(decks: int = 6, seed: int = 1) -> list[str]:
+    """Перемешанный шу рангов."""
+    shoe = RANKS * 4 * decks
+    random.Random(seed).shuffle(shoe)
+    return shoe
+
+
+def _reference_loop() -> int:
+    """Эталонная нагрузка чистого Python: мерило скорости машины."""
+    d = {}
+    total = 0
+    for i in range(2000):
+        d[i & 63] = i
+        total += d[i & 63] * 3 // 7
+    return total
+
+
+def _number(timer: timeit.Timer) -> int:
+    """Прогонов на один повтор — чтобы повтор занимал не меньше _MIN_TIME."""
+    number = 1
+    while timer.timeit(number) < _MIN_TIME:
+        number *= 2
+    return number
+
+
+def _measure(run, ops: int) -> tuple[float, float]:
+    """(нс на операцию, нс на эталонную нагрузку) — лучшие из чередующихся повторов."""
+    timer = timeit.Timer(run)
+    ref = timeit.Timer(_reference_loop)
+    number, ref_number = _number(timer), _number(ref)
+    best = best_ref = float("inf")
+    for _ in range(_REPEAT):
+        best_ref = min(best_ref, ref.timeit(ref_number) / ref_number)
+        best = min(best, timer.timeit(number) / number)
+    return best / ops * 1e9, best_ref * 1e9
+
+
+# =====================================================================
+# Бенчмарки: имя → (функция прогона, операций за прогон)
+# =====================================================================
+
+def _benchmarks() -> dict[str, tuple]:
+    shoe = _shoe()
+    rng = random.Random(2)
+    hands = [[rng.choice(RANKS) for _ in range(rng.randint(2, 4))] for _ in range(500)]
+    dealers = [rng.choice(RANKS) for _ in hands]
+    pairs = list(zip(hands, dealers))
+
+    def run_card_value():
+        for r in shoe:
+            card_value(r)
+
+    def run_hand_value():
+        for h in hands:
+            hand_value(h)
+
+    def run_recommendation():
+        for h, d in pairs:
+            get_recommendation(h, d)
+
+    counter = CardCounter()
+
+    def run_add_card():
+        counter.reset_shoe()
+        for r in shoe:
+            counter.add_card(r)
+
+    def run_add_cards():
+        counter.reset_shoe()
+        counter.add_cards(shoe)
+
+    counter_tc = CardCounter()
+    counter_tc.add_cards(shoe[:100])
+
+    def run_true_count():
+        for _ in range(1000):
+            counter_tc.true_count
+
+    game = GameState()
+
+    def run_game_add_undo():
+        for h, d in pairs:
+            game.add_card(d)
+            for c in h:
+                game.add_card(c)
+            for _ in range(len(h) + 1):
+                game.undo_last()
+
+    game_ops = sum(2 * (len(h) + 1) for h in hands)
+
+    def run_shoe_replay():
+        _play_shoe(shoe)
+
+    benches = {
+        "strategy.card_value": (run_card_value, len(shoe)),
+        "strategy.hand_value": (run_hand_value, len(hands)),
+        "strategy.get_recommendation": (run_recommendation, len(pairs)),
+        "counter.add_card": (run_add_card, len(shoe)),
+        "counter.add_cards": (run_add_cards, len(shoe)),
+        "counter.true_count": (run_true_count, 1000),
+        "game.add_card+undo_last": (run_game_add_undo, game_ops),
+        "macro.shoe_6_decks": (run_shoe_replay, 1),
+    }
+    gui = _gui_benchmark()
+    if gui is not None:
+        benches["gui.update_display"] = gui
+    return benches
+
+
+def _play_shoe(shoe: list[str]) -> None:
+    """Один шу за столом: карты дилера и игрока, добор по рекомендации, счёт."""
+    game = GameState()
+    counter = CardCounter()
+    pos = 0
+    cut = len(shoe) * 3 // 4
+    while pos < cut:
+        up, c1, c2 = shoe[pos], shoe[pos + 1], shoe[pos + 2]
+        pos += 3
+        for rank in (up, c1, c2):
+            game.add_card(rank)
+            counter.add_card(rank)
+        player = game.player
+        while not player.is_bust and player.total < 21:
+            rec = get_recommendation(player.cards, up, player.can_double, player.can_split)
+            if rec["action"] == "S" or rec["action"] == "P":
+                break
+            game.add_card(shoe[pos])
+            counter.add_card(shoe[pos])
+            pos += 1
+            if rec["action"] == "D":
+                break
+        counter.true_count
+        counter.bet_recommendation()
+        game.stats.record_push()
+        game.new_hand()
+
+
+def _gui_benchmark():
+    """Обновление окна помощника; None — PyQt5 не установлен."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt5.QtWidgets import QApplication
+    except ImportError:
+        return None
+    import main as gui
+
+    global _qt_app
+    _qt_app = QApplication.instance() or QApplication(sys.argv)
+    # Журнал событий окна — во временный файл, не в журнал пользователя
+    gui.LOG_PATH = os.path.join(tempfile.mkdtemp(), "events.bjlog")
+    window = gui.BlackjackAssistant()
+    for rank in ("10", "8", "7"):
+        window.session.add_card(rank)
+    return window._update_display, 1
+
+
+_qt_app = None
+
+
+# =====================================================================
+# Базовые замеры и сравнение
+# =====================================================================
+
+Result = dict[str, tuple[float, float]]  # имя → (нс/операцию, нс эталона)
+
+
+def run(only: str | None = None, baseline: Result | None = None,
+        threshold: float = DEFAULT_THRESHOLD) -> Result:
+    """Прогнать бенчмарки (с подстрокой `only` в имени).
+
+    Если задан `baseline`, бенчмарк, вышедший за порог, перемеряется до
+    _RECHECKS раз и берётся лучший результат — разовый шум не считается
+    регрессией.
+    """
+    results: Result = {}
+    for name, (func, ops) in _benchmarks().items():
+        if only and only not in name:
+            continue
+        result = _measure(func, ops)
+        base = (baseline or {}).get(name)
+        for _ in range(_RECHECKS if base else 0):
+            if _change(result, base) <= threshold:
+                break
+            result = min(result, _measure(func, ops), key=lambda r: r[0] / r[1])
+        results[name] = result
+        print(f"  {name:<32}{_fmt(result[0]):>14}", flush=True)
+    return results
+
+
+def _change(result: tuple[float, float], base: tuple[float, float]) -> float:
+    """Относительное изменение в долях эталона (+0.1 — на 10% медленнее)."""
+    return (result[0] / result[1]) / (base[0] / base[1]) - 1
+
+
+def _fmt(ns: float) -> str:
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} мс"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} мкс"
+    return f"{ns:.0f} нс"
+
+
+def save(results: Result, path: str) -> None:
+    """Записать замеры как базовые (JSON)."""
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "unit": "ns/op",
+        "results": {
+            name: {"ns": round(ns, 1), "reference_ns": round(ref, 1)}
+            for name, (ns, ref) in sorted(results.items())
+        },
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def load(path: str) -> Result:
+    """Базовые замеры из JSON."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {name: (r["ns"], r["reference_ns"]) for name, r in data["results"].items()}
+
+
+def compare(results: Result, baseline: Result, threshold: float) -> list[str]:
+    """Сравнить с базовыми замерами, напечатать таблицу.
+
+    Returns:
+        Имена бенчмарков с регрессией больше `threshold`.
+    """
+    regressions = []
+    print(f"\n{'бенчмарк':<32}{'база':>12}{'сейчас':>12}{'машина':>9}{'изменение':>12}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<32}{'—':>12}{_fmt(result[0]):>12}{'':>9}{'новый':>12}")
+            continue
+        change = _change(result, base)
+        mark = ""
+        if change > threshold:
+            mark = "  РЕГРЕССИЯ"
+            regressions.append(name)
+        elif change < -threshold:
+            mark = "  ускорение"
+        speed = base[1] / result[1]
+        print(f"{name:<32}{_fmt(base[0]):>12}{_fmt(result[0]):>12}{speed:>8.2f}x"
+              f"{change:>+11.1%}{mark}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарки горячих путей")
+    parser.add_argument("--save", action="store_true", help="записать результат как базовый")
+    parser.add_argument("--compare", action="store_true", help="сравнить с базовым")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="файл базовых замеров")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="допустимое замедление (доля, 0.1 = 10%%)")
+    parser.add_argument("--only", default=None, help="только бенчмарки с подстрокой в имени")
+    args = parser.parse_args()
+
+    print(f"Python {platform.python_version()}, {platform.machine()}")
+    baseline = load(args.baseline) if args.compare else None
+    results = run(args.only, baseline, args.threshold)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nРегрессии больше {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nРегрессий больше {args.threshold:.0%} нет")
+    if args.save:
+        save(results, args.baseline)
+        print(f"Базовый замер записан: {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Генератор шкалы ставок по симуляции (Kelly с ограничением разброса).
+
+Симулятор играет ровной ставкой в одну единицу и раскладывает результаты
+раундов по корзинам истинного счёта (TC перед раздачей, округление вниз).
+По каждой корзине получаются преимущество (среднее) и дисперсия, а
+из них — ставка по Келли: доля банкролла = преимущество / дисперсия.
+Ставки округляются до целых единиц минимума и зажимаются в [1, spread];
+шкала не убывает с ростом счёта. В редких крайних корзинах оценка — шум,
+там преимущество берётся из линейной аппроксимации по остальным.
+
+Симуляция идёт на всех ядрах через parallel_sim (куски с независимыми
+зёрнами, точное сложение итогов). Готовая шкала — BetRamp —
+пишется компактным файлом (RAMP_DIR, имя по колодам и пенетрации), его
+загружает CardCounter.load_ramp; без файла остаются фиксированные ступени
+bet_recommendation.
+
+Запуск (на ночь — сотни миллионов раундов):
+    python bet_ramp.py --decks 6 --penetration 0.75 --rounds 100000000 --spread 12
+"""
+
+import os
+import struct
+from array import array
+
+from game_state import TC_BUCKETS, TC_MIN, bucket_of
+
+RAMP_VERSION = 1
+RAMP_DIR = os.path.join(os.path.expanduser("~"), ".blackjack_assistant", "bet_ramps")
+
+_MAGIC = b"BJRAMP"
+# Заголовок: версия, колоды, пенетрация (‰), разброс, TC_MIN, число корзин
+_HEADER = struct.Struct("<6sBBHBbB")
+
+
+class BetRamp:
+    """Шкала ставок: множитель минимума и преимущество по корзинам TC.
+
+    Attributes:
+        decks: колод в шу, для которого считалась шкала.
+        penetration: пенетрация симуляции.
+        spread: максимальный множитель.
+        bets: множители по корзинам (bytes, корзина 0 — TC ≤ TC_MIN).
+        advantage: преимущество игрока по корзинам, доли ставки (array("f")).
+    """
+
+    __slots__ = ("decks", "penetration", "spread", "bets", "advantage")
+
+    def __init__(self, decks: int, penetration: float, spread: int,
+                 bets: bytes, advantage: array) -> None:
+        self.decks = decks
+        self.penetration = penetration
+        self.spread = spread
+        self.bets = bytes(bets)
+        self.advantage = array("f", advantage)
+
+    def bet(self, tc: float) -> int:
+        """Множитель минимальной ставки при истинном счёте `tc`."""
+        return self.bets[bucket_of(tc)]
+
+    def advantage_at(self, tc: float) -> float:
+        """Преимущество игрока при истинном счёте `tc`, доли ставки."""
+        return self.advantage[bucket_of(tc)]
+
+    def rows(self) -> list[tuple[int, int, float]]:
+        """(TC, множитель, преимущество) по корзинам — для отчёта."""
+        return [(TC_MIN + i, self.bets[i], self.advantage[i]) for i in range(TC_BUCKETS)]
+
+    def to_bytes(self) -> bytes:
+        header = _HEADER.pack(_MAGIC, RAMP_VERSION, self.decks,
+                              round(self.penetration * 1000), self.spread, TC_MIN, TC_BUCKETS)
+        return header + self.bets + self.advantage.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BetRamp | None":
+        """Шкала из байтов файла или None (чужой формат, версия, обрезан)."""
+        if len(data) < _HEADER.size:
+            return None
+        magic, version, decks, permille, spread, tc_min, buckets = _HEADER.unpack_from(data)
+        if (magic != _MAGIC or version != RAMP_VERSION or tc_min != TC_MIN
+                or buckets != TC_BUCKETS or len(data) != _HEADER.size + 5 * TC_BUCKETS):
+            return None
+        advantage = array("f")
+        advantage.frombytes(data[_HEADER.size + TC_BUCKETS:])
+        return cls(decks, permille / 1000, spread, data[_HEADER.size:_HEADER.size + TC_BUCKETS],
+                   advantage)
+
+    def save(self, path: str) -> None:
+        """Записать шкалу атомарно: временный файл и os.replace."""
+        import tempfile
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.to_bytes())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+def ramp_path(decks: int, penetration: float) -> str:
+    """Файл шкалы по умолчанию для конфигурации стола."""
+    return os.path.join(RAMP_DIR, f"{decks}d_{round(penetration * 1000)}.v{RAMP_VERSION}.bin")
+
+
+def load_ramp(decks: int, penetration: float = 0.75, path: str | None = None) -> BetRamp | None:
+    """Загрузить шкалу из файла или None, если его нет или он не подходит
+    (в том числе рассчитан на другое число колод)."""
+    try:
+        with open(path or ramp_path(decks, penetration), "rb") as f:
+            ramp = BetRamp.from_bytes(f.read())
+    except OSError:
+        return None
+    if ramp is None or ramp.decks != decks:
+        return None
+    return ramp
+
+
+# ---------------------------------------------------------------------
+# Симуляция по корзинам
+# ---------------------------------------------------------------------
+
+def estimate(
+    rounds: int,
+    decks: int = 6,
+    penetration: float = 0.75,
+    seed: int = 0,
+    processes: int | None = None,
+    checkpoint: str | None = None,
+):
+    """Преимущество и дисперсия по корзинам TC ровной ставкой на всех ядрах.
+
+    Returns:
+        parallel_sim.SimTotals; при том же seed итог не зависит от числа процессов.
+    """
+    from parallel_sim import run
+    return run(rounds, decks, penetration, seed, processes, flat=True, checkpoint=checkpoint)
+
+
+def kelly_ramp(
+    stats,
+    decks: int,
+    penetration: float,
+    spread: int = 12,
+    bankroll: float = 1000.0,
+    min_rounds: int = 10_000,
+) -> BetRamp:
+    """Шкала ставок по Келли из оценок по корзинам.
+
+    Args:
+        stats: итоги по корзинам (parallel_sim.SimTotals).
+        bankroll: банкролл в минимальных ставках.
+        min_rounds: в корзинах с меньшим числом раундов преимущество и
+            дисперсия берутся из аппроксимации по остальным корзинам.
+
+    Raises:
+        ValueError: разброс не 1..255 или ни в одной корзине нет min_rounds раундов.
+    """
+    if not 1 <= spread <= 255:
+        raise ValueError(f"разброс ставок должен быть от 1 до 255, а не {spread}")
+    sampled = [i for i in range(TC_BUCKETS) if stats.n[i] >= min_rounds]
+    if not sampled:
+        raise ValueError(f"мало раундов: ни в одной корзине нет {min_rounds}")
+    # Взвешенная по числу раундов прямая преимущество(TC) и средняя дисперсия
+    w = sum(stats.n[i] for i in sampled)
+    mx = sum(stats.n[i] * i for i in sampled) / w
+    my = sum(stats.n[i] * stats.mean(i) for i in sampled) / w
+    sxx = sum(stats.n[i] * (i - mx) ** 2 for i in sampled)
+    slope = sum(stats.n[i] * (i - mx) * (stats.mean(i) - my) for i in sampled) / sxx if sxx else 0.0
+    mean_var = sum(stats.n[i] * stats.variance(i) for i in sampled) / w
+
+    bets = bytearray(TC_BUCKETS)
+    advantage = array("f", bytes(4 * TC_BUCKETS))
+    bet = 1
+    for i in range(TC_BUCKETS):
+        if stats.n[i] >= min_rounds:
+            edge, var = stats.mean(i), stats.variance(i)
+        else:
+            edge, var = my + slope * (i - mx), mean_var
+        advantage[i] = edge
+        if edge > 0 and var > 0:
+            bet = max(bet, min(spread, round(bankroll * edge / var)))
+        bets[i] = bet
+    return BetRamp(decks, penetration, spread, bytes(bets), advantage)
+
+
+def main() -> None:
+    # Окно загружает шкалу при старте — модуль не тянет лишних импортов
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Шкала ставок по симуляции (Kelly)")
+    parser.add_argument("--rounds", type=int, default=20_000_000)
+    parser.add_argument("--decks", type=int, default=6)
+    parser.add_argument("--penetration", type=float, default=0.75)
+    parser.add_argument("--spread", type=int, default=12, help="максимальный множитель ставки")
+    parser.add_argument("--bankroll", type=float, default=1000.0, help="банкролл в минимальных ставках")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None, help="процессов (по умолчанию все ядра)")
+    parser.add_argument("--out", default=None, help="файл шкалы (по умолчанию — в RAMP_DIR)")
+    parser.add_argument("--checkpoint", default=None, help="файл контрольной точки симуляции")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = estimate(args.rounds, args.decks, args.penetration, args.seed, args.processes,
+                     args.checkpoint)
+    elapsed = time.perf_counter() - start
+    ramp = kelly_ramp(stats, args.decks, args.penetration, args.spread, args.bankroll)
+    path = args.out or ramp_path(args.decks, args.penetration)
+    ramp.save(path)
+
+    print(f"{'TC':>4} {'раундов':>12} {'преим.':>8} {'дисп.':>7} {'ставка':>6}")
+    for i, (tc, bet, edge) in enumerate(ramp.rows()):
+        if stats.n[i]:
+            print(f"{tc:>+4d} {stats.n[i]:>12,d} {edge * 100:>+7.2f}% {stats.variance(i):>7.3f} {bet:>5d}x")
+    print(f"Раундов: {stats.rounds:,d} за {elapsed:.1f} с ({stats.rounds / elapsed:,.0f}/с)")
+    print(f"Шкала записана: {path}")
+
+
+if __name__ == "__main__":
+    main()
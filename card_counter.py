@@ -2,9 +2,18 @@
 
 Считает бегущий счёт (Running Count), истинный счёт (True Count),
 и даёт рекомендацию по размеру ставки.
+
+Дополнительно можно вести параллельно другие системы (KO, Hi-Opt II,
+Omega II, Zen, Wong Halves) и побочные счёты тузов и десяток.
+
+Ставка по умолчанию — фиксированные ступени по TC; с загруженной шкалой
+(load_ramp, см. bet_ramp.py) — множитель и преимущество из симуляции.
 """
 
-from strategy import card_value
+from array import array
+from functools import lru_cache
+
+from strategy import card_value, parse_cards, parse_rank_string
 
 # Hi-Lo значения: мелкие карты +1, крупные -1, средние 0
 HI_LO: dict[int, int] = {
@@ -13,6 +22,127 @@ HI_LO: dict[int, int] = {
     10: -1, 11: -1,                         # крупные (10,В,Д,К,Т)
 }
 
+# Те же значения, индексируемые кодом ранга (0 — нераспознанная карта)
+HI_LO_TAGS: tuple[int, ...] = tuple(HI_LO.get(code, 0) for code in range(12))
+
+
+class CountingSystem:
+    """Система счёта: вектор тегов по кодам рангов.
+
+    Дробные теги (Wong Halves) хранятся целыми, умноженными на `scale`.
+
+    Attributes:
+        name: ключ системы.
+        tags: теги по кодам рангов 0..11, умноженные на scale.
+        scale: делитель тегов.
+        balanced: сбалансированная ли система (сумма тегов по колоде = 0).
+        irc_per_deck: для несбалансированных — начальный счёт
+            IRC = irc_base + irc_per_deck × колоды.
+        key_counts: для несбалансированных — ключевой счёт по числу колод.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        tags: dict[int, float],
+        balanced: bool = True,
+        irc_base: int = 0,
+        irc_per_deck: int = 0,
+        key_counts: dict[int, int] | None = None,
+    ) -> None:
+        self.name = name
+        self.scale = 2 if any(t != int(t) for t in tags.values()) else 1
+        self.tags: tuple[int, ...] = tuple(
+            int(tags.get(code, 0) * self.scale) for code in range(12))
+        self.balanced = balanced
+        self.irc_base = irc_base
+        self.irc_per_deck = irc_per_deck
+        self.key_counts = key_counts or {}
+
+    def initial_running_count(self, decks: int) -> int:
+        """Начальный бегущий счёт (IRC) для шу из `decks` колод."""
+        if self.balanced:
+            return 0
+        return self.irc_base + self.irc_per_deck * decks
+
+    def key_count(self, decks: int) -> float:
+        """Ключевой счёт несбалансированной системы: с него повышают ставку.
+
+        Для колод вне таблицы — линейная интерполяция между соседями.
+        """
+        if decks in self.key_counts:
+            return self.key_counts[decks]
+        known = sorted(self.key_counts)
+        if not known:
+            return 0.0
+        lo = max((d for d in known if d < decks), default=known[0])
+        hi = min((d for d in known if d > decks), default=known[-1])
+        if lo == hi:
+            return self.key_counts[lo]
+        frac = (decks - lo) / (hi - lo)
+        return self.key_counts[lo] + frac * (self.key_counts[hi] - self.key_counts[lo])
+
+
+COUNTING_SYSTEMS: dict[str, CountingSystem] = {
+    system.name: system
+    for system in (
+        CountingSystem("hi_lo", HI_LO),
+        CountingSystem(
+            "ko",
+            {2: 1, 3: 1, 4: 1, 5: 1, 6: 1, 7: 1, 10: -1, 11: -1},
+            balanced=False, irc_base=4, irc_per_deck=-4,
+            key_counts={1: 2, 2: 1, 6: -4, 8: -6},
+        ),
+        CountingSystem("hi_opt_2", {2: 1, 3: 1, 4: 2, 5: 2, 6: 1, 7: 1, 10: -2}),
+        CountingSystem("omega_2", {2: 1, 3: 1, 4: 2, 5: 2, 6: 2, 7: 1, 9: -1, 10: -2}),
+        CountingSystem("zen", {2: 1, 3: 1, 4: 2, 5: 2, 6: 2, 7: 1, 10: -2, 11: -1}),
+        CountingSystem(
+            "wong_halves",
+            {2: 0.5, 3: 1, 4: 1, 5: 1.5, 6: 1, 7: 0.5, 9: -0.5, 10: -1, 11: -1},
+        ),
+    )
+}
+
+# Все дополнительные счёты упакованы в одно целое: по 32 бита на счёт со
+# смещением 2^31, так что одно сложение обновляет все системы сразу.
+_LANE_BITS = 32
+_LANE_MASK = (1 << _LANE_BITS) - 1
+_LANE_BIAS = 1 << (_LANE_BITS - 1)
+
+# Побочные счёты: сколько вышло тузов и десяток
+SIDE_ACES = "aces"
+SIDE_TENS = "tens"
+_SIDE_TAGS = {
+    SIDE_ACES: tuple(int(code == 11) for code in range(12)),
+    SIDE_TENS: tuple(int(code == 10) for code in range(12)),
+}
+
+
+@lru_cache(maxsize=None)
+def _lane_layout(
+    systems: tuple[str, ...], side_counts: bool,
+) -> tuple[tuple[CountingSystem, ...], tuple[str, ...], dict[str, int], tuple[int, ...]]:
+    """Раскладка упакованных счётов для набора систем — общая для всех счётчиков.
+
+    Returns:
+        (системы, побочные счёты, {имя: номер счёта}, приращения по кодам рангов)
+    """
+    unknown = [name for name in systems if name not in COUNTING_SYSTEMS]
+    if unknown:
+        raise ValueError(f"неизвестная система счёта: {', '.join(unknown)}")
+    active = tuple(COUNTING_SYSTEMS[name] for name in systems if name != "hi_lo")
+    side_names = (SIDE_ACES, SIDE_TENS) if side_counts else ()
+    lanes = [s.tags for s in active] + [_SIDE_TAGS[name] for name in side_names]
+    lane_index = {
+        name: i for i, name in enumerate([s.name for s in active] + list(side_names))
+    }
+    # Приращение упакованного счёта для каждого кода ранга
+    deltas = tuple(
+        sum(tags[code] << (_LANE_BITS * i) for i, tags in enumerate(lanes))
+        for code in range(12)
+    )
+    return active, side_names, lane_index, deltas
+
 
 class CardCounter:
     """Счётчик карт Hi-Lo для блэкджека.
@@ -21,13 +151,111 @@ class CardCounter:
         total_decks: количество колод в шу (обычно 6 или 8).
         running_count: бегущий счёт.
         cards_dealt: сколько карт вышло.
+
+    Кроме счёта ведётся точный остаток шу по рангам (remaining): по одному
+    вычитанию на карту, запросы по составу считаются только при вызове.
     """
 
-    def __init__(self, total_decks: int = 6) -> None:
+    __slots__ = (
+        "total_decks", "running_count", "cards_dealt", "_total_cards",
+        "_systems", "_side_names", "_lane_index", "_deltas", "_lanes", "_remaining",
+        "ramp", "_ramp_source",
+    )
+
+    def __init__(
+        self,
+        total_decks: int = 6,
+        systems: tuple[str, ...] = (),
+        side_counts: bool = False,
+    ) -> None:
         self.total_decks = total_decks
         self.running_count: int = 0
         self.cards_dealt: int = 0
         self._total_cards = total_decks * 52
+        self.ramp = None
+        # Откуда грузилась шкала: (пенетрация, файл или None) — для set_decks
+        self._ramp_source = None
+        self.set_systems(systems, side_counts)
+
+    # -----------------------------------------------------------------
+    # Дополнительные системы и побочные счёты
+    # -----------------------------------------------------------------
+
+    def set_systems(self, systems: tuple[str, ...] = (), side_counts: bool = False) -> None:
+        """Выбрать дополнительные системы счёта (ключи COUNTING_SYSTEMS).
+
+        Hi-Lo ведётся всегда (running_count). Сбрасывает текущий шу.
+        """
+        # Раскладка общая для всех счётчиков с тем же набором систем
+        self._systems, self._side_names, self._lane_index, self._deltas = (
+            _lane_layout(tuple(systems), side_counts))
+        self.reset_shoe()
+
+    def _initial_lanes(self) -> int:
+        packed = 0
+        for i in range(len(self._lane_index)):
+            irc = 0
+            if i < len(self._systems):
+                system = self._systems[i]
+                irc = system.initial_running_count(self.total_decks) * system.scale
+            packed += (_LANE_BIAS + irc) << (_LANE_BITS * i)
+        return packed
+
+    def _lane(self, name: str) -> int:
+        i = self._lane_index[name]
+        return ((self._lanes >> (_LANE_BITS * i)) & _LANE_MASK) - _LANE_BIAS
+
+    def running_count_of(self, system: str) -> float:
+        """Бегущий счёт по системе `system`."""
+        if system == "hi_lo":
+            return self.running_count
+        if system not in self._lane_index:
+            raise KeyError(f"система {system!r} не включена")
+        raw = self._lane(system)
+        scale = COUNTING_SYSTEMS[system].scale
+        return raw / scale if scale != 1 else raw
+
+    def true_count_of(self, system: str) -> float:
+        """Истинный счёт по сбалансированной системе `system`.
+
+        Для несбалансированных систем (KO) деление не применяется —
+        используйте running_count_of и key_count.
+        """
+        if not COUNTING_SYSTEMS[system].balanced:
+            raise ValueError(f"{system}: несбалансированная система, истинный счёт не считается")
+        decks = max(self.decks_remaining, 0.25)
+        return self.running_count_of(system) / decks
+
+    def key_count(self, system: str) -> float:
+        """Ключевой счёт несбалансированной системы для текущего числа колод."""
+        return COUNTING_SYSTEMS[system].key_count(self.total_decks)
+
+    def counts(self) -> dict[str, float]:
+        """Бегущие счёты всех включённых систем, включая Hi-Lo."""
+        out: dict[str, float] = {"hi_lo": self.running_count}
+        for system in self._systems:
+            out[system.name] = self.running_count_of(system.name)
+        return out
+
+    @property
+    def aces_seen(self) -> int:
+        """Побочный счёт: вышло тузов (нужно side_counts=True)."""
+        return self._lane(SIDE_ACES)
+
+    @property
+    def tens_seen(self) -> int:
+        """Побочный счёт: вышло десяток и картинок (нужно side_counts=True)."""
+        return self._lane(SIDE_TENS)
+
+    @property
+    def ace_excess(self) -> float:
+        """Избыток тузов на колоду в остатке шу (>0 — тузов больше нормы)."""
+        aces_left = 4 * self.total_decks - self.aces_seen
+        return aces_left / max(self.decks_remaining, 0.25) - 4
+
+    # -----------------------------------------------------------------
+    # Ввод карт
+    # -----------------------------------------------------------------
 
     def add_card(self, rank: str) -> None:
         """Добавить карту в счёт.
@@ -35,15 +263,139 @@ class CardCounter:
         Args:
             rank: ранг карты ('2'-'9','10','В','Д','К','Т')
         """
-        val = card_value(rank)
-        count_val = HI_LO.get(val, 0)
-        self.running_count += count_val
+        self.add_code(card_value(rank))
+
+    def add_code(self, code: int) -> None:
+        """Добавить карту по коду ранга (см. strategy.card_value)."""
+        self.running_count += HI_LO_TAGS[code]
+        self._lanes += self._deltas[code]
+        remaining = self._remaining
+        # Остаток хранится в int16 — как в add_cards, при многих шу без сброса не переполнять
+        left = remaining[code]
+        if left > -0x8000:
+            remaining[code] = left - 1
         self.cards_dealt += 1
 
-    def add_cards(self, ranks: list[str]) -> None:
-        """Добавить несколько карт."""
-        for r in ranks:
-            self.add_card(r)
+    def add_cards(self, cards, trajectory: bool = False):
+        """Добавить много карт разом (например, записанный шу).
+
+        Карты не проходят по одной: по буферу кодов считается, сколько
+        вышло карт каждого ранга, и счёты, остаток и число карт
+        сдвигаются сразу на итог — двенадцать подсчётов в C вместо
+        цикла по картам.
+
+        Args:
+            cards: список рангов ('10', 'К', ...), строка рангов подряд
+                (strategy.parse_rank_string) или буфер кодов рангов —
+                bytes, bytearray, array или массив numpy.
+            trajectory: вернуть траекторию счёта (нужен numpy).
+
+        Returns:
+            None или (running, true) — массивы numpy с бегущим и истинным
+            счётом Hi-Lo после каждой карты (кумулятивная сумма тегов).
+
+        Raises:
+            ValueError: в буфере код больше 11 или в строке не ранг.
+        """
+        if isinstance(cards, str):
+            codes = parse_rank_string(cards)
+        elif isinstance(cards, (list, tuple)):
+            codes = bytes(parse_cards(cards))
+        elif hasattr(cards, "dtype"):
+            codes = cards
+        elif isinstance(cards, array) and cards.itemsize != 1:
+            codes = bytes(cards.tolist())
+        else:
+            codes = bytes(memoryview(cards).cast("B"))
+
+        if isinstance(codes, bytes):
+            per_rank = [codes.count(code) for code in range(12)]
+            n = len(codes)
+        else:
+            import numpy as np
+            codes = np.ravel(codes)
+            n = len(codes)
+            per_rank = np.bincount(codes, minlength=12).tolist() if n else [0] * 12
+        if len(per_rank) > 12 or sum(per_rank) != n:
+            raise ValueError("код ранга вне 0..11")
+
+        if trajectory:
+            result = self._trajectory(codes, n)
+        self.running_count += sum(HI_LO_TAGS[code] * k for code, k in enumerate(per_rank))
+        self._lanes += sum(self._deltas[code] * k for code, k in enumerate(per_rank))
+        remaining = self._remaining
+        for code, k in enumerate(per_rank):
+            if k:
+                # Остаток хранится в int16: при дозаписи многих шу без сброса не переполнять
+                remaining[code] = max(remaining[code] - k, -0x8000)
+        self.cards_dealt += n
+        return result if trajectory else None
+
+    def _trajectory(self, codes, n: int):
+        """Бегущий и истинный счёт после каждой из `n` карт (до их добавления в счёт)."""
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("для траектории счёта нужен numpy") from None
+        if isinstance(codes, bytes):
+            codes = np.frombuffer(codes, dtype=np.uint8)
+        tags = np.array(HI_LO_TAGS, dtype=np.int64)
+        running = self.running_count + np.cumsum(tags[codes])
+        dealt = self.cards_dealt + np.arange(1, n + 1)
+        # Как true_count: остаток не меньше карты, колод не меньше 0.25
+        decks = np.maximum(np.maximum(self._total_cards - dealt, 1) / 52, 0.25)
+        return running, running / decks
+
+    def remove_card(self, rank: str) -> None:
+        """Откатить ранее добавленную карту (отмена ввода)."""
+        self.remove_code(card_value(rank))
+
+    def remove_code(self, code: int) -> None:
+        """Откатить карту по коду ранга."""
+        self.running_count -= HI_LO_TAGS[code]
+        self._lanes -= self._deltas[code]
+        self._remaining[code] += 1
+        self.cards_dealt = max(0, self.cards_dealt - 1)
+
+    # -----------------------------------------------------------------
+    # Точный состав остатка шу
+    # -----------------------------------------------------------------
+
+    def remaining_of(self, code: int) -> int:
+        """Сколько карт с кодом ранга `code` осталось в шу."""
+        return self._remaining[code]
+
+    @property
+    def composition(self) -> tuple[int, ...]:
+        """Остаток шу по значениям 2..9, 10, туз (формат ev_calculator)."""
+        return tuple(max(n, 0) for n in self._remaining[2:12])
+
+    @property
+    def known_remaining(self) -> int:
+        """Карт в остатке по точному составу (без нераспознанных)."""
+        return sum(self.composition)
+
+    @property
+    def p_next_ten(self) -> float:
+        """Вероятность, что следующая карта — десятка или картинка."""
+        left = self.known_remaining
+        return self._remaining[10] / left if left > 0 else 0.0
+
+    @property
+    def p_next_ace(self) -> float:
+        """Вероятность, что следующая карта — туз."""
+        left = self.known_remaining
+        return self._remaining[11] / left if left > 0 else 0.0
+
+    @property
+    def insurance_ev(self) -> float:
+        """EV страховки на единицу страховой ставки (платит 2:1).
+
+        Считается по точному составу: карта дилера и карты игрока уже
+        должны быть введены. Страховка выгодна при EV > 0.
+        """
+        p = self.p_next_ten
+        return 2 * p - (1 - p)
 
     @property
     def cards_remaining(self) -> int:
@@ -68,13 +420,54 @@ class CardCounter:
         """Процент пройденных карт (0.0 - 1.0)."""
         return self.cards_dealt / self._total_cards
 
+    def load_ramp(self, penetration: float = 0.75, path: str | None = None) -> bool:
+        """Загрузить шкалу ставок (bet_ramp) для текущего числа колод.
+
+        Пенетрация и файл запоминаются: set_decks перезагружает шкалу
+        оттуда же.
+
+        Args:
+            path: файл шкалы; None — файл по умолчанию для колод шу
+                (bet_ramp.ramp_path). Если шкала в файле рассчитана на
+                другое число колод, берётся шкала по умолчанию.
+
+        Returns:
+            True, если шкала найдена; иначе остаются фиксированные ступени.
+        """
+        from bet_ramp import load_ramp
+        self._ramp_source = (penetration, path)
+        self.ramp = load_ramp(self.total_decks, penetration, path)
+        if self.ramp is None and path is not None:
+            self.ramp = load_ramp(self.total_decks, penetration)
+        return self.ramp is not None
+
+    def true_count_before(self, codes) -> float:
+        """Истинный счёт до карт `codes` (уже учтённых) — например, счёт на
+        момент ставки по картам текущей раздачи."""
+        running = self.running_count - sum(HI_LO_TAGS[c] for c in codes)
+        decks = max(self._total_cards - self.cards_dealt + len(codes), 1) / 52
+        if decks < 0.25:
+            decks = 0.25
+        return running / decks
+
     def bet_recommendation(self) -> tuple[str, int]:
         """Рекомендация по размеру ставки.
 
         Returns:
             (текст, множитель) — напр. ("3x от минимума", 3)
         """
-        tc = self.true_count
+        return self.bet_for(self.true_count)
+
+    def bet_for(self, tc: float) -> tuple[str, int]:
+        """Рекомендация по размеру ставки при истинном счёте `tc`."""
+        ramp = self.ramp
+        if ramp is not None:
+            bet = ramp.bet(tc)
+            if bet <= 1:
+                return ("Минимум", 1)
+            if bet >= ramp.spread:
+                return (f"Максимум! {bet}x", bet)
+            return (f"{bet}x от минимума", bet)
         if tc <= 0:
             return ("Минимум", 1)
         elif tc < 2:
@@ -90,18 +483,56 @@ class CardCounter:
     def player_advantage(self) -> float:
         """Примерное преимущество игрока в процентах.
 
-        Базовое преимущество казино ~0.5%.
-        Каждая единица TC даёт ~+0.5% игроку.
+        Со шкалой ставок — оценка симуляции для корзины TC. Без неё:
+        базовое преимущество казино ~0.5%, каждая единица TC даёт ~+0.5% игроку.
         """
+        if self.ramp is not None:
+            return self.ramp.advantage_at(self.true_count) * 100
         return -0.5 + self.true_count * 0.5
 
     def reset_shoe(self) -> None:
         """Сброс — новый шу (перемешали колоды)."""
         self.running_count = 0
         self.cards_dealt = 0
+        self._lanes = self._initial_lanes()
+        # Остаток по кодам рангов 0..11 (0 — нераспознанные карты, не учитываются)
+        decks = self.total_decks
+        self._remaining = array("h", [0, 0] + [4 * decks] * 8 + [16 * decks, 4 * decks])
+
+    def __getstate__(self) -> tuple:
+        """Состояние для снимков (copy, pickle): системы — по именам,
+        остаток и шкала ставок — байтами, источник шкалы (load_ramp)."""
+        return (
+            self.total_decks, self.running_count, self.cards_dealt,
+            tuple(s.name for s in self._systems), bool(self._side_names),
+            self._lanes, self._remaining.tobytes(),
+            self.ramp.to_bytes() if self.ramp is not None else None,
+            self._ramp_source,
+        )
+
+    def __setstate__(self, state: tuple) -> None:
+        (self.total_decks, self.running_count, self.cards_dealt,
+         systems, side_counts, self._lanes, remaining, ramp, self._ramp_source) = state
+        if ramp is not None:
+            from bet_ramp import BetRamp
+            ramp = BetRamp.from_bytes(ramp)
+        self.ramp = ramp
+        self._total_cards = self.total_decks * 52
+        self._systems, self._side_names, self._lane_index, self._deltas = (
+            _lane_layout(systems, side_counts))
+        self._remaining = array("h")
+        self._remaining.frombytes(remaining)
 
     def set_decks(self, n: int) -> None:
-        """Изменить количество колод."""
+        """Изменить количество колод.
+
+        Шкала ставок перезагружается из того же источника, что и в
+        load_ramp (тот же файл, если он для `n` колод, иначе шкала по
+        умолчанию для `n` колод; без неё — фиксированные ступени). Стратегия под правила стола —
+        у сессии (TableSession.set_rules), счётчик её не трогает.
+        """
         self.total_decks = n
         self._total_cards = n * 52
         self.reset_shoe()
+        if self._ramp_source is not None and (self.ramp is None or self.ramp.decks != n):
+            self.load_ramp(*self._ramp_source)
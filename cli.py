@@ -0,0 +1,193 @@
+"""Консольный помощник блэкджека — без Qt.
+
+Тот же стол, что и в окне (main.py): карты вводятся командами, после
+каждой строки печатаются рекомендация, счёт и ставка. По умолчанию
+сессия пишется в общий журнал, так что консоль продолжает игру окна и
+наоборот.
+
+Команды (через пробел, можно несколько в строке):
+    2..10 J Q K A       карта в текущий режим ввода
+    dealer player others
+                        режим ввода
+    new                 новая рука
+    undo                отменить последнюю карту
+    shoe                новый шу
+    decks N             колод в шу (сбрасывает шу)
+    win loss push       результат руки (начинает новую)
+    dwin dloss dpush    результат удвоенной руки
+    quit                выход
+
+Запуск:
+    python cli.py                       # интерактивно (или команды из stdin)
+    python cli.py 6 10 6                # одна строка команд и выход
+    python cli.py --no-log --decks 8
+    python cli.py --h17 --surrender     # стратегия под правила стола
+    python cli.py --ramp                # ставки по шкале из bet_ramp.py
+"""
+
+import argparse
+import os
+import sys
+
+from event_log import DEFAULT_LOG_PATH, EventLog
+from game_state import GameState
+from rules import Rules
+from session_manager import TableSession
+from snapshot import SnapshotWriter, snapshot_path
+from strategy import RANK_UNKNOWN, card_value
+from strategy_compiler import load_table
+
+MODES = (GameState.INPUT_DEALER, GameState.INPUT_PLAYER, GameState.INPUT_OTHERS)
+RESULTS = ("win", "loss", "push")
+DOUBLED_RESULTS = ("dwin", "dloss", "dpush")
+
+
+def execute(session: TableSession, line: str) -> bool:
+    """Выполнить строку команд.
+
+    Returns:
+        False, если встретилась команда выхода.
+
+    Raises:
+        ValueError: неизвестная команда или карта, неверное число колод.
+    """
+    tokens = line.split()
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        command = token.lower()
+        i += 1
+        if command in ("quit", "exit", "q"):
+            return False
+        if command in MODES:
+            session.set_input_mode(command)
+        elif command in RESULTS:
+            session.record_result(command)
+        elif command in DOUBLED_RESULTS:
+            session.record_result(command[1:], doubled=True)
+        elif command == "new":
+            session.new_hand()
+        elif command == "undo":
+            session.undo()
+        elif command == "shoe":
+            session.new_shoe()
+        elif command == "decks":
+            if i == len(tokens) or not tokens[i].isdigit() or not 1 <= int(tokens[i]) <= 8:
+                raise ValueError("decks: укажите число колод от 1 до 8")
+            # Консоль ждёт таблицу под новые колоды, а не считает её в фоне
+            load_table(session.rules.with_decks(int(tokens[i])))
+            session.set_decks(int(tokens[i]))
+            i += 1
+        elif card_value(token) != RANK_UNKNOWN:
+            session.add_card(token)
+        else:
+            raise ValueError(f"неизвестная команда или карта: {token!r}")
+    return True
+
+
+def _cards(hand) -> str:
+    return f"[{hand.display()}]" if hand else "—"
+
+
+def render(session: TableSession) -> str:
+    """Состояние стола одной-четырьмя строками."""
+    game = session.game
+    counter = session.counter
+    lines = [f"Дилер: {_cards(game.dealer)}  Мои: {_cards(game.player)}"
+             + (f"  Чужие: {len(game.others)} шт" if game.others else "")]
+    rec = session.recommendation()
+    if rec is not None:
+        lines.append(f">> {rec['action_ru']} <<  {rec['explanation']}")
+    bet_text, _ = counter.bet_recommendation()
+    lines.append(
+        f"RC: {counter.running_count:+d}  TC: {counter.true_count:+.1f}  "
+        f"Колод: {counter.decks_remaining:.1f}  Ставка: {bet_text}  "
+        f"[ввод: {game.input_mode}]"
+    )
+    stats = game.stats
+    if stats.bet_hands:
+        lines.append(
+            f"Сессия: {stats.hands_played} рук  Итог: {stats.net:+g} ед.  "
+            f"σ руки: {stats.std_dev:.2f}  Просадка: {stats.max_drawdown:g} ед."
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Консольный помощник блэкджека")
+    parser.add_argument("commands", nargs="*", help="строка команд; без неё — интерактивно")
+    parser.add_argument("--log", default=DEFAULT_LOG_PATH, help="файл журнала сессии")
+    parser.add_argument("--no-log", action="store_true", help="не сохранять сессию")
+    parser.add_argument("--decks", type=int, default=6, help="колод в шу для нового журнала")
+    parser.add_argument("--ramp", nargs="?", const="", default=None, metavar="ФАЙЛ",
+                        help="ставки по шкале bet_ramp.py (без файла — шкала для колод шу)")
+    parser.add_argument("--penetration", type=float, default=0.75,
+                        help="пенетрация, для которой искать шкалу")
+    table_rules = parser.add_argument_group(
+        "правила стола", "с любым из этих флагов стратегия считается под правила "
+        "(strategy_compiler, первый раз — секунды, потом из кэша)")
+    table_rules.add_argument("--h17", action="store_true", help="дилер берёт на мягких 17")
+    table_rules.add_argument("--no-das", action="store_true", help="без дабла после сплита")
+    table_rules.add_argument("--surrender", action="store_true", help="поздняя сдача")
+    table_rules.add_argument("--split-hands", type=int, default=None, help="максимум рук после сплитов")
+    table_rules.add_argument("--resplit-aces", action="store_true", help="пересплит тузов")
+    table_rules.add_argument("--no-peek", action="store_true", help="дилер не проверяет блэкджек")
+    args = parser.parse_args()
+
+    snapshots = None
+    if args.no_log:
+        log = EventLog()
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(args.log)), exist_ok=True)
+        log = EventLog(args.log)
+        snapshots = SnapshotWriter(snapshot_path(args.log))
+    session = TableSession("local", decks=args.decks, log=log, snapshots=snapshots)
+    if (args.h17 or args.no_das or args.surrender or args.split_hands is not None
+            or args.resplit_aces or args.no_peek):
+        rules = Rules(
+            decks=session.counter.total_decks, h17=args.h17, das=not args.no_das,
+            surrender=args.surrender,
+            split_hands=args.split_hands if args.split_hands is not None else 4,
+            resplit_aces=args.resplit_aces, peek=not args.no_peek,
+        )
+        # Консоль может подождать расчёта: первая же рекомендация — по правилам
+        load_table(rules)
+        session.set_rules(rules)
+        print(f"Правила: {rules.describe()}")
+    if args.ramp is not None:
+        if session.counter.load_ramp(args.penetration, args.ramp or None):
+            print(f"Шкала ставок: до {session.counter.ramp.spread}x")
+        else:
+            print("Шкала ставок не найдена — запустите bet_ramp.py", file=sys.stderr)
+
+    try:
+        if args.commands:
+            execute(session, " ".join(args.commands))
+            print(render(session))
+            return
+        interactive = sys.stdin.isatty()
+        if interactive:
+            print(render(session))
+        while True:
+            try:
+                line = input("> " if interactive else "")
+            except EOFError:
+                break
+            try:
+                if not execute(session, line):
+                    break
+            except ValueError as e:
+                print(f"Ошибка: {e}", file=sys.stderr)
+                continue
+            if line.strip():
+                print(render(session))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if snapshots is not None:
+            snapshots.close()
+        log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Распределения итогов дилера с ограниченным LRU-кэшем.
+
+Любой расчёт EV или вероятностей упирается в распределение дилера
+(17..21 и перебор) при данной открытой карте и остатке шу. Сервис
+считает его и кэширует по компактному ключу состава; размер кэша
+ограничен, старые записи вытесняются (LRU), счётчики попаданий,
+промахов и вытеснений доступны через cache_info().
+
+Состав шу — кортеж из 10 чисел: сколько осталось карт каждого значения,
+индекс = значение - 2 (2..9, 10, туз).
+"""
+
+from collections import OrderedDict
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # без numpy распределения дилера считаются циклом
+    np = None
+
+# Итоги дилера: 17, 18, 19, 20, 21, перебор
+DEALER_OUTCOMES = (17, 18, 19, 20, 21, 22)
+
+TEN_INDEX = 8   # индекс десяток в составе
+ACE_INDEX = 9   # индекс тузов в составе
+
+# Бит на значение в упакованном ключе: до 511 карт одного значения
+_PACK_BITS = 9
+_PACK_MASK = (1 << _PACK_BITS) - 1
+
+
+def pack_composition(comp: tuple[int, ...]) -> int:
+    """Упаковать состав шу в одно целое (ключ кэша)."""
+    key = 0
+    for i, cnt in enumerate(comp):
+        key |= cnt << (_PACK_BITS * i)
+    return key
+
+
+def unpack_composition(key: int) -> tuple[int, ...]:
+    """Обратное к pack_composition."""
+    return tuple((key >> (_PACK_BITS * i)) & _PACK_MASK for i in range(10))
+
+
+# Распределение дилера считается не рекурсией по составу, а через
+# заранее перечисленные мультимножества добранных карт: для открытой
+# карты дилера набор «путей» до 17+ фиксирован, а вероятность пути
+# зависит от состава только через убывающие факториалы
+#   P(путь) = Π_v ff(comp[v], m_v) / ff(N, k),
+# где m_v — сколько карт значения v в пути, k — длина пути.
+# Так одно распределение — один проход по ~200..2000 путям без рекурсии.
+
+
+def _dealer_paths(up: int, h17: bool) -> list[tuple[tuple[tuple[int, int], ...], int, int, int]]:
+    """Все пути дилера от открытой карты `up` до итога.
+
+    Returns:
+        [(((индекс, кратность), ...), длина, число порядков, итог 0..5), ...]
+        Для 10/туза первой картой не может быть туз/десятка (peek).
+    """
+    excluded = ACE_INDEX if up == 10 else TEN_INDEX if up == 11 else -1
+    orders: dict[tuple[int, ...], int] = {}
+    outcome: dict[tuple[int, ...], int] = {}
+
+    def walk(hard: int, soft: bool, drawn: tuple[int, ...]) -> None:
+        total = hard + 10 if soft and hard <= 11 else hard
+        if total > 21 or (total >= 17 and not (h17 and total == 17 and soft and hard <= 11)):
+            key = tuple(sorted(drawn))
+            orders[key] = orders.get(key, 0) + 1
+            outcome[key] = 5 if total > 21 else total - 17
+            return
+        for i in range(10):
+            if not drawn and i == excluded:
+                continue
+            walk(hard + (1 if i == ACE_INDEX else i + 2), soft or i == ACE_INDEX, drawn + (i,))
+
+    walk(1 if up == 11 else up, up == 11, ())
+    paths = []
+    for key, n_orders in orders.items():
+        mult: dict[int, int] = {}
+        for i in key:
+            mult[i] = mult.get(i, 0) + 1
+        paths.append((tuple(mult.items()), len(key), n_orders, outcome[key]))
+    return paths
+
+
+# Сдвиги j для множителей (c - j) убывающих факториалов
+_STEPS = None if np is None else np.arange(21, dtype=np.float64)
+
+
+@lru_cache(maxsize=None)
+def _paths_for(up: int, h17: bool):
+    """Пути дилера для открытой карты: списком, (если есть numpy) массивами и макс. длина."""
+    paths = _dealer_paths(up, h17)
+    depth = max(p[1] for p in paths)
+    if np is None:
+        return paths, None, depth
+    mult = np.zeros((len(paths), 10), dtype=np.intp)
+    for row, (items, _, _, _) in enumerate(paths):
+        for i, m in items:
+            mult[row, i] = m
+    # Индексы ff(comp[v], m_v) в плоской таблице факториалов (строка — depth + 1)
+    cells = np.arange(10) * (depth + 1) + mult
+    lengths = np.array([p[1] for p in paths], dtype=np.intp)
+    weights = np.array([p[2] for p in paths], dtype=np.float64)
+    outcomes = np.array([p[3] for p in paths], dtype=np.intp)
+    return paths, (cells, lengths, weights, outcomes), depth
+
+
+def _falling(n: int, k: int) -> list[float]:
+    """[ff(n, 0), ff(n, 1), ..., ff(n, k)] — убывающие факториалы."""
+    out = [1.0]
+    for j in range(k):
+        out.append(out[-1] * max(n - j, 0))
+    return out
+
+
+def dealer_distribution(up: int, comp: tuple[int, ...], h17: bool = False) -> tuple[float, ...]:
+    """Вероятности итогов дилера (17..21, перебор) при открытой карте `up` — без кэша.
+
+    `comp` — состав шу без открытой карты. Для 10 и туза распределение
+    условное: дилер уже проверил, что блэкджека нет.
+    """
+    paths, arrays, depth = _paths_for(up, h17)
+    n = sum(comp)
+    if n == 0:
+        return (0.0,) * 6
+
+    if arrays is not None:
+        # Убывающие факториалы всех значений и N разом: строка v —
+        # ff(comp[v], 0..depth), последняя строка — ff(N, 0..depth)
+        cells, lengths, weights, outcomes = arrays
+        counts = np.array(comp + (n,), dtype=np.float64)
+        table = np.ones((11, depth + 1))
+        np.cumprod(np.maximum(counts[:, None] - _STEPS[:depth], 0.0), axis=1, out=table[:, 1:])
+        flat = table.ravel()
+        probs = flat[cells].prod(axis=1) * weights / flat[10 * (depth + 1) + lengths]
+        dist = np.bincount(outcomes, weights=probs, minlength=6).tolist()
+    else:
+        den = _falling(n, depth)
+        ff = [_falling(c, depth) for c in comp]
+        dist = [0.0] * 6
+        for items, k, n_orders, out in paths:
+            p = n_orders
+            for i, m in items:
+                p *= ff[i][m]
+            if p:
+                dist[out] += p / den[k]
+
+    # Условие «у дилера нет блэкджека»
+    excluded = ACE_INDEX if up == 10 else TEN_INDEX if up == 11 else -1
+    if excluded >= 0:
+        no_bj = 1 - comp[excluded] / n
+        if no_bj > 0:
+            dist = [p / no_bj for p in dist]
+    return tuple(dist)
+
+
+class DealerProbabilities:
+    """Кэш распределений дилера с вытеснением давно неиспользованных (LRU).
+
+    Attributes:
+        maxsize: максимум записей в кэше.
+        hits: попадания в кэш.
+        misses: промахи (распределение посчитано заново).
+        evictions: вытесненные записи.
+    """
+
+    def __init__(self, maxsize: int = 65536) -> None:
+        self.maxsize = maxsize
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._cache: OrderedDict[tuple[int, int, bool], tuple[float, ...]] = OrderedDict()
+
+    def distribution(self, up: int, comp: tuple[int, ...], h17: bool = False) -> tuple[float, ...]:
+        """Распределение итогов дилера (см. dealer_distribution), из кэша если есть."""
+        key = (up, pack_composition(comp), h17)
+        cache = self._cache
+        dist = cache.get(key)
+        if dist is not None:
+            self.hits += 1
+            cache.move_to_end(key)
+            return dist
+
+        self.misses += 1
+        dist = dealer_distribution(up, comp, h17)
+        cache[key] = dist
+        if len(cache) > self.maxsize:
+            cache.popitem(last=False)
+            self.evictions += 1
+        return dist
+
+    def cache_info(self) -> dict[str, int]:
+        """Счётчики кэша: hits, misses, evictions, size, maxsize."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._cache),
+            "maxsize": self.maxsize,
+        }
+
+    def resize(self, maxsize: int) -> None:
+        """Изменить предел кэша, вытеснив лишние записи."""
+        self.maxsize = maxsize
+        while len(self._cache) > maxsize:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Очистить кэш и счётчики."""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+# Общий экземпляр для всех расчётов EV
+DEALER_PROBS = DealerProbabilities()
@@ -0,0 +1,252 @@
+"""Точный расчёт EV действий с учётом состава шу.
+
+В отличие от фиксированных таблиц strategy.py, считает ожидание ЕЩЁ,
+ХВАТИТ, ДАБЛ и СПЛИТ для реального остатка шу: какие карты уже вышли,
+такие и убраны из колоды.
+
+Состав шу — кортеж из 10 чисел: сколько осталось карт каждого значения,
+индекс = значение - 2 (2..9, 10, туз).
+
+Распределения дилера берутся из общего LRU-кэша dealer_probs.DEALER_PROBS,
+значения дерева добора игрока кэшируются по (состав, состояние): соседние
+состояния после add_card почти всегда попадают в уже посчитанные ветки.
+
+Правила задаются параметрами action_evs: H17, дабл после сплита, поздняя
+сдача, проверка блэкджека дилером (peek), пересплит до заданного числа
+рук. С peek при открытых 10/Т расчёт условный — у дилера нет блэкджека;
+без peek блэкджек дилера забирает все ставки на столе. Тузы после сплита
+получают одну карту.
+"""
+
+from functools import lru_cache
+
+from dealer_probs import ACE_INDEX as _ACE, DEALER_PROBS, TEN_INDEX as _TEN
+from strategy import RANK_UNKNOWN, card_value, parse_cards
+
+_CACHE_SIZE = 1 << 18
+
+
+def shoe_composition(decks: int, removed: list[str] | tuple[str, ...] = ()) -> tuple[int, ...]:
+    """Состав шу из `decks` колод за вычетом вышедших карт."""
+    counts = [4 * decks] * 10
+    counts[_TEN] = 16 * decks
+    for rank in removed:
+        v = card_value(rank)
+        if v and counts[v - 2] > 0:
+            counts[v - 2] -= 1
+    return tuple(counts)
+
+
+def _without(comp: tuple[int, ...], i: int) -> tuple[int, ...]:
+    """Состав без одной карты с индексом i."""
+    return comp[:i] + (comp[i] - 1,) + comp[i + 1:]
+
+
+# =====================================================================
+# Игрок
+# =====================================================================
+
+def _total(hard: int, soft: bool) -> int:
+    return hard + 10 if soft and hard <= 11 else hard
+
+
+def _stand_ev(total: int, up: int, comp: tuple[int, ...], h17: bool) -> float:
+    """EV остановки на сумме `total`."""
+    if total > 21:
+        return -1.0
+    dist = DEALER_PROBS.distribution(up, comp, h17)
+    ev = dist[5]  # перебор дилера
+    for k in range(5):
+        dealer_total = 17 + k
+        if total > dealer_total:
+            ev += dist[k]
+        elif total < dealer_total:
+            ev -= dist[k]
+    return ev
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _hit_ev(hard: int, soft: bool, up: int, comp: tuple[int, ...], h17: bool) -> float:
+    """EV добора одной карты с последующей оптимальной игрой (ЕЩЁ/ХВАТИТ)."""
+    n = sum(comp)
+    ev = 0.0
+    for i, cnt in enumerate(comp):
+        if not cnt:
+            continue
+        new_hard = hard + (1 if i == _ACE else i + 2)
+        new_soft = soft or i == _ACE
+        if new_hard > 21:
+            ev -= cnt / n
+            continue
+        rest = _without(comp, i)
+        total = _total(new_hard, new_soft)
+        best = _stand_ev(total, up, rest, h17)
+        if total < 21:
+            best = max(best, _hit_ev(new_hard, new_soft, up, rest, h17))
+        ev += cnt / n * best
+    return ev
+
+
+def _double_ev(hard: int, soft: bool, up: int, comp: tuple[int, ...], h17: bool) -> float:
+    """EV дабла: одна карта, двойная ставка."""
+    n = sum(comp)
+    ev = 0.0
+    for i, cnt in enumerate(comp):
+        if not cnt:
+            continue
+        new_hard = hard + (1 if i == _ACE else i + 2)
+        total = _total(new_hard, soft or i == _ACE)
+        ev += cnt / n * _stand_ev(total, up, _without(comp, i), h17)
+    return 2 * ev
+
+
+def _split_ev(pair_val: int, up: int, comp: tuple[int, ...], h17: bool, das: bool,
+              max_hands: int = 2) -> float:
+    """EV сплита: сумма EV всех рук после сплита и пересплитов.
+
+    Каждая рука начинается с карты пары и получает вторую карту; если это
+    снова карта пары и рук меньше `max_hands`, рука делится ещё раз
+    (max_hands=2 — без пересплита). Для всех рук берётся один и тот же
+    состав `comp` — карты соседних рук не учитываются.
+    """
+    hard0 = 1 if pair_val == 11 else pair_val
+    soft0 = pair_val == 11
+    pair_index = _ACE if pair_val == 11 else pair_val - 2
+    n = sum(comp)
+    ev = 0.0       # вклад вторых карт, не равных карте пары
+    paired = 0.0   # EV руки, получившей карту пары без права пересплита
+    for i, cnt in enumerate(comp):
+        if not cnt:
+            continue
+        new_hard = hard0 + (1 if i == _ACE else i + 2)
+        new_soft = soft0 or i == _ACE
+        rest = _without(comp, i)
+        total = _total(new_hard, new_soft)
+        best = _stand_ev(total, up, rest, h17)
+        if pair_val != 11:  # тузы после сплита — одна карта
+            if total < 21:
+                best = max(best, _hit_ev(new_hard, new_soft, up, rest, h17))
+            if das:
+                best = max(best, _double_ev(new_hard, new_soft, up, rest, h17))
+        if i == pair_index:
+            paired = best
+        else:
+            ev += cnt / n * best
+    return _resplit_value(ev, paired, comp[pair_index] / n, max_hands)
+
+
+def _resplit_value(other: float, paired: float, q: float, max_hands: int) -> float:
+    """Ожидаемая сумма EV рук сплита с пересплитом до `max_hands` рук.
+
+    Руки обрабатываются по одной: вторая карта не пара — рука даёт
+    `other` (EV, взвешенный по таким картам), пара (вероятность `q`) —
+    рука делится на две, пока рук меньше `max_hands`, иначе играется как
+    есть (`paired`).
+    """
+    memo: dict[tuple[int, int], float] = {}
+
+    def value(open_hands: int, hands: int) -> float:
+        if open_hands == 0:
+            return 0.0
+        key = (open_hands, hands)
+        if key not in memo:
+            if hands < max_hands:
+                memo[key] = (other + (1 - q) * value(open_hands - 1, hands)
+                             + q * value(open_hands + 1, hands + 1))
+            else:
+                memo[key] = other + q * paired + value(open_hands - 1, hands)
+        return memo[key]
+
+    return value(2, 2)
+
+
+def action_evs(
+    player_cards: list[str],
+    dealer_upcard: str,
+    composition: tuple[int, ...],
+    can_double: bool = True,
+    can_split: bool = True,
+    h17: bool = False,
+    das: bool = True,
+    surrender: bool = False,
+    peek: bool = True,
+    split_hands: int = 2,
+    resplit_aces: bool = False,
+) -> dict[str, float]:
+    """EV каждого доступного действия для руки и состава шу.
+
+    Args:
+        player_cards: карты игрока, напр. ["8", "7"]
+        dealer_upcard: открытая карта дилера
+        composition: остаток шу (карты игрока и дилера уже убраны)
+        can_double: доступен ли дабл
+        can_split: доступен ли сплит (учитывается только для пары)
+        h17: дилер берёт на мягких 17
+        das: дабл после сплита
+        surrender: поздняя сдача (только на первых двух картах)
+        peek: дилер проверяет блэкджек до хода игрока
+        split_hands: максимум рук после сплитов (2 — без пересплита)
+        resplit_aces: можно ли пересплитовать тузы
+
+    Returns:
+        {"S": ev, "H": ev, "D": ev, "P": ev, "R": ev} — только доступные
+        действия, EV в единицах начальной ставки.
+    """
+    up = card_value(dealer_upcard)
+    values = parse_cards(player_cards)
+    hard = sum(1 if v == 11 else v for v in values)
+    soft = 11 in values
+    total = _total(hard, soft)
+
+    evs = {"S": _stand_ev(total, up, composition, h17)}
+    if total < 21:
+        evs["H"] = _hit_ev(hard, soft, up, composition, h17)
+        if can_double:
+            evs["D"] = _double_ev(hard, soft, up, composition, h17)
+    # Пара нераспознанных карт (код 0) — не пара: ранга для сплита нет
+    if can_split and len(values) == 2 and values[0] == values[1] != RANK_UNKNOWN:
+        max_hands = split_hands if values[0] != 11 or resplit_aces else 2
+        evs["P"] = _split_ev(values[0], up, composition, h17, das, max_hands)
+    if surrender and len(values) == 2:
+        evs["R"] = -0.5
+
+    if not peek:
+        # Без проверки: с вероятностью блэкджека дилера теряются все ставки
+        # (дабл и сплит — двойная), сдача тоже не спасает
+        n = sum(composition)
+        hole = _ACE if up == 10 else _TEN if up == 11 else -1
+        p = composition[hole] / n if hole >= 0 and n else 0.0
+        if p:
+            for action, ev in evs.items():
+                stake = 2 if action in ("D", "P") else 1
+                evs[action] = (1 - p) * ev - p * stake
+    return evs
+
+
+def best_action(evs: dict[str, float]) -> str:
+    """Действие с наибольшим EV."""
+    return max(evs, key=evs.get)
+
+
+def evaluate_game(game, counter) -> dict[str, float]:
+    """EV действий для текущей раздачи GameState.
+
+    Args:
+        game: GameState с картой дилера и минимум двумя картами игрока
+        counter: CardCounter, в который введены все вышедшие карты шу,
+            включая карты текущей раздачи — его точный остаток и есть
+            состав для расчёта
+    """
+    return action_evs(
+        game.player.cards,
+        game.dealer.cards[0],
+        counter.composition,
+        can_double=game.player.can_double,
+        can_split=game.player.can_split,
+    )
+
+
+def clear_caches() -> None:
+    """Сбросить все кэши (напр. при смене шу)."""
+    DEALER_PROBS.clear()
+    _hit_ev.cache_clear()
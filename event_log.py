@@ -0,0 +1,372 @@
+"""Журнал событий стола: append-only бинарный лог и воспроизведение.
+
+Каждое изменение сессии — карта (куда легла), новая раздача, новый шу,
+результат руки, смена колод, смена режима ввода — записывается одной
+фиксированной записью в конец журнала. Состояние GameState, CardCounter и
+SessionStats в любой точке журнала восстанавливается воспроизведением.
+Результат руки несёт ставку, дабл и корзину истинного счёта на момент
+ставки (encode_result) — из них воспроизводятся агрегаты банкролла.
+
+Формат файла: заголовок HEADER, затем записи по 4 байта
+    <тип: u8> <аргумент: u8> <значение: u16, little-endian>
+
+Чтение файла идёт через mmap, без копирования в память. Воспроизведение
+не проигрывает весь журнал: счётчику нужен только текущий шу, раздаче —
+только текущая раздача, а статистика — к записи результатов рук по порядку.
+"""
+
+import mmap
+import os
+import struct
+
+from card_counter import CardCounter
+from game_state import GameState, SessionStats, bucket_of, card_code
+
+HEADER = b"BJEVLOG\x01"  # сигнатура и версия формата
+
+# Журнал локального стола — общий для окна (main.py) и консоли (cli.py)
+DEFAULT_LOG_PATH = os.path.join(os.path.expanduser("~"), ".blackjack_assistant", "events.bjlog")
+
+_RECORD = struct.Struct("<BBH")
+RECORD_SIZE = _RECORD.size
+
+# Сколько последних записей журнала в файле держится и в памяти: raw() по
+# ним (контрольная сумма снимка после каждого события) не читает файл
+TAIL_RECORDS = 64
+_TAIL_SIZE = TAIL_RECORDS * RECORD_SIZE
+
+# Типы событий
+EVENT_CARD = 1      # аргумент — куда (TARGETS), значение — game_state.card_byte
+EVENT_NEW_HAND = 2
+EVENT_NEW_SHOE = 3
+EVENT_RESULT = 4    # аргумент — индекс в RESULTS, значение — encode_result; начинает новую раздачу
+EVENT_DECKS = 5     # значение — колод в шу; сбрасывает шу
+EVENT_MODE = 6      # аргумент — режим ввода (TARGETS)
+
+TARGETS = (GameState.INPUT_DEALER, GameState.INPUT_PLAYER, GameState.INPUT_OTHERS)
+RESULTS = ("win", "loss", "push", "blackjack")
+
+# Выплата за исход RESULTS в полуединицах на единицу ставки
+_PAYOUT2 = (2, -2, 0, 3)
+
+# Значение EVENT_RESULT: биты 0-7 — ставка (0 — без ставки, только исход),
+# бит 8 — дабл, биты 9-13 — корзина TC + 1 (0 — счёт неизвестен)
+_DOUBLED = 1 << 8
+_BUCKET_SHIFT = 9
+
+
+def encode_result(bet: int, doubled: bool = False, true_count: float | None = None) -> int:
+    """Значение события EVENT_RESULT: ставка (1..255), дабл, TC на момент ставки."""
+    if not 1 <= bet <= 255:
+        raise ValueError(f"ставка должна быть от 1 до 255, а не {bet}")
+    value = bet | (_DOUBLED if doubled else 0)
+    if true_count is not None:
+        value |= (bucket_of(true_count) + 1) << _BUCKET_SHIFT
+    return value
+
+
+def apply_event(game: GameState, counter: CardCounter, kind: int, arg: int, value: int) -> None:
+    """Применить одно событие журнала к состоянию стола."""
+    if kind == EVENT_CARD:
+        game.place(TARGETS[arg], value)
+        counter.add_code(card_code(value))
+    elif kind == EVENT_MODE:
+        game.set_input_mode(TARGETS[arg])
+    elif kind == EVENT_NEW_HAND:
+        game.new_hand()
+    elif kind == EVENT_RESULT:
+        _record(game.stats, arg, value)
+        game.new_hand()
+    elif kind == EVENT_NEW_SHOE:
+        counter.reset_shoe()
+        game.new_hand()
+    elif kind == EVENT_DECKS:
+        counter.set_decks(value)
+        game.new_hand()
+    else:
+        raise ValueError(f"неизвестный тип события: {kind}")
+
+
+def _record(stats, result: int, value: int = 0) -> None:
+    """Записать результат (индекс RESULTS, значение encode_result) в SessionStats."""
+    bet = value & 0xFF
+    if not bet:
+        # Журнал без ставок — только исход
+        (stats.record_win, stats.record_loss, stats.record_push,
+         stats.record_blackjack)[result]()
+        return
+    if value & _DOUBLED:
+        stats._add(bet, 2 * bet * _PAYOUT2[result], (value >> _BUCKET_SHIFT) - 1, True)
+    else:
+        stats._add(bet, bet * _PAYOUT2[result], (value >> _BUCKET_SHIFT) - 1, False)
+
+
+def _records(buffer, start: int = 0, stop: int | None = None):
+    """Итератор (тип, аргумент, значение) по записям буфера журнала."""
+    n = (len(buffer) - len(HEADER)) // RECORD_SIZE
+    stop = n if stop is None else min(stop, n)
+    if start >= stop:
+        return iter(())
+    view = memoryview(buffer)[len(HEADER) + start * RECORD_SIZE:len(HEADER) + stop * RECORD_SIZE]
+    return _RECORD.iter_unpack(view)
+
+
+def replay(buffer, stop: int | None = None, decks: int = 6,
+           stats: SessionStats | None = None) -> tuple[GameState, CardCounter]:
+    """Восстановить состояние стола по первым `stop` событиям журнала.
+
+    Args:
+        buffer: содержимое журнала (bytes, bytearray, mmap) с заголовком
+        stop: сколько событий учесть (по умолчанию — все)
+        decks: колод в шу, если журнал не начинается с EVENT_DECKS
+        stats: статистика рук до начала буфера (сжатый журнал);
+            дополняется результатами из буфера
+
+    Returns:
+        (GameState со статистикой, CardCounter)
+    """
+    _check_header(buffer)
+    # Проход 1: граница последнего шу и все результаты по порядку
+    # (просадка зависит от порядка рук)
+    boundary = -1
+    if stats is None:
+        stats = SessionStats()
+    for i, (kind, arg, value) in enumerate(_records(buffer, 0, stop)):
+        if kind == EVENT_RESULT:
+            _record(stats, arg, value)
+        elif kind == EVENT_DECKS or kind == EVENT_NEW_SHOE:
+            boundary = i
+            if kind == EVENT_DECKS:
+                decks = value
+
+    game = GameState()
+    counter = CardCounter(total_decks=decks)
+    # Проход 2: только текущий шу (его результаты уже в stats)
+    for kind, arg, value in _records(buffer, boundary + 1, stop):
+        apply_event(game, counter, kind, arg, value)
+    game.stats = stats
+    return game, counter
+
+
+def _check_header(buffer) -> None:
+    if bytes(buffer[:len(HEADER)]) != HEADER:
+        raise ValueError("не журнал событий или неподдерживаемая версия")
+
+
+class LogReader:
+    """Чтение файла журнала через mmap.
+
+    Используется как контекстный менеджер:
+        with LogReader(path) as log:
+            game, counter = log.replay(stop=1000)
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _check_header(self._map)
+
+    def __len__(self) -> int:
+        return (len(self._map) - len(HEADER)) // RECORD_SIZE
+
+    def events(self, start: int = 0, stop: int | None = None):
+        """Итератор (тип, аргумент, значение)."""
+        return _records(self._map, start, stop)
+
+    def replay(self, stop: int | None = None, decks: int = 6) -> tuple[GameState, CardCounter]:
+        """Состояние стола после `stop` событий (см. replay)."""
+        return replay(self._map, stop, decks)
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> "LogReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class EventLog:
+    """Append-only журнал событий одного стола.
+
+    Журнал в памяти можно сжать (compact): завершённые шу выбрасываются,
+    их результаты сводятся в базовую статистику. Номера событий при этом
+    не меняются — len() и индексы считают и выброшенные события.
+
+    Журнал в файле пишется без буферизации — событие переживает падение
+    программы сразу после append (одна запись write в кэш ОС, без fsync).
+    Последние TAIL_RECORDS записей дублируются в памяти.
+
+    Args:
+        path: файл журнала (дописывается, если уже есть);
+            None — журнал только в памяти.
+    """
+
+    __slots__ = ("path", "_file", "_buf", "_size", "_tail", "_base", "_base_decks", "_base_stats")
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path
+        self._file = None
+        self._buf = bytearray(HEADER)
+        self._size = len(HEADER)
+        # Байты последних записей файла (не больше _TAIL_SIZE)
+        self._tail = bytearray()
+        # Сжатие (только в памяти): сколько событий выброшено, колод
+        # и статистика рук на момент первого хранимого события
+        self._base = 0
+        self._base_decks = None
+        self._base_stats = None
+        if path is None:
+            return
+        # Без буферизации: каждое событие сразу уходит в файл
+        self._file = open(path, "a+b", buffering=0)
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            self._file.write(HEADER)
+        else:
+            self._file.seek(0)
+            _check_header(self._file.read(len(HEADER)))
+            # Недописанная запись (обрыв при записи) отбрасывается
+            self._size = size - (size - len(HEADER)) % RECORD_SIZE
+            if self._size != size:
+                self._file.truncate(self._size)
+            self._load_tail()
+
+    def __len__(self) -> int:
+        # По path, а не по _file: после close() число событий сохраняется
+        if self.path is None:
+            return self._base + (len(self._buf) - len(HEADER)) // RECORD_SIZE
+        return (self._size - len(HEADER)) // RECORD_SIZE
+
+    @property
+    def first(self) -> int:
+        """Номер первого хранимого события (после compact — больше 0)."""
+        return self._base
+
+    def append(self, kind: int, arg: int = 0, value: int = 0) -> None:
+        """Дописать событие в конец журнала."""
+        record = _RECORD.pack(kind, arg, value)
+        if self._file is None:
+            self._buf += record
+        else:
+            self._file.write(record)
+            self._size += RECORD_SIZE
+            tail = self._tail
+            tail += record
+            if len(tail) > _TAIL_SIZE:
+                del tail[:RECORD_SIZE]
+
+    def truncate(self, n: int) -> None:
+        """Оставить только первые `n` событий (n не меньше first)."""
+        size = len(HEADER) + (n - self._base) * RECORD_SIZE
+        if self._file is None:
+            del self._buf[size:]
+        else:
+            self._file.truncate(size)
+            self._size = size
+            self._load_tail()
+
+    def delete(self, i: int) -> None:
+        """Удалить событие номер `i` (не меньше first); следующие сдвигаются.
+
+        Рассчитано на события в конце журнала: файл усекается до `i`, и
+        записи после `i` дописываются заново (файл открыт на дозапись —
+        pwrite в середину он не допускает).
+        """
+        if self._file is None:
+            offset = len(HEADER) + (i - self._base) * RECORD_SIZE
+            del self._buf[offset:offset + RECORD_SIZE]
+            return
+        rest = self.raw(i + 1)
+        self.truncate(i)
+        if rest:
+            self._file.write(rest)
+            self._size += len(rest)
+            self._tail += rest
+            del self._tail[:max(0, len(self._tail) - _TAIL_SIZE)]
+
+    def _load_tail(self) -> None:
+        """Перечитать из файла последние записи в _tail."""
+        start = max(len(HEADER), self._size - _TAIL_SIZE)
+        self._tail = bytearray(os.pread(self._file.fileno(), self._size - start, start))
+
+    def compact(self, n: int) -> None:
+        """Выбросить из журнала в памяти события до номера `n`.
+
+        Результаты выброшенных рук сводятся в базовую статистику, число
+        колод — в базовое, так что replay() даёт то же состояние. Журнал
+        в файле не сжимается: файл и есть вся история стола.
+        """
+        if self.path is not None:
+            return
+        n = min(n, len(self)) - self._base
+        if n <= 0:
+            return
+        for kind, arg, value in _records(self._buf, 0, n):
+            if kind == EVENT_RESULT:
+                if self._base_stats is None:
+                    self._base_stats = SessionStats()
+                _record(self._base_stats, arg, value)
+            elif kind == EVENT_DECKS:
+                self._base_decks = value
+        del self._buf[len(HEADER):len(HEADER) + n * RECORD_SIZE]
+        self._base += n
+
+    def event(self, i: int) -> tuple[int, int, int]:
+        """Событие номер `i` (тип, аргумент, значение)."""
+        offset = len(HEADER) + (i - self._base) * RECORD_SIZE
+        if self._file is None:
+            return _RECORD.unpack_from(self._buf, offset)
+        return _RECORD.unpack(os.pread(self._file.fileno(), RECORD_SIZE, offset))
+
+    def raw(self, start: int = 0, stop: int | None = None) -> bytes:
+        """Байты записей start..stop как есть (для контрольных сумм).
+
+        Выброшенные сжатием события пропускаются. Последние TAIL_RECORDS
+        записей журнала в файле берутся из памяти.
+        """
+        start = max(start, self._base)
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return b""
+        offset = len(HEADER) + (start - self._base) * RECORD_SIZE
+        size = (stop - start) * RECORD_SIZE
+        if self._file is None:
+            return bytes(self._buf[offset:offset + size])
+        tail_offset = offset - (self._size - len(self._tail))
+        if tail_offset >= 0:
+            return bytes(self._tail[tail_offset:tail_offset + size])
+        return os.pread(self._file.fileno(), size, offset)
+
+    def events(self, start: int = 0, stop: int | None = None):
+        """Список (тип, аргумент, значение) событий start..stop."""
+        if self._file is None:
+            base = self._base
+            return list(_records(self._buf, max(start - base, 0),
+                                 None if stop is None else stop - base))
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return []
+        data = os.pread(self._file.fileno(), (stop - start) * RECORD_SIZE,
+                        len(HEADER) + start * RECORD_SIZE)
+        return list(_RECORD.iter_unpack(data))
+
+    def replay(self, stop: int | None = None, decks: int = 6) -> tuple[GameState, CardCounter]:
+        """Состояние стола после `stop` событий (см. replay)."""
+        if self._file is None:
+            stats = None
+            if self._base_stats is not None:
+                # Копия: воспроизведение не должно менять базу журнала
+                stats = SessionStats.from_bytes(self._base_stats.to_bytes())
+            if self._base_decks is not None:
+                decks = self._base_decks
+            stop = None if stop is None else max(stop - self._base, 0)
+            return replay(self._buf, stop, decks, stats)
+        with LogReader(self.path) as reader:
+            return reader.replay(stop, decks)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
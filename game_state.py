@@ -1,37 +1,171 @@
 """Состояние игры и статистика сессии блэкджека."""
 
-from strategy import card_value, hand_value, is_pair
+import math
+import struct
+from array import array
+
+from strategy import RANK_LABELS, RANK_SPELLINGS, normalize_rank
+
+# Карта в руке хранится одним байтом: код ранга (см. strategy.card_value)
+# в младших 4 битах и номер написания (strategy.RANK_SPELLINGS) в старших —
+# подпись в UI та же, что ввёл пользователь ('В', 'Т', 'K', '1'...),
+# только в верхнем регистре и без масти.
+_CODE_MASK = 0x0F
+_SPELLING_SHIFT = 4
+# Написание → байт карты
+_BYTES: dict[str, int] = {
+    spelling: code | i << _SPELLING_SHIFT
+    for code, spellings in RANK_SPELLINGS.items()
+    for i, spelling in enumerate(spellings)
+}
+
+
+def _label_table() -> tuple[str, ...]:
+    """Подписи всех 256 байтов карты (card_label — одно чтение по индексу)."""
+    labels = ["?"] * 256
+    for byte in range(256):
+        code = byte & _CODE_MASK
+        if code < len(RANK_LABELS):
+            labels[byte] = RANK_LABELS[code]
+    for spelling, byte in _BYTES.items():
+        labels[byte] = spelling
+    return tuple(labels)
+
+
+_LABELS = _label_table()
+
+
+# Корзины истинного счёта (разбивка SessionStats, шкала ставок bet_ramp,
+# parallel_sim): всё ниже TC_MIN и выше TC_MAX — в крайние
+TC_MIN = -8
+TC_MAX = 12
+TC_BUCKETS = TC_MAX - TC_MIN + 1
+
+# Агрегаты SessionStats.to_bytes: исходы, банкролл (полуединицы), Σx² (u128)
+_OUTCOME_FIELDS = struct.Struct("<7Q")
+_BANKROLL = struct.Struct("<QQqqqQ")
+_SQ_SIZE = 16
+
+
+def bucket_of(tc: float) -> int:
+    """Номер корзины для истинного счёта."""
+    b = math.floor(tc) - TC_MIN
+    return 0 if b < 0 else TC_BUCKETS - 1 if b >= TC_BUCKETS else b
+
+
+def card_byte(rank: str) -> int:
+    """Ранг → байт карты (код ранга + номер написания)."""
+    byte = _BYTES.get(rank)
+    if byte is None:
+        byte = _BYTES.get(normalize_rank(rank), 0)
+    return byte
+
+
+def card_code(byte: int) -> int:
+    """Байт карты → код ранга."""
+    return byte & _CODE_MASK
+
+
+def card_label(byte: int) -> str:
+    """Байт карты → подпись для UI (написание из ввода)."""
+    return _LABELS[byte]
 
 
 class Hand:
-    """Рука игрока или дилера."""
+    """Рука игрока или дилера.
+
+    Карты хранятся компактно — по байту на карту в array('B'), см. card_byte.
+    Сумма, число тузов и ключ состава ведутся инкрементально в add/pop/clear,
+    поэтому все свойства — O(1) без повторного разбора карт.
+    """
+
+    __slots__ = ("_cards", "_hard", "_aces", "_key")
+
+    # Бит на значение карты в ключе состава
+    _KEY_BITS = 8
 
     def __init__(self) -> None:
-        self.cards: list[str] = []
+        self._cards = array("B")
+        self._hard = 0   # сумма, тузы за 1
+        self._aces = 0   # сколько тузов
+        self._key = 0    # упакованный состав: счётчик значения v в битах 8v..8v+7
+
+    @property
+    def cards(self) -> list[str]:
+        """Карты руки подписями для UI — как их ввели ('10', 'К', 'T', 'A', 'Т'...),
+        в верхнем регистре и без масти."""
+        return [card_label(b) for b in self._cards]
+
+    @property
+    def codes(self) -> list[int]:
+        """Коды рангов карт руки."""
+        return [b & _CODE_MASK for b in self._cards]
+
+    @property
+    def card_bytes(self) -> bytes:
+        """Карты руки байтами card_byte (для снимков; обратно — add_byte)."""
+        return self._cards.tobytes()
 
     def add(self, rank: str) -> None:
-        self.cards.append(rank)
+        self.add_byte(card_byte(rank))
+
+    def add_byte(self, byte: int) -> None:
+        """Добавить карту, уже закодированную card_byte."""
+        self._cards.append(byte)
+        code = byte & _CODE_MASK
+        if code == 11:
+            self._aces += 1
+            self._hard += 1
+        else:
+            self._hard += code
+        self._key += 1 << (self._KEY_BITS * code)
+
+    def pop(self) -> str:
+        """Убрать последнюю карту и вернуть её подпись."""
+        byte = self._cards.pop()
+        code = byte & _CODE_MASK
+        if code == 11:
+            self._aces -= 1
+            self._hard -= 1
+        else:
+            self._hard -= code
+        self._key -= 1 << (self._KEY_BITS * code)
+        return card_label(byte)
 
     def clear(self) -> None:
-        self.cards.clear()
+        del self._cards[:]
+        self._hard = 0
+        self._aces = 0
+        self._key = 0
 
     @property
     def total(self) -> int:
-        val, _ = hand_value(self.cards)
-        return val
+        hard = self._hard
+        if self._aces and hard <= 11:
+            return hard + 10
+        return hard
 
     @property
     def is_soft(self) -> bool:
-        _, soft = hand_value(self.cards)
-        return soft
+        return self._aces > 0 and self._hard <= 11
+
+    @property
+    def key(self) -> int:
+        """Канонический ключ состава руки — не зависит от порядка и написания карт.
+
+        Подходит как ключ кэша рекомендаций и расчётов EV.
+        """
+        return self._key
 
     @property
     def is_pair_hand(self) -> bool:
-        return is_pair(self.cards)
+        if len(self._cards) != 2:
+            return False
+        return self._key == 2 << (self._KEY_BITS * (self._cards[0] & _CODE_MASK))
 
     @property
     def is_blackjack(self) -> bool:
-        return len(self.cards) == 2 and self.total == 21
+        return len(self._cards) == 2 and self.total == 21
 
     @property
     def is_bust(self) -> bool:
@@ -40,7 +174,7 @@ class Hand:
     @property
     def can_double(self) -> bool:
         """Дабл доступен только на первых двух картах."""
-        return len(self.cards) == 2
+        return len(self._cards) == 2
 
     @property
     def can_split(self) -> bool:
@@ -49,16 +183,39 @@ class Hand:
 
     def display(self) -> str:
         """Отображение карт для UI."""
-        if not self.cards:
+        if not self._cards:
             return "—"
         return " ".join(self.cards)
 
     def __len__(self) -> int:
-        return len(self.cards)
+        return len(self._cards)
 
 
 class SessionStats:
-    """Статистика текущей сессии."""
+    """Статистика сессии: исходы рук, ставки и банкролл.
+
+    Счётчики исходов (record_win и т.п.) — без ставок. Рука со ставкой
+    (record_hand) дополнительно попадает в потоковые агрегаты: выигрыш в
+    единицах минимума, среднее и дисперсия результата руки, максимальная
+    просадка и EV по корзинам истинного счёта на момент ставки
+    (bucket_of). Память O(1) — отдельные руки не хранятся.
+
+    Результаты рук кратны половине единицы (блэкджек 3:2), поэтому суммы
+    ведутся целыми в полуединицах: дисперсия считается без округления, а
+    merge складывает сессии точно — итог тот же, что у одной сессии со
+    всеми руками подряд.
+    """
+
+    # Счётчики исходов — порядок полей в to_bytes и parallel_sim
+    OUTCOMES = (
+        "hands_played", "wins", "losses", "pushes",
+        "blackjacks", "doubles_won", "doubles_lost",
+    )
+
+    __slots__ = OUTCOMES + (
+        "bet_hands", "wagered", "net2", "sq4", "peak2", "trough2", "drawdown2",
+        "bucket_hands", "bucket_wagered", "bucket_net2",
+    )
 
     def __init__(self) -> None:
         self.hands_played: int = 0
@@ -68,6 +225,22 @@ class SessionStats:
         self.blackjacks: int = 0
         self.doubles_won: int = 0
         self.doubles_lost: int = 0
+        self._reset_bankroll()
+
+    def _reset_bankroll(self) -> None:
+        self.bet_hands = 0     # рук со ставкой
+        self.wagered = 0       # сумма начальных ставок, единиц
+        # Полуединицы: выигрыш, сумма квадратов результатов рук, пик,
+        # минимум и наибольшая просадка кривой выигрыша (от нуля сессии)
+        self.net2 = 0
+        self.sq4 = 0
+        self.peak2 = 0
+        self.trough2 = 0
+        self.drawdown2 = 0
+        # По корзинам TC (array('q') или None, пока нет рук со счётом)
+        self.bucket_hands: array | None = None
+        self.bucket_wagered: array | None = None
+        self.bucket_net2: array | None = None
 
     def record_win(self) -> None:
         self.hands_played += 1
@@ -86,6 +259,68 @@ class SessionStats:
         self.wins += 1
         self.blackjacks += 1
 
+    def record_hand(self, bet: int, payout: float, true_count: float | None = None,
+                    doubled: bool = False) -> None:
+        """Записать руку со ставкой.
+
+        Исход — по знаку выплаты; выплата 3:2 без дабла — блэкджек.
+
+        Args:
+            bet: начальная ставка, единиц минимума.
+            payout: результат руки в единицах (кратно 0.5): +bet, -2·bet
+                после дабла, +1.5·bet за блэкджек, -0.5·bet за сдачу.
+            true_count: истинный счёт в момент ставки (None — без разбивки по счёту).
+            doubled: рука удвоена.
+
+        Raises:
+            ValueError: ставка меньше 1 или выплата не кратна половине единицы.
+        """
+        x = payout * 2
+        x2 = int(x)
+        if bet < 1 or x2 != x:
+            raise ValueError(f"ставка {bet!r} / выплата {payout!r}: нужны ставка ≥ 1 и выплата, кратная 0.5")
+        self._add(bet, x2, -1 if true_count is None else bucket_of(true_count), doubled)
+
+    def _add(self, bet: int, x2: int, bucket: int, doubled: bool) -> None:
+        """record_hand в полуединицах; bucket — корзина TC или -1."""
+        self.hands_played += 1
+        if x2 > 0:
+            self.wins += 1
+            if doubled:
+                self.doubles_won += 1
+            elif x2 == 3 * bet:
+                self.blackjacks += 1
+        elif x2 < 0:
+            self.losses += 1
+            if doubled:
+                self.doubles_lost += 1
+        else:
+            self.pushes += 1
+
+        self.bet_hands += 1
+        self.wagered += bet
+        self.sq4 += x2 * x2
+        net2 = self.net2 + x2
+        self.net2 = net2
+        if net2 > self.peak2:
+            self.peak2 = net2
+        elif self.peak2 - net2 > self.drawdown2:
+            self.drawdown2 = self.peak2 - net2
+        if net2 < self.trough2:
+            self.trough2 = net2
+
+        if bucket >= 0:
+            if self.bucket_hands is None:
+                self._alloc_buckets()
+            self.bucket_hands[bucket] += 1
+            self.bucket_wagered[bucket] += bet
+            self.bucket_net2[bucket] += x2
+
+    def _alloc_buckets(self) -> None:
+        self.bucket_hands = array("q", bytes(8 * TC_BUCKETS))
+        self.bucket_wagered = array("q", bytes(8 * TC_BUCKETS))
+        self.bucket_net2 = array("q", bytes(8 * TC_BUCKETS))
+
     @property
     def win_rate(self) -> float:
         """Процент выигрышей."""
@@ -93,6 +328,130 @@ class SessionStats:
             return 0.0
         return self.wins / self.hands_played * 100
 
+    @property
+    def net(self) -> float:
+        """Выигрыш сессии, единиц минимума."""
+        return self.net2 / 2
+
+    @property
+    def mean(self) -> float:
+        """Средний результат руки, единиц."""
+        return self.net2 / (2 * self.bet_hands) if self.bet_hands else 0.0
+
+    @property
+    def variance(self) -> float:
+        """Выборочная дисперсия результата руки, единиц².
+
+        Числитель n·Σx² − (Σx)² считается в целых — без потери точности
+        при вычитании, которую в float обходит алгоритм Уэлфорда.
+        """
+        n = self.bet_hands
+        if n < 2:
+            return 0.0
+        return (n * self.sq4 - self.net2 * self.net2) / (4 * n * (n - 1))
+
+    @property
+    def std_dev(self) -> float:
+        """Стандартное отклонение результата руки, единиц."""
+        return self.variance ** 0.5
+
+    @property
+    def max_drawdown(self) -> float:
+        """Наибольшее падение выигрыша от предыдущего пика, единиц."""
+        return self.drawdown2 / 2
+
+    @property
+    def ev_per_unit(self) -> float:
+        """Выигрыш на единицу начальной ставки (доля)."""
+        return self.net2 / (2 * self.wagered) if self.wagered else 0.0
+
+    def count_breakdown(self) -> list[tuple[int, int, int, float]]:
+        """EV по корзинам истинного счёта на момент ставки.
+
+        Returns:
+            [(TC, рук, сумма ставок, выигрыш на единицу ставки)] по непустым
+            корзинам; крайние корзины включают всё ниже TC_MIN / выше TC_MAX.
+        """
+        if self.bucket_hands is None:
+            return []
+        return [
+            (TC_MIN + b, self.bucket_hands[b], self.bucket_wagered[b],
+             self.bucket_net2[b] / (2 * self.bucket_wagered[b]))
+            for b in range(TC_BUCKETS) if self.bucket_hands[b]
+        ]
+
+    def merge(self, other: "SessionStats") -> None:
+        """Добавить сессию `other`, сыгранную после этой.
+
+        Счётчики и суммы складываются; просадка сшивается по порядку:
+        падение от пика этой сессии до минимума `other`.
+        """
+        for name in self.OUTCOMES:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        base = self.net2
+        self.drawdown2 = max(self.drawdown2, other.drawdown2, self.peak2 - base - other.trough2)
+        self.peak2 = max(self.peak2, base + other.peak2)
+        self.trough2 = min(self.trough2, base + other.trough2)
+        self.net2 = base + other.net2
+        self.sq4 += other.sq4
+        self.bet_hands += other.bet_hands
+        self.wagered += other.wagered
+        if other.bucket_hands is not None:
+            if self.bucket_hands is None:
+                self._alloc_buckets()
+            for mine, theirs in ((self.bucket_hands, other.bucket_hands),
+                                 (self.bucket_wagered, other.bucket_wagered),
+                                 (self.bucket_net2, other.bucket_net2)):
+                for b in range(TC_BUCKETS):
+                    mine[b] += theirs[b]
+
+    def to_bytes(self) -> bytes:
+        """Агрегаты компактно (для снимков и объединения сессий)."""
+        buckets = 0 if self.bucket_hands is None else TC_BUCKETS
+        parts = [
+            _OUTCOME_FIELDS.pack(*(getattr(self, name) for name in self.OUTCOMES)),
+            _BANKROLL.pack(self.bet_hands, self.wagered, self.net2, self.peak2,
+                           self.trough2, self.drawdown2),
+            self.sq4.to_bytes(_SQ_SIZE, "little"),
+            bytes((buckets,)),
+        ]
+        if buckets:
+            parts += (self.bucket_hands.tobytes(), self.bucket_wagered.tobytes(),
+                      self.bucket_net2.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SessionStats":
+        """Обратно к to_bytes.
+
+        Raises:
+            ValueError: данные обрезаны или другое число корзин TC.
+        """
+        stats = cls()
+        try:
+            for name, value in zip(cls.OUTCOMES, _OUTCOME_FIELDS.unpack_from(data)):
+                setattr(stats, name, value)
+            pos = _OUTCOME_FIELDS.size
+            (stats.bet_hands, stats.wagered, stats.net2, stats.peak2,
+             stats.trough2, stats.drawdown2) = _BANKROLL.unpack_from(data, pos)
+            pos += _BANKROLL.size
+            stats.sq4 = int.from_bytes(data[pos:pos + _SQ_SIZE], "little")
+            buckets = data[pos + _SQ_SIZE]
+            pos += _SQ_SIZE + 1
+        except (IndexError, struct.error) as e:
+            raise ValueError(f"статистика обрезана: {e}") from None
+        if buckets not in (0, TC_BUCKETS) or len(data) != pos + 24 * buckets:
+            raise ValueError("статистика: неожиданный размер или число корзин TC")
+        if buckets:
+            size = 8 * TC_BUCKETS
+            columns = []
+            for i in range(3):
+                column = array("q")
+                column.frombytes(data[pos + size * i:pos + size * (i + 1)])
+                columns.append(column)
+            stats.bucket_hands, stats.bucket_wagered, stats.bucket_net2 = columns
+        return stats
+
     def reset(self) -> None:
         self.hands_played = 0
         self.wins = 0
@@ -101,6 +460,7 @@ class SessionStats:
         self.blackjacks = 0
         self.doubles_won = 0
         self.doubles_lost = 0
+        self._reset_bankroll()
 
 
 class GameState:
@@ -109,6 +469,8 @@ class GameState:
     Хранит руки игрока и дилера, режим ввода, статистику.
     """
 
+    __slots__ = ("player", "dealer", "others", "stats", "input_mode")
+
     # Режимы ввода: куда пойдёт следующая нажатая карта
     INPUT_DEALER = "dealer"
     INPUT_PLAYER = "player"
@@ -117,7 +479,7 @@ class GameState:
     def __init__(self) -> None:
         self.player = Hand()
         self.dealer = Hand()
-        self.others_cards: list[str] = []  # видимые карты других игроков
+        self.others = Hand()  # видимые карты других игроков (только для счётчика)
         self.stats = SessionStats()
         self.input_mode: str = self.INPUT_DEALER  # сначала вводим карту дилера
 
@@ -125,7 +487,7 @@ class GameState:
         """Начать новую раздачу (очистить карты, не статистику)."""
         self.player.clear()
         self.dealer.clear()
-        self.others_cards.clear()
+        self.others.clear()
         self.input_mode = self.INPUT_DEALER
 
     def set_input_mode(self, mode: str) -> None:
@@ -138,16 +500,27 @@ class GameState:
         Returns:
             Куда добавлена карта: 'dealer', 'player' или 'others'.
         """
+        target = self.route()
+        self.place(target, card_byte(rank))
+        return target
+
+    def route(self) -> str:
+        """Куда пойдёт следующая карта: 'dealer', 'player' или 'others'."""
         if self.input_mode == self.INPUT_DEALER and len(self.dealer) == 0:
-            self.dealer.add(rank)
-            self.input_mode = self.INPUT_PLAYER  # после дилера → игрок
             return self.INPUT_DEALER
         elif self.input_mode == self.INPUT_OTHERS:
-            self.others_cards.append(rank)
             return self.INPUT_OTHERS
+        return self.INPUT_PLAYER
+
+    def place(self, target: str, byte: int) -> None:
+        """Положить карту (байт card_byte) в руку `target`, как add_card."""
+        if target == self.INPUT_DEALER:
+            self.dealer.add_byte(byte)
+            self.input_mode = self.INPUT_PLAYER  # после дилера → игрок
+        elif target == self.INPUT_OTHERS:
+            self.others.add_byte(byte)
         else:
-            self.player.add(rank)
-            return self.INPUT_PLAYER
+            self.player.add_byte(byte)
 
     def undo_last(self) -> bool:
         """Отменить последнюю карту.
@@ -155,14 +528,14 @@ class GameState:
         Returns:
             True если удалось отменить.
         """
-        if self.input_mode == self.INPUT_OTHERS and self.others_cards:
-            self.others_cards.pop()
+        if self.input_mode == self.INPUT_OTHERS and self.others:
+            self.others.pop()
             return True
-        if self.player.cards:
-            self.player.cards.pop()
+        if self.player:
+            self.player.pop()
             return True
-        if self.dealer.cards:
-            self.dealer.cards.pop()
+        if self.dealer:
+            self.dealer.pop()
             self.input_mode = self.INPUT_DEALER
             return True
         return False
@@ -172,7 +545,12 @@ class GameState:
         """Готовы ли данные для рекомендации (дилер + минимум 2 карты игрока)."""
         return len(self.dealer) >= 1 and len(self.player) >= 2
 
+    @property
+    def others_cards(self) -> list[str]:
+        """Видимые карты других игроков подписями для UI."""
+        return self.others.cards
+
     @property
     def all_cards_in_hand(self) -> list[str]:
         """Все карты текущей раздачи (для счётчика)."""
-        return self.dealer.cards + self.player.cards + self.others_cards
+        return self.dealer.cards + self.player.cards + self.others.cards
@@ -0,0 +1,424 @@
+"""Импорт истории раздач (CSV/JSONL) и проверка решений по стратегии.
+
+Файл читается потоком — цепочкой генераторов, в памяти только текущий
+кусок файла и текущая раздача, сколько бы строк ни было:
+
+    _chunks (mmap / gzip кусками) → _lines → _csv_rows | _jsonl_rows
+        → parse_hand → HistoryReplayer.feed → ImportReport
+
+Формат строки — одна раздача. В CSV нужна строка заголовка, в JSONL —
+те же ключи:
+    shoe     идентификатор шу; при смене — новый шу в счётчике
+    decks    колод в шу (необязательно; при смене — set_decks)
+    dealer   карты дилера, первая — открытая ("10 6", "T6" или список)
+    player   свои карты в порядке сдачи
+    others   видимые чужие карты (необязательно)
+    actions  решения игрока по порядку ("H S", "HHS", "D" или список;
+             H/S/D/P/R или hit/stand/double/split/surrender)
+    result   win / loss / push / blackjack (необязательно)
+    bet      начальная ставка в единицах минимума (необязательно, по умолчанию 1)
+
+Решение k сравнивается с рекомендацией (strategy.recommend_codes, то же,
+что get_recommendation) для первых 2 + k своих карт.
+Истинный счёт в момент решения — по картам до раздачи, открытой карте
+дилера и своим картам на руке; чужие карты и добор дилера учитываются
+после руки. После сплита, дабла, сдачи или «хватит» решения не сверяются.
+Раздача с результатом попадает в SessionStats.record_hand: выплата по
+результату, первому решению (дабл — вдвое, сдача — половина ставки) и
+ставке, корзина — истинный счёт перед раздачей.
+
+Запуск:
+    python hand_history.py export.csv.gz --decks 8
+"""
+
+import csv
+import gzip
+import json
+import mmap
+import os
+import time
+
+from card_counter import CardCounter
+from game_state import GameState
+from strategy import parse_cards, parse_rank_string, recommend_codes
+
+# Размер куска чтения файла
+CHUNK_SIZE = 1 << 18
+
+# Сколько сообщений об ошибочных строках хранить в отчёте
+MAX_ERROR_SAMPLES = 10
+
+ACTIONS = "HSDPR"
+_ACTION_WORDS = {
+    "hit": "H", "stand": "S", "double": "D", "split": "P", "surrender": "R",
+    "ещё": "H", "хватит": "S", "дабл": "D", "сплит": "P", "сдаться": "R",
+}
+_RESULTS = ("win", "loss", "push", "blackjack")
+# Выплата за результат на единицу ставки
+_PAYOUTS = (1.0, -1.0, 0.0, 1.5)
+
+# Действия, после которых рука игрока больше не принимает решений
+_FINAL = frozenset("SDPR")
+
+
+# ---------------------------------------------------------------------
+# Чтение: куски → строки → записи
+# ---------------------------------------------------------------------
+
+def _chunks(path: str, chunk_size: int = CHUNK_SIZE):
+    """Куски байтов файла: обычный файл — через mmap, .gz — через gzip."""
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+        return
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            for start in range(0, len(m), chunk_size):
+                yield m[start:start + chunk_size]
+
+
+def _lines(chunks):
+    """Строки (str, без перевода строки) из кусков; строка может пересекать границу куска.
+
+    Кусок декодируется и режется целиком — без работы на каждую строку.
+    Поля CSV в кавычках с переводом строки внутри не поддерживаются.
+    """
+    tail = b""
+    for chunk in chunks:
+        chunk = tail + chunk
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            tail = chunk
+            continue
+        tail = chunk[end + 1:]
+        yield from chunk[:end].decode("utf-8").split("\n")
+    if tail:
+        yield tail.decode("utf-8")
+
+
+def _csv_rows(lines):
+    """Записи CSV как словари по строке заголовка."""
+    return csv.DictReader(lines)
+
+
+def _jsonl_rows(lines):
+    """Записи JSONL; пустые строки пропускаются, битая строка — ValueError в записи."""
+    for line in lines:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield ValueError(f"не JSON: {e}")
+
+
+def read_rows(path: str, fmt: str | None = None, chunk_size: int = CHUNK_SIZE):
+    """Записи файла истории (словари); формат — по расширению или `fmt`.
+
+    Raises:
+        ValueError: неизвестный формат.
+    """
+    if fmt is None:
+        name = path[:-3] if path.endswith(".gz") else path
+        fmt = os.path.splitext(name)[1].lstrip(".").lower()
+    lines = _lines(_chunks(path, chunk_size))
+    if fmt == "csv":
+        return _csv_rows(lines)
+    if fmt in ("jsonl", "json", "ndjson"):
+        return _jsonl_rows(lines)
+    raise ValueError(f"неизвестный формат истории: {fmt!r} (нужен csv или jsonl)")
+
+
+# ---------------------------------------------------------------------
+# Разбор раздачи
+# ---------------------------------------------------------------------
+
+class HandRecord:
+    """Одна раздача из истории: карты — байтами кодов рангов.
+
+    Attributes:
+        shoe: идентификатор шу (строка) или None.
+        decks: колод в шу или None.
+        dealer, player, others: коды рангов.
+        actions: решения игрока — строка из букв ACTIONS.
+        result: индекс в ("win", "loss", "push", "blackjack") или None.
+        bet: начальная ставка, единиц минимума.
+    """
+
+    __slots__ = ("shoe", "decks", "dealer", "player", "others", "actions", "result", "bet")
+
+    def __init__(self, shoe, decks, dealer: bytes, player: bytes, others: bytes,
+                 actions: str, result: int | None, bet: int = 1) -> None:
+        self.shoe = shoe
+        self.decks = decks
+        self.dealer = dealer
+        self.player = player
+        self.others = others
+        self.actions = actions
+        self.result = result
+        self.bet = bet
+
+
+def _cards(value) -> bytes:
+    if not value:
+        return b""
+    if isinstance(value, str):
+        return parse_rank_string(value)
+    codes = bytes(parse_cards([str(c) for c in value]))
+    if 0 in codes:
+        raise ValueError(f"не ранг карты в {value!r}")
+    return codes
+
+
+def _actions(value) -> str:
+    if not value:
+        return ""
+    if isinstance(value, str):
+        tokens = value.replace(",", " ").split()
+        if len(tokens) == 1 and tokens[0].lower() not in _ACTION_WORDS:
+            tokens = list(tokens[0])
+    else:
+        tokens = [str(t) for t in value]
+    out = []
+    for token in tokens:
+        action = _ACTION_WORDS.get(token.lower(), token.upper())
+        if action not in ACTIONS:
+            raise ValueError(f"неизвестное действие: {token!r}")
+        out.append(action)
+    return "".join(out)
+
+
+def parse_hand(row: dict) -> HandRecord:
+    """Запись файла → HandRecord.
+
+    Raises:
+        ValueError: нет карт дилера или игрока, не ранг, неизвестное действие/результат,
+            ставка не целое ≥ 1.
+    """
+    if isinstance(row, Exception):
+        raise ValueError(str(row))
+    if not isinstance(row, dict):
+        raise ValueError(f"запись — не объект, а {type(row).__name__}")
+    dealer = _cards(row.get("dealer"))
+    player = _cards(row.get("player"))
+    if not dealer or len(player) < 2:
+        raise ValueError("нужны карта дилера и минимум две свои")
+    result = row.get("result") or None
+    if result is not None:
+        result = str(result).strip().lower()
+        if result not in _RESULTS:
+            raise ValueError(f"неизвестный результат: {result!r}")
+        result = _RESULTS.index(result)
+    decks = row.get("decks") or None
+    if decks is not None:
+        decks = int(decks)
+        if not 1 <= decks <= 8:
+            raise ValueError(f"колод должно быть от 1 до 8, а не {decks}")
+    bet = row.get("bet") or 1
+    if bet != 1:
+        bet = int(bet)
+        if bet < 1:
+            raise ValueError(f"ставка должна быть не меньше 1, а не {bet}")
+    shoe = row.get("shoe")
+    return HandRecord(
+        None if shoe in (None, "") else str(shoe), decks, dealer, player,
+        _cards(row.get("others")), _actions(row.get("actions")), result, bet,
+    )
+
+
+# ---------------------------------------------------------------------
+# Воспроизведение и сверка
+# ---------------------------------------------------------------------
+
+class ImportReport:
+    """Итог импорта.
+
+    Attributes:
+        rows: прочитано записей.
+        hands: воспроизведено раздач.
+        errors: пропущено ошибочных записей.
+        error_samples: первые MAX_ERROR_SAMPLES сообщений (номер записи, текст).
+        decisions: сверено решений.
+        agreed: из них совпало с рекомендацией.
+        deviations: рекомендаций, где сработало отклонение по счёту.
+        confusion: {(записанное, рекомендованное): число} для расхождений.
+        elapsed: секунд на импорт.
+    """
+
+    __slots__ = ("rows", "hands", "errors", "error_samples", "decisions", "agreed",
+                 "deviations", "confusion", "elapsed")
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.hands = 0
+        self.errors = 0
+        self.error_samples: list[tuple[int, str]] = []
+        self.decisions = 0
+        self.agreed = 0
+        self.deviations = 0
+        self.confusion: dict[tuple[str, str], int] = {}
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def accuracy(self) -> float:
+        """Доля решений, совпавших с рекомендацией, в процентах."""
+        return self.agreed / self.decisions * 100 if self.decisions else 0.0
+
+    def report(self) -> str:
+        """Текстовый отчёт для консоли."""
+        lines = [
+            f"Записей:        {self.rows:,d} ({self.rows_per_second:,.0f}/с, {self.elapsed:.1f} с)",
+            f"Раздач:         {self.hands:,d}",
+            f"Ошибочных:      {self.errors:,d}",
+            f"Решений:        {self.decisions:,d}, по стратегии {self.accuracy:.2f}%"
+            f" (отклонений по счёту: {self.deviations:,d})",
+        ]
+        for (logged, recommended), n in sorted(self.confusion.items(), key=lambda kv: -kv[1]):
+            lines.append(f"  {logged} вместо {recommended}: {n:,d}")
+        for row, message in self.error_samples:
+            lines.append(f"  запись {row}: {message}")
+        return "\n".join(lines)
+
+
+class HistoryReplayer:
+    """Проигрывает раздачи через GameState, CardCounter и SessionStats.
+
+    Attributes:
+        game: состояние стола; game.stats — результаты раздач.
+        counter: счётчик текущего шу.
+        report: итог сверки решений.
+    """
+
+    __slots__ = ("game", "counter", "report", "_shoe")
+
+    def __init__(self, decks: int = 6) -> None:
+        self.game = GameState()
+        self.counter = CardCounter(total_decks=decks)
+        self.report = ImportReport()
+        self._shoe = None
+
+    def feed(self, hand: HandRecord) -> None:
+        """Проиграть одну раздачу и сверить её решения."""
+        game, counter, report = self.game, self.counter, self.report
+        if hand.decks is not None and hand.decks != counter.total_decks:
+            counter.set_decks(hand.decks)
+            self._shoe = hand.shoe
+        elif hand.shoe != self._shoe:
+            if self._shoe is not None:
+                counter.reset_shoe()
+            self._shoe = hand.shoe
+
+        game.new_hand()
+        bet_tc = counter.true_count
+        up = hand.dealer[0]
+        game.place(GameState.INPUT_DEALER, up)
+        counter.add_code(up)
+        player = hand.player
+        for code in player[:2]:
+            game.place(GameState.INPUT_PLAYER, code)
+            counter.add_code(code)
+
+        for k, action in enumerate(hand.actions):
+            if len(game.player) < 2 + k:
+                break  # решение без карты — дальше сверять не с чем
+            first = k == 0
+            rec = recommend_codes(
+                game.player.codes, up,
+                can_double=first, can_split=first and game.player.can_split,
+                true_count=counter.true_count,
+            )
+            report.decisions += 1
+            if rec["deviation"]:
+                report.deviations += 1
+            recommended = rec["action"]
+            if recommended == action:
+                report.agreed += 1
+            else:
+                key = (action, recommended)
+                report.confusion[key] = report.confusion.get(key, 0) + 1
+            if action in _FINAL:
+                break
+            if 2 + k < len(player):
+                game.place(GameState.INPUT_PLAYER, player[2 + k])
+                counter.add_code(player[2 + k])
+
+        # Остальное: свои карты после сверенных решений, добор дилера, чужие
+        for code in player[len(game.player):] + hand.dealer[1:] + hand.others:
+            counter.add_code(code)
+        if hand.result is not None:
+            first = hand.actions[:1]
+            payout = hand.bet * _PAYOUTS[hand.result]
+            if first == "D":
+                payout *= 2
+            elif first == "R" and payout < 0:
+                payout /= 2
+            game.stats.record_hand(hand.bet, payout, bet_tc, doubled=first == "D")
+        report.hands += 1
+
+
+def replay_rows(rows, decks: int = 6, replayer: HistoryReplayer | None = None):
+    """Проиграть записи по одной; генератор отдаёт разобранные раздачи.
+
+    Ошибочные записи пропускаются и учитываются в отчёте replayer.report.
+    """
+    replayer = replayer or HistoryReplayer(decks)
+    report = replayer.report
+    for row in rows:
+        report.rows += 1
+        try:
+            hand = parse_hand(row)
+        except (ValueError, TypeError) as e:
+            report.errors += 1
+            if len(report.error_samples) < MAX_ERROR_SAMPLES:
+                report.error_samples.append((report.rows, str(e)))
+            continue
+        replayer.feed(hand)
+        yield hand
+
+
+def import_history(path: str, decks: int = 6, fmt: str | None = None,
+                   chunk_size: int = CHUNK_SIZE) -> HistoryReplayer:
+    """Импортировать файл истории целиком (в постоянной памяти).
+
+    Returns:
+        HistoryReplayer: итог — .report, результаты — .game.stats,
+        счётчик последнего шу — .counter.
+    """
+    replayer = HistoryReplayer(decks)
+    start = time.perf_counter()
+    for _ in replay_rows(read_rows(path, fmt, chunk_size), replayer=replayer):
+        pass
+    replayer.report.elapsed = time.perf_counter() - start
+    return replayer
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Импорт истории раздач и сверка решений")
+    parser.add_argument("path", help="файл CSV или JSONL (можно .gz)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default=None)
+    parser.add_argument("--decks", type=int, default=6, help="колод в шу, если в файле не указано")
+    args = parser.parse_args()
+
+    replayer = import_history(args.path, args.decks, args.format)
+    print(replayer.report.report())
+    stats = replayer.game.stats
+    print(f"Результаты:     +{stats.wins} / -{stats.losses} / ={stats.pushes}"
+          f" (блэкджеков {stats.blackjacks})")
+    if stats.bet_hands:
+        print(f"Итог:           {stats.net:+,g} ед. ({stats.ev_per_unit * 100:+.2f}% ставки),"
+              f" σ руки {stats.std_dev:.3f}, просадка {stats.max_drawdown:,g} ед.")
+        print(f"{'TC':>4} {'рук':>10} {'EV':>8}")
+        for tc, hands, _, ev in stats.count_breakdown():
+            print(f"{tc:>+4d} {hands:>10,d} {ev * 100:>+7.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,30 @@
 
 Компактное окно поверх игры. Вводишь карты кнопками —
 получаешь оптимальное действие + подсчёт карт Hi-Lo.
+
+Ядро (strategy, card_counter, game_state, session_manager) не зависит от
+Qt; консольный вариант без PyQt5 — cli.py.
 """
 
+import os
 import sys
-from PyQt5.QtCore import Qt
+from functools import lru_cache
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont, QColor, QPalette
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QGridLayout, QFrame, QSpinBox,
 )
 
-from strategy import get_recommendation, card_value
-from card_counter import CardCounter, HI_LO
+from strategy import card_value
 from game_state import GameState
+from event_log import DEFAULT_LOG_PATH, EventLog
+from session_manager import TableSession
+from snapshot import SnapshotWriter, snapshot_path
+
+# Журнал событий сессии: при запуске шу и статистика восстанавливаются из
+# последнего снимка (пишется в фоне) и хвоста журнала после него
+LOG_PATH = DEFAULT_LOG_PATH
 
 
 # =====================================================================
@@ -25,11 +36,12 @@ ACTION_COLORS = {
     "S": "#e74c3c",   # красный — ХВАТИТ
     "D": "#3498db",   # синий — ДАБЛ
     "P": "#f39c12",   # оранжевый — СПЛИТ
+    "R": "#95a5a6",   # серый — СДАТЬСЯ
 }
 
-# Стиль карточных кнопок
+# Стиль карточных кнопок: цвет по свойству hilo кнопки
 CARD_BTN_STYLE = """
-    QPushButton {{
+    QPushButton[hilo="{tag}"] {{
         background-color: {bg};
         color: {fg};
         border: 1px solid #555;
@@ -40,15 +52,29 @@ CARD_BTN_STYLE = """
         min-height: 32px;
         padding: 2px 6px;
     }}
-    QPushButton:hover {{
+    QPushButton[hilo="{tag}"]:hover {{
         background-color: {hover};
         border: 1px solid #aaa;
     }}
-    QPushButton:pressed {{
+    QPushButton[hilo="{tag}"]:pressed {{
         background-color: {pressed};
     }}
 """
 
+# Цвета карточных кнопок по Hi-Lo: (фон, текст, наведение, нажатие)
+CARD_COLORS = {
+    "plus": ("#1a3a2a", "#2ecc71", "#2a5a3a", "#0a2a1a"),    # мелкие +1 — зеленоватый
+    "minus": ("#3a1a1a", "#e74c3c", "#5a2a2a", "#2a0a0a"),   # крупные -1 — красноватый
+    "zero": ("#2a2a3a", "#bdc3c7", "#3a3a5a", "#1a1a2a"),    # нейтральные 0 — серый
+}
+
+# Одна таблица стилей на всю сетку карт: Qt разбирает её один раз,
+# а не для каждой из 13 кнопок
+CARD_GRID_STYLE = "".join(
+    CARD_BTN_STYLE.format(tag=tag, bg=bg, fg=fg, hover=hover, pressed=pressed)
+    for tag, (bg, fg, hover, pressed) in CARD_COLORS.items()
+)
+
 # Стиль управляющих кнопок
 CONTROL_BTN_STYLE = """
     QPushButton {
@@ -81,6 +107,32 @@ MODE_BTN_ACTIVE = """
     }}
 """
 
+# Кнопки результата руки и поле колод — одна таблица стилей на нижнюю строку
+RESULT_BTN_STYLE = """
+    QPushButton[result="{result}"] {{
+        background: {bg}; color: {fg}; border: 1px solid {fg};
+        border-radius: 4px; font-size: 12px; font-weight: bold;
+        min-width: 30px; padding: 4px 8px;
+    }}
+    QPushButton[result="{result}"]:hover {{ background: #3a3a5a; }}
+"""
+
+RESULT_BUTTONS = [
+    # (текст, результат, подсказка, фон, цвет)
+    ("W", "win", "Выиграл", "#1a3a2a", "#2ecc71"),
+    ("L", "loss", "Проиграл", "#3a1a1a", "#e74c3c"),
+    ("P", "push", "Ничья", "#2a2a3a", "#f39c12"),
+]
+
+BOTTOM_ROW_STYLE = (
+    "QSpinBox { background: #2a2a3a; color: white; "
+    "border: 1px solid #555; border-radius: 3px; padding: 2px; }"
+    + "".join(
+        RESULT_BTN_STYLE.format(result=result, bg=bg, fg=fg)
+        for _, result, _, bg, fg in RESULT_BUTTONS
+    )
+)
+
 MODE_BTN_INACTIVE = """
     QPushButton {
         background-color: #2a2a3a;
@@ -97,14 +149,97 @@ MODE_BTN_INACTIVE = """
 """
 
 
+# =====================================================================
+# Рендер: «грязные» части окна и готовые строки стилей
+# =====================================================================
+
+# Части окна, которые перерисовываются только после изменения модели
+DIRTY_HAND = 1    # карты, сумма, рекомендация
+DIRTY_MODE = 2    # кнопки режима и подсказка ввода
+DIRTY_COUNT = 4   # счёт, колоды, ставка, перевес
+DIRTY_STATS = 8   # статистика сессии
+DIRTY_ALL = DIRTY_HAND | DIRTY_MODE | DIRTY_COUNT | DIRTY_STATS
+
+MODE_COLORS = {
+    GameState.INPUT_DEALER: "#e74c3c",
+    GameState.INPUT_PLAYER: "#2ecc71",
+    GameState.INPUT_OTHERS: "#9b59b6",
+}
+
+INPUT_HINTS = {
+    GameState.INPUT_DEALER: "Нажмите карту ДИЛЕРА",
+    GameState.INPUT_PLAYER: "Нажмите свои карты",
+    GameState.INPUT_OTHERS: "Нажмите карты ДРУГИХ игроков",
+}
+
+REC_STYLE_EMPTY = (
+    "color: #95a5a6; padding: 8px; "
+    "background-color: #1a1a2e; border-radius: 6px;"
+)
+
+
+@lru_cache(maxsize=None)
+def _bold_style(color: str) -> str:
+    return f"color: {color}; font-weight: bold;"
+
+
+@lru_cache(maxsize=None)
+def _color_style(color: str) -> str:
+    return f"color: {color};"
+
+
+@lru_cache(maxsize=None)
+def _mode_btn_style(color: str) -> str:
+    return MODE_BTN_ACTIVE.format(bg="#1a1a2e", fg=color)
+
+
+@lru_cache(maxsize=None)
+def _rec_style(color: str) -> str:
+    return (
+        f"color: {color}; padding: 8px; font-weight: bold; "
+        f"background-color: #1a1a2e; border-radius: 6px; "
+        f"border: 2px solid {color};"
+    )
+
+
+def _sign_color(value: float) -> str:
+    return "#2ecc71" if value > 0 else "#e74c3c" if value < 0 else "#3498db"
+
+
+@lru_cache(maxsize=None)
+def _font(size: int, bold: bool = False) -> QFont:
+    """Шрифт интерфейса; одинаковые шрифты создаются один раз."""
+    return QFont("Consolas", size, QFont.Bold if bold else QFont.Normal)
+
+
 class BlackjackAssistant(QWidget):
-    """Главное окно помощника блэкджека."""
+    """Главное окно помощника блэкджека.
+
+    Обработчики не перерисовывают окно сами: они помечают изменённые
+    части (DIRTY_*) и ставят рендер в очередь. Рендер выполняется один раз
+    за проход цикла событий — пачка быстрых кликов даёт одну перерисовку —
+    и обновляет только помеченные части; setText/setStyleSheet вызываются,
+    только если текст или стиль виджета действительно изменился.
+    """
 
     def __init__(self) -> None:
         super().__init__()
-        self.game = GameState()
-        self.counter = CardCounter(total_decks=6)
-        self._hand_cards: list[str] = []  # карты текущей раздачи для отката
+        os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+        self.session = TableSession("local", decks=6, log=EventLog(LOG_PATH),
+                                    snapshots=SnapshotWriter(snapshot_path(LOG_PATH)))
+        self.game = self.session.game
+        self.counter = self.session.counter
+        # Шкала ставок из bet_ramp.py, если уже сгенерирована для этих колод
+        self.counter.load_ramp()
+
+        # Рендер: помеченные части, последние текст/стиль виджетов
+        self._dirty = 0
+        self._texts: dict[QWidget, str] = {}
+        self._styles: dict[QWidget, str] = {}
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.setInterval(0)
+        self._render_timer.timeout.connect(self._render)
 
         self._setup_window()
         self._build_ui()
@@ -142,30 +277,29 @@ class BlackjackAssistant(QWidget):
 
         # --- Заголовок ---
         title = QLabel("БЛЭКДЖЕК ПОМОЩНИК")
-        title.setFont(QFont("Consolas", 14, QFont.Bold))
+        title.setFont(_font(14, bold=True))
         title.setStyleSheet("color: #f1c40f;")
         title.setAlignment(Qt.AlignCenter)
         layout.addWidget(title)
 
         # --- Информация о руках ---
         self.dealer_label = QLabel("Дилер: —")
-        self.dealer_label.setFont(QFont("Consolas", 13))
+        self.dealer_label.setFont(_font(13))
         self.dealer_label.setStyleSheet("color: #e74c3c;")
         layout.addWidget(self.dealer_label)
 
         self.player_label = QLabel("Мои карты: —")
-        self.player_label.setFont(QFont("Consolas", 13))
+        self.player_label.setFont(_font(13))
         self.player_label.setStyleSheet("color: #2ecc71;")
         layout.addWidget(self.player_label)
 
         self.total_label = QLabel("")
-        self.total_label.setFont(QFont("Consolas", 11))
-        self.total_label.setStyleSheet("color: #bdc3c7;")
+        self.total_label.setFont(_font(11))
         layout.addWidget(self.total_label)
 
         # Чужие карты
         self.others_label = QLabel("")
-        self.others_label.setFont(QFont("Consolas", 10))
+        self.others_label.setFont(_font(10))
         self.others_label.setStyleSheet("color: #9b59b6;")
         layout.addWidget(self.others_label)
 
@@ -174,16 +308,12 @@ class BlackjackAssistant(QWidget):
 
         # --- Рекомендация ---
         self.rec_label = QLabel("Введите карты")
-        self.rec_label.setFont(QFont("Consolas", 20, QFont.Bold))
+        self.rec_label.setFont(_font(20, bold=True))
         self.rec_label.setAlignment(Qt.AlignCenter)
-        self.rec_label.setStyleSheet(
-            "color: #95a5a6; padding: 8px; "
-            "background-color: #1a1a2e; border-radius: 6px;"
-        )
         layout.addWidget(self.rec_label)
 
         self.explain_label = QLabel("")
-        self.explain_label.setFont(QFont("Consolas", 10))
+        self.explain_label.setFont(_font(10))
         self.explain_label.setStyleSheet("color: #bdc3c7;")
         self.explain_label.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.explain_label)
@@ -195,17 +325,15 @@ class BlackjackAssistant(QWidget):
         count_layout = QHBoxLayout()
 
         self.rc_label = QLabel("RC: 0")
-        self.rc_label.setFont(QFont("Consolas", 11, QFont.Bold))
-        self.rc_label.setStyleSheet("color: #3498db;")
+        self.rc_label.setFont(_font(11, bold=True))
         count_layout.addWidget(self.rc_label)
 
         self.tc_label = QLabel("TC: 0.0")
-        self.tc_label.setFont(QFont("Consolas", 11, QFont.Bold))
-        self.tc_label.setStyleSheet("color: #3498db;")
+        self.tc_label.setFont(_font(11, bold=True))
         count_layout.addWidget(self.tc_label)
 
         self.decks_label = QLabel("Колод: 6.0")
-        self.decks_label.setFont(QFont("Consolas", 10))
+        self.decks_label.setFont(_font(10))
         self.decks_label.setStyleSheet("color: #7f8c8d;")
         count_layout.addWidget(self.decks_label)
 
@@ -215,13 +343,12 @@ class BlackjackAssistant(QWidget):
         bet_layout = QHBoxLayout()
 
         self.bet_label = QLabel("Ставка: минимум")
-        self.bet_label.setFont(QFont("Consolas", 11, QFont.Bold))
+        self.bet_label.setFont(_font(11, bold=True))
         self.bet_label.setStyleSheet("color: #f39c12;")
         bet_layout.addWidget(self.bet_label)
 
         self.advantage_label = QLabel("Перевес: -0.5%")
-        self.advantage_label.setFont(QFont("Consolas", 10))
-        self.advantage_label.setStyleSheet("color: #7f8c8d;")
+        self.advantage_label.setFont(_font(10))
         bet_layout.addWidget(self.advantage_label)
 
         layout.addLayout(bet_layout)
@@ -252,13 +379,15 @@ class BlackjackAssistant(QWidget):
 
         # --- Подсказка режима ввода ---
         self.input_hint = QLabel("Нажмите карту ДИЛЕРА")
-        self.input_hint.setFont(QFont("Consolas", 10, QFont.Bold))
-        self.input_hint.setStyleSheet("color: #e74c3c;")
+        self.input_hint.setFont(_font(10, bold=True))
         self.input_hint.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.input_hint)
 
         # --- Кнопки карт (английские) ---
-        card_grid = QGridLayout()
+        card_panel = QWidget()
+        card_panel.setStyleSheet(CARD_GRID_STYLE)
+        card_grid = QGridLayout(card_panel)
+        card_grid.setContentsMargins(0, 0, 0, 0)
         card_grid.setSpacing(3)
 
         ranks = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
@@ -266,96 +395,70 @@ class BlackjackAssistant(QWidget):
             btn = QPushButton(rank)
             val = card_value(rank)
 
-            # Цвета по Hi-Lo
-            if 2 <= val <= 6:
-                # мелкие +1 — зеленоватый
-                bg, hover, pressed = "#1a3a2a", "#2a5a3a", "#0a2a1a"
-                fg = "#2ecc71"
-            elif val >= 10:
-                # крупные -1 — красноватый
-                bg, hover, pressed = "#3a1a1a", "#5a2a2a", "#2a0a0a"
-                fg = "#e74c3c"
-            else:
-                # нейтральные 0 — серый
-                bg, hover, pressed = "#2a2a3a", "#3a3a5a", "#1a1a2a"
-                fg = "#bdc3c7"
-
-            btn.setStyleSheet(CARD_BTN_STYLE.format(
-                bg=bg, fg=fg, hover=hover, pressed=pressed
-            ))
+            # Цвета по Hi-Lo (CARD_COLORS)
+            btn.setProperty("hilo", "plus" if 2 <= val <= 6 else "minus" if val >= 10 else "zero")
             btn.clicked.connect(lambda checked, r=rank: self._on_card_click(r))
 
             row = 0 if i < 9 else 1
             col = i if i < 9 else (i - 9)
             card_grid.addWidget(btn, row, col)
 
-        layout.addLayout(card_grid)
+        layout.addWidget(card_panel)
 
         # --- Управляющие кнопки ---
-        ctrl_layout = QHBoxLayout()
+        ctrl_panel = QWidget()
+        ctrl_panel.setStyleSheet(CONTROL_BTN_STYLE)
+        ctrl_layout = QHBoxLayout(ctrl_panel)
+        ctrl_layout.setContentsMargins(0, 0, 0, 0)
         ctrl_layout.setSpacing(4)
 
         btn_new = QPushButton("Новая рука")
-        btn_new.setStyleSheet(CONTROL_BTN_STYLE)
         btn_new.clicked.connect(self._on_new_hand)
         ctrl_layout.addWidget(btn_new)
 
         btn_undo = QPushButton("Отмена")
-        btn_undo.setStyleSheet(CONTROL_BTN_STYLE)
         btn_undo.clicked.connect(self._on_undo)
         ctrl_layout.addWidget(btn_undo)
 
         btn_shoe = QPushButton("Новый шу")
-        btn_shoe.setStyleSheet(CONTROL_BTN_STYLE)
         btn_shoe.clicked.connect(self._on_new_shoe)
         ctrl_layout.addWidget(btn_shoe)
 
-        layout.addLayout(ctrl_layout)
+        layout.addWidget(ctrl_panel)
 
         # --- Настройка колод + результат руки ---
-        bottom_layout = QHBoxLayout()
+        bottom_panel = QWidget()
+        bottom_panel.setStyleSheet(BOTTOM_ROW_STYLE)
+        bottom_layout = QHBoxLayout(bottom_panel)
+        bottom_layout.setContentsMargins(0, 0, 0, 0)
         decks_lbl = QLabel("Колод:")
-        decks_lbl.setFont(QFont("Consolas", 10))
+        decks_lbl.setFont(_font(10))
         decks_lbl.setStyleSheet("color: #7f8c8d;")
         bottom_layout.addWidget(decks_lbl)
 
         self.decks_spin = QSpinBox()
         self.decks_spin.setRange(1, 8)
-        self.decks_spin.setValue(6)
-        self.decks_spin.setStyleSheet(
-            "QSpinBox { background: #2a2a3a; color: white; "
-            "border: 1px solid #555; border-radius: 3px; padding: 2px; }"
-        )
+        self.decks_spin.setValue(self.counter.total_decks)
         self.decks_spin.valueChanged.connect(self._on_decks_changed)
         bottom_layout.addWidget(self.decks_spin)
         bottom_layout.addStretch()
 
         # Кнопки результата руки
-        for text, result, bg, fg in [
-            ("W", "win", "#1a3a2a", "#2ecc71"),
-            ("L", "loss", "#3a1a1a", "#e74c3c"),
-            ("P", "push", "#2a2a3a", "#f39c12"),
-        ]:
+        for text, result, tip, _, _ in RESULT_BUTTONS:
             btn = QPushButton(text)
-            btn.setToolTip({"W": "Выиграл", "L": "Проиграл", "P": "Ничья"}[text])
-            btn.setStyleSheet(
-                f"QPushButton {{ background: {bg}; color: {fg}; "
-                f"border: 1px solid {fg}; border-radius: 4px; "
-                f"font-size: 12px; font-weight: bold; "
-                f"min-width: 30px; padding: 4px 8px; }}"
-                f"QPushButton:hover {{ background: #3a3a5a; }}"
-            )
+            btn.setToolTip(tip)
+            btn.setProperty("result", result)
             btn.clicked.connect(lambda checked, r=result: self._record_result(r))
             bottom_layout.addWidget(btn)
 
-        layout.addLayout(bottom_layout)
+        layout.addWidget(bottom_panel)
 
         # --- Разделитель ---
         layout.addWidget(self._separator())
 
         # --- Статистика сессии ---
         self.stats_label = QLabel("Сессия: 0 рук")
-        self.stats_label.setFont(QFont("Consolas", 10))
+        self.stats_label.setFont(_font(10))
         self.stats_label.setStyleSheet("color: #7f8c8d;")
         self.stats_label.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.stats_label)
@@ -366,186 +469,176 @@ class BlackjackAssistant(QWidget):
 
     def _set_input_mode(self, mode: str) -> None:
         """Переключить режим ввода карт."""
-        self.game.set_input_mode(mode)
-        self._update_display()
+        self.session.set_input_mode(mode)
+        self._invalidate(DIRTY_MODE)
 
     def _on_card_click(self, rank: str) -> None:
         """Обработка нажатия на кнопку карты."""
-        self.game.add_card(rank)
-        self._hand_cards.append(rank)
-        self.counter.add_card(rank)
-        self._update_display()
+        self.session.add_card(rank)
+        self._invalidate(DIRTY_HAND | DIRTY_MODE | DIRTY_COUNT)
 
     def _on_new_hand(self) -> None:
         """Новая раздача — очистить карты, сохранить счёт."""
-        self.game.new_hand()
-        self._hand_cards.clear()
-        self._update_display()
+        self.session.new_hand()
+        self._invalidate(DIRTY_HAND | DIRTY_MODE)
 
     def _on_undo(self) -> None:
         """Отменить последнюю карту."""
-        if self._hand_cards:
-            removed = self._hand_cards.pop()
-            # Откатить счётчик
-            val = card_value(removed)
-            self.counter.running_count -= HI_LO.get(val, 0)
-            self.counter.cards_dealt = max(0, self.counter.cards_dealt - 1)
-            # Откатить состояние
-            self.game.undo_last()
-        self._update_display()
+        self.session.undo()
+        self._invalidate(DIRTY_HAND | DIRTY_MODE | DIRTY_COUNT)
 
     def _on_new_shoe(self) -> None:
         """Новый шу — сброс счётчика и карт."""
-        self.counter.reset_shoe()
-        self.game.new_hand()
-        self._hand_cards.clear()
-        self._update_display()
+        self.session.new_shoe()
+        self._invalidate(DIRTY_HAND | DIRTY_MODE | DIRTY_COUNT)
 
     def _on_decks_changed(self, value: int) -> None:
         """Изменение количества колод."""
-        self.counter.set_decks(value)
-        self._update_display()
+        self.session.set_decks(value)
+        self._invalidate(DIRTY_HAND | DIRTY_MODE | DIRTY_COUNT)
 
     def _record_result(self, result: str) -> None:
         """Записать результат руки."""
-        if result == "win":
-            if self.game.player.is_blackjack:
-                self.game.stats.record_blackjack()
-            else:
-                self.game.stats.record_win()
-        elif result == "loss":
-            self.game.stats.record_loss()
-        elif result == "push":
-            self.game.stats.record_push()
-        self._on_new_hand()
+        self.session.record_result(result)
+        self._invalidate(DIRTY_HAND | DIRTY_MODE | DIRTY_STATS)
 
     # -----------------------------------------------------------------
     # Обновление отображения
     # -----------------------------------------------------------------
 
+    def _invalidate(self, parts: int) -> None:
+        """Пометить части окна изменёнными и поставить рендер в очередь."""
+        self._dirty |= parts
+        if not self._render_timer.isActive():
+            self._render_timer.start()
+
     def _update_display(self) -> None:
-        """Обновить все элементы UI."""
-        mode = self.game.input_mode
+        """Обновить все элементы UI сразу, без очереди."""
+        self._dirty = DIRTY_ALL
+        self._render()
+
+    def _render(self) -> None:
+        """Перерисовать помеченные части окна."""
+        dirty = self._dirty
+        self._dirty = 0
+        if dirty & DIRTY_HAND:
+            self._render_hand()
+        if dirty & DIRTY_MODE:
+            self._render_mode()
+        if dirty & DIRTY_COUNT:
+            self._render_count()
+        if dirty & DIRTY_STATS:
+            self._render_stats()
+
+    def _set_text(self, widget, text: str) -> None:
+        if self._texts.get(widget) != text:
+            self._texts[widget] = text
+            widget.setText(text)
+
+    def _set_style(self, widget, style: str) -> None:
+        """setStyleSheet только при смене стиля — иначе Qt заново полирует виджет."""
+        if self._styles.get(widget) != style:
+            self._styles[widget] = style
+            widget.setStyleSheet(style)
+
+    def _render_hand(self) -> None:
+        """Карты дилера, игрока, чужие и рекомендация."""
+        dealer = self.game.dealer
+        player = self.game.player
 
         # Дилер
-        if self.game.dealer.cards:
-            d_val = card_value(self.game.dealer.cards[0])
-            d_str = self.game.dealer.display()
-            self.dealer_label.setText(f"Дилер: [{d_str}] ({d_val})")
+        if dealer:
+            d_val = card_value(dealer.cards[0])
+            self._set_text(self.dealer_label, f"Дилер: [{dealer.display()}] ({d_val})")
         else:
-            self.dealer_label.setText("Дилер: —")
+            self._set_text(self.dealer_label, "Дилер: —")
 
         # Игрок
-        if self.game.player.cards:
-            total = self.game.player.total
-            soft_str = "мягкая" if self.game.player.is_soft else "жёсткая"
-            p_str = self.game.player.display()
-
-            if self.game.player.is_blackjack:
-                self.player_label.setText(f"Мои карты: [{p_str}]")
-                self.total_label.setText("БЛЭКДЖЕК!")
-                self.total_label.setStyleSheet("color: #f1c40f; font-weight: bold;")
-            elif self.game.player.is_bust:
-                self.player_label.setText(f"Мои карты: [{p_str}]")
-                self.total_label.setText(f"Сумма: {total} — ПЕРЕБОР!")
-                self.total_label.setStyleSheet("color: #e74c3c; font-weight: bold;")
+        if player:
+            total = player.total
+            p_str = player.display()
+            self._set_text(self.player_label, f"Мои карты: [{p_str}]")
+            if player.is_blackjack:
+                self._set_text(self.total_label, "БЛЭКДЖЕК!")
+                self._set_style(self.total_label, _bold_style("#f1c40f"))
+            elif player.is_bust:
+                self._set_text(self.total_label, f"Сумма: {total} — ПЕРЕБОР!")
+                self._set_style(self.total_label, _bold_style("#e74c3c"))
             else:
-                self.player_label.setText(f"Мои карты: [{p_str}]")
-                pair_str = " | ПАРА" if self.game.player.is_pair_hand else ""
-                self.total_label.setText(f"Сумма: {total} ({soft_str}){pair_str}")
-                self.total_label.setStyleSheet("color: #bdc3c7;")
+                soft_str = "мягкая" if player.is_soft else "жёсткая"
+                pair_str = " | ПАРА" if player.is_pair_hand else ""
+                self._set_text(self.total_label, f"Сумма: {total} ({soft_str}){pair_str}")
+                self._set_style(self.total_label, _color_style("#bdc3c7"))
         else:
-            self.player_label.setText("Мои карты: —")
-            self.total_label.setText("")
+            self._set_text(self.player_label, "Мои карты: —")
+            self._set_text(self.total_label, "")
 
         # Чужие карты
-        if self.game.others_cards:
-            o_str = " ".join(self.game.others_cards)
-            self.others_label.setText(f"Чужие карты: [{o_str}] ({len(self.game.others_cards)} шт)")
+        others = self.game.others
+        if others:
+            self._set_text(self.others_label, f"Чужие карты: [{others.display()}] ({len(others)} шт)")
+        else:
+            self._set_text(self.others_label, "")
+
+        # Рекомендация
+        rec = self.session.recommendation()
+        if rec is not None:
+            color = ACTION_COLORS.get(rec["action"], "#95a5a6")
+            self._set_text(self.rec_label, f">> {rec['action_ru']} <<")
+            self._set_style(self.rec_label, _rec_style(color))
+            self._set_text(self.explain_label, rec["explanation"])
         else:
-            self.others_label.setText("")
+            self._set_text(self.rec_label, "Введите карты")
+            self._set_style(self.rec_label, REC_STYLE_EMPTY)
+            self._set_text(self.explain_label, "")
 
-        # Кнопки режимов — подсветка активной
-        for btn, btn_mode, color in [
-            (self.btn_mode_dealer, GameState.INPUT_DEALER, "#e74c3c"),
-            (self.btn_mode_player, GameState.INPUT_PLAYER, "#2ecc71"),
-            (self.btn_mode_others, GameState.INPUT_OTHERS, "#9b59b6"),
+    def _render_mode(self) -> None:
+        """Подсветка активной кнопки режима и подсказка ввода."""
+        mode = self.game.input_mode
+        for btn, btn_mode in [
+            (self.btn_mode_dealer, GameState.INPUT_DEALER),
+            (self.btn_mode_player, GameState.INPUT_PLAYER),
+            (self.btn_mode_others, GameState.INPUT_OTHERS),
         ]:
             if mode == btn_mode:
-                btn.setStyleSheet(MODE_BTN_ACTIVE.format(bg="#1a1a2e", fg=color))
+                self._set_style(btn, _mode_btn_style(MODE_COLORS[btn_mode]))
             else:
-                btn.setStyleSheet(MODE_BTN_INACTIVE)
-
-        # Подсказка ввода
-        hints = {
-            GameState.INPUT_DEALER: ("Нажмите карту ДИЛЕРА", "#e74c3c"),
-            GameState.INPUT_PLAYER: ("Нажмите свои карты", "#2ecc71"),
-            GameState.INPUT_OTHERS: ("Нажмите карты ДРУГИХ игроков", "#9b59b6"),
-        }
-        hint_text, hint_color = hints.get(mode, ("", "#bdc3c7"))
-        self.input_hint.setText(hint_text)
-        self.input_hint.setStyleSheet(f"color: {hint_color}; font-weight: bold;")
+                self._set_style(btn, MODE_BTN_INACTIVE)
 
-        # Рекомендация
-        if self.game.is_ready:
-            rec = get_recommendation(
-                self.game.player.cards,
-                self.game.dealer.cards[0],
-                can_double=self.game.player.can_double,
-                can_split=self.game.player.can_split,
-            )
-            action = rec["action"]
-            action_ru = rec["action_ru"]
-            color = ACTION_COLORS.get(action, "#95a5a6")
-            self.rec_label.setText(f">> {action_ru} <<")
-            self.rec_label.setStyleSheet(
-                f"color: {color}; padding: 8px; font-weight: bold; "
-                f"background-color: #1a1a2e; border-radius: 6px; "
-                f"border: 2px solid {color};"
-            )
-            self.explain_label.setText(rec["explanation"])
-        else:
-            self.rec_label.setText("Введите карты")
-            self.rec_label.setStyleSheet(
-                "color: #95a5a6; padding: 8px; "
-                "background-color: #1a1a2e; border-radius: 6px;"
-            )
-            self.explain_label.setText("")
+        self._set_text(self.input_hint, INPUT_HINTS.get(mode, ""))
+        self._set_style(self.input_hint, _bold_style(MODE_COLORS.get(mode, "#bdc3c7")))
 
-        # Счётчик карт
+    def _render_count(self) -> None:
+        """Счётчик карт, ставка и перевес."""
         rc = self.counter.running_count
         tc = self.counter.true_count
-        decks_rem = self.counter.decks_remaining
-
-        rc_color = "#2ecc71" if rc > 0 else "#e74c3c" if rc < 0 else "#3498db"
-        tc_color = "#2ecc71" if tc > 0 else "#e74c3c" if tc < 0 else "#3498db"
 
-        self.rc_label.setText(f"RC: {rc:+d}")
-        self.rc_label.setStyleSheet(f"color: {rc_color}; font-weight: bold;")
-
-        self.tc_label.setText(f"TC: {tc:+.1f}")
-        self.tc_label.setStyleSheet(f"color: {tc_color}; font-weight: bold;")
-
-        self.decks_label.setText(f"Колод: {decks_rem:.1f}")
+        self._set_text(self.rc_label, f"RC: {rc:+d}")
+        self._set_style(self.rc_label, _bold_style(_sign_color(rc)))
+        self._set_text(self.tc_label, f"TC: {tc:+.1f}")
+        self._set_style(self.tc_label, _bold_style(_sign_color(tc)))
+        self._set_text(self.decks_label, f"Колод: {self.counter.decks_remaining:.1f}")
 
         # Ставка
         bet_text, _ = self.counter.bet_recommendation()
         adv = self.counter.player_advantage
-        adv_color = "#2ecc71" if adv > 0 else "#e74c3c"
-        self.bet_label.setText(f"Ставка: {bet_text}")
-        self.advantage_label.setText(f"Перевес: {adv:+.1f}%")
-        self.advantage_label.setStyleSheet(f"color: {adv_color};")
+        self._set_text(self.bet_label, f"Ставка: {bet_text}")
+        self._set_text(self.advantage_label, f"Перевес: {adv:+.1f}%")
+        self._set_style(self.advantage_label, _color_style("#2ecc71" if adv > 0 else "#e74c3c"))
 
-        # Статистика
+    def _render_stats(self) -> None:
+        """Статистика сессии."""
         s = self.game.stats
         if s.hands_played > 0:
-            self.stats_label.setText(
+            self._set_text(
+                self.stats_label,
                 f"Сессия: {s.hands_played} рук | "
                 f"W:{s.wins} L:{s.losses} P:{s.pushes} | "
                 f"Винрейт: {s.win_rate:.0f}%"
+                + (f" | Итог: {s.net:+g} ед. (просадка {s.max_drawdown:g})" if s.bet_hands else ""),
             )
         else:
-            self.stats_label.setText("Сессия: 0 рук")
+            self._set_text(self.stats_label, "Сессия: 0 рук")
 
     # -----------------------------------------------------------------
     # Горячие клавиши
@@ -567,6 +660,12 @@ class BlackjackAssistant(QWidget):
         else:
             super().keyPressEvent(event)
 
+    def closeEvent(self, event) -> None:
+        # Дописать последний снимок: следующий запуск не воспроизводит журнал
+        self.session.snapshots.close()
+        self.session.log.close()
+        super().closeEvent(event)
+
     # -----------------------------------------------------------------
     # Утилиты
     # -----------------------------------------------------------------
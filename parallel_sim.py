@@ -0,0 +1,387 @@
+"""Параллельная симуляция на пуле процессов с воспроизводимыми зёрнами.
+
+Работа делится на куски по CHUNK_ROUNDS раундов; зерно куска выводится
+из главного зерна и номера куска (chunk_seed), поэтому результат не
+зависит ни от числа процессов, ни от порядка, в котором куски доиграли.
+Итоги кусков (SimTotals) — только целые: результаты раундов хранятся в
+полуединицах ставки (блэкджек платит 3:2), так что суммы и суммы
+квадратов складываются точно и в любом порядке.
+
+Каждый готовый кусок дописывается строкой JSON в файл контрольной точки;
+повторный запуск с тем же файлом и теми же параметрами доигрывает только
+недостающие куски.
+
+Запуск:
+    python parallel_sim.py --rounds 1000000000 --checkpoint run.ckpt
+    python parallel_sim.py --rounds 4000000 --scaling     # эффективность 1..N процессов
+"""
+
+import hashlib
+import json
+import os
+import random
+from array import array
+from itertools import accumulate
+
+from game_state import TC_BUCKETS, TC_MIN, SessionStats, bucket_of
+
+CHECKPOINT_VERSION = 1
+
+# Раундов в одном куске: ~2 с работы, потеря при обрыве — не больше куска
+CHUNK_ROUNDS = 250_000
+
+_OUTCOMES = SessionStats.OUTCOMES
+
+
+def chunk_seed(master_seed: int, index: int) -> int:
+    """Зерно куска `index` — хэш главного зерна и номера (64 бита)."""
+    digest = hashlib.blake2b(f"{master_seed}:{index}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class SimTotals:
+    """Складываемые итоги симуляции (целые, в полуединицах минимальной ставки).
+
+    Attributes:
+        rounds: сыграно раундов.
+        wagered: сумма начальных ставок в минимальных ставках.
+        net2: удвоенный чистый результат.
+        sq4: сумма квадратов удвоенных результатов раундов.
+        n: раундов по корзинам TC (game_state.bucket_of).
+        bucket_sum: сумма удвоенных результатов на единицу ставки по корзинам.
+        bucket_sq: сумма их квадратов по корзинам.
+        stats: исходы раундов (SessionStats).
+    """
+
+    __slots__ = ("rounds", "wagered", "net2", "sq4", "n", "bucket_sum", "bucket_sq", "stats")
+
+    def __init__(self) -> None:
+        self.rounds = 0
+        self.wagered = 0
+        self.net2 = 0
+        self.sq4 = 0
+        self.n = array("q", bytes(8 * TC_BUCKETS))
+        self.bucket_sum = array("q", bytes(8 * TC_BUCKETS))
+        self.bucket_sq = array("q", bytes(8 * TC_BUCKETS))
+        self.stats = SessionStats()
+
+    def merge(self, other: "SimTotals") -> None:
+        """Прибавить итоги другого куска (точно, порядок не важен)."""
+        self.rounds += other.rounds
+        self.wagered += other.wagered
+        self.net2 += other.net2
+        self.sq4 += other.sq4
+        for i in range(TC_BUCKETS):
+            self.n[i] += other.n[i]
+            self.bucket_sum[i] += other.bucket_sum[i]
+            self.bucket_sq[i] += other.bucket_sq[i]
+        for name in _OUTCOMES:
+            setattr(self.stats, name, getattr(self.stats, name) + getattr(other.stats, name))
+
+    # -----------------------------------------------------------------
+    # Оценки
+    # -----------------------------------------------------------------
+
+    def mean(self, i: int) -> float:
+        """Преимущество в корзине `i` — средний результат на единицу ставки."""
+        return self.bucket_sum[i] / (2 * self.n[i]) if self.n[i] else 0.0
+
+    def variance(self, i: int) -> float:
+        """Дисперсия результата на единицу ставки в корзине `i`."""
+        n = self.n[i]
+        if n < 2:
+            return 0.0
+        s = self.bucket_sum[i]
+        return (self.bucket_sq[i] - s * s / n) / (4 * (n - 1))
+
+    def to_result(self):
+        """Итог в форме simulator.SimulationResult (EV, дисперсия, N0, отчёт)."""
+        from simulator import SimulationResult
+
+        result = SimulationResult()
+        result.stats = self.stats
+        result.rounds = self.rounds
+        result.total_wagered = float(self.wagered)
+        result.net = self.net2 / 2
+        result.sum_sq = self.sq4 / 4
+        return result
+
+    # -----------------------------------------------------------------
+    # Контрольная точка
+    # -----------------------------------------------------------------
+
+    def to_dict(self) -> dict:
+        return {
+            "rounds": self.rounds, "wagered": self.wagered,
+            "net2": self.net2, "sq4": self.sq4,
+            "n": self.n.tolist(), "sum": self.bucket_sum.tolist(), "sq": self.bucket_sq.tolist(),
+            "stats": [getattr(self.stats, name) for name in _OUTCOMES],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SimTotals":
+        totals = cls()
+        totals.rounds = data["rounds"]
+        totals.wagered = data["wagered"]
+        totals.net2 = data["net2"]
+        totals.sq4 = data["sq4"]
+        totals.n = array("q", data["n"])
+        totals.bucket_sum = array("q", data["sum"])
+        totals.bucket_sq = array("q", data["sq"])
+        for name, value in zip(_OUTCOMES, data["stats"]):
+            setattr(totals.stats, name, value)
+        return totals
+
+
+def run_chunk(task: tuple) -> tuple[int, SimTotals]:
+    """Сыграть один кусок (в процессе пула).
+
+    Args:
+        task: (номер, раундов, колод, пенетрация, зерно, ровная ставка,
+            файл шкалы ставок или None).
+    """
+    from card_counter import CardCounter
+    from simulator import _RESERVE_DECKS, HI_LO_TAGS, build_shoe, play_round
+
+    index, rounds, decks, penetration, seed, flat, ramp_path = task
+    rng = random.Random(seed)
+    out = SimTotals()
+    n, bucket_sum, bucket_sq, stats = out.n, out.bucket_sum, out.bucket_sq, out.stats
+    counter = CardCounter(total_decks=decks)
+    if ramp_path is not None and not counter.load_ramp(penetration, ramp_path):
+        raise ValueError(f"шкала ставок не читается: {ramp_path}")
+
+    base_shoe = build_shoe(decks)
+    reserve = build_shoe(_RESERVE_DECKS)
+    size = len(base_shoe)
+    cut = int(size * penetration)
+    shoe: list[int] = []
+    counts: list[int] = []
+    pos = cut
+    wagered = net2 = sq4 = 0
+    for _ in range(rounds):
+        if pos >= cut:
+            rng.shuffle(base_shoe)
+            rng.shuffle(reserve)
+            shoe = base_shoe + reserve
+            counts = [0, *accumulate(HI_LO_TAGS[v] for v in shoe)]
+            pos = 0
+        # Тот же TC, что CardCounter.true_count перед раздачей
+        rc = counts[pos]
+        b = bucket_of(rc / max((size - pos) / 52, 0.25))
+        if flat:
+            bet = 1
+        else:
+            counter.running_count = rc
+            counter.cards_dealt = pos
+            bet = counter.bet_recommendation()[1]
+        units, pos = play_round(shoe, pos, stats)
+        half = int(units * 2)
+        n[b] += 1
+        bucket_sum[b] += half
+        bucket_sq[b] += half * half
+        half *= bet
+        wagered += bet
+        net2 += half
+        sq4 += half * half
+    out.rounds = rounds
+    out.wagered = wagered
+    out.net2 = net2
+    out.sq4 = sq4
+    return index, out
+
+
+def _read_checkpoint(path: str, config: dict) -> dict[int, SimTotals]:
+    """Готовые куски из файла контрольной точки.
+
+    Оборванная последняя строка (процесс убит при записи) пропускается.
+
+    Raises:
+        ValueError: файл от другой симуляции (параметры не совпадают).
+    """
+    done: dict[int, SimTotals] = {}
+    try:
+        f = open(path, encoding="utf-8")
+    except FileNotFoundError:
+        return done
+    with f:
+        header = f.readline()
+        if not header:
+            return done
+        try:
+            header = json.loads(header)
+        except ValueError:
+            raise ValueError(f"{path}: не файл контрольной точки") from None
+        if header.get("version") != CHECKPOINT_VERSION or header.get("config") != config:
+            raise ValueError(f"{path}: контрольная точка другой симуляции")
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            done[record["chunk"]] = SimTotals.from_dict(record["totals"])
+    return done
+
+
+def run(
+    rounds: int,
+    decks: int = 6,
+    penetration: float = 0.75,
+    seed: int = 0,
+    workers: int | None = None,
+    chunk_rounds: int = CHUNK_ROUNDS,
+    flat: bool = False,
+    ramp: str | None = None,
+    checkpoint: str | None = None,
+    progress=None,
+) -> SimTotals:
+    """Сыграть `rounds` раундов кусками на пуле из `workers` процессов.
+
+    Args:
+        seed: главное зерно; итог при том же зерне и chunk_rounds одинаков
+            при любом числе процессов.
+        workers: процессов (None — все ядра, 1 — в текущем процессе).
+        flat: ровная ставка в одну единицу (иначе — CardCounter.bet_recommendation).
+        ramp: файл шкалы ставок bet_ramp для CardCounter.
+        checkpoint: файл контрольной точки; готовые куски из него не
+            переигрываются, новые дописываются.
+        progress: вызывается как progress(готово кусков, всего кусков).
+
+    Raises:
+        ValueError: контрольная точка от другой симуляции или активная
+            таблица (strategy.set_rules) под правила, которых симулятор
+            не умеет (simulator.check_rules).
+    """
+    from simulator import check_rules
+    from strategy import get_rules
+    if get_rules() is not None:
+        check_rules(get_rules())
+    chunks = -(-rounds // chunk_rounds)
+    config = {
+        "rounds": rounds, "decks": decks, "penetration": penetration, "seed": seed,
+        "chunk_rounds": chunk_rounds, "flat": flat, "ramp": ramp,
+    }
+    done = _read_checkpoint(checkpoint, config) if checkpoint else {}
+    tasks = [
+        (i, min(chunk_rounds, rounds - i * chunk_rounds), decks, penetration,
+         chunk_seed(seed, i), flat, ramp)
+        for i in range(chunks) if i not in done
+    ]
+
+    log = None
+    if checkpoint:
+        fresh = not os.path.exists(checkpoint) or os.path.getsize(checkpoint) == 0
+        if not fresh:
+            # Оборванная строка отрезается — новые куски пишутся с новой строки
+            _truncate_torn_tail(checkpoint)
+        log = open(checkpoint, "a", encoding="utf-8")
+        if fresh:
+            log.write(json.dumps({"version": CHECKPOINT_VERSION, "config": config}) + "\n")
+            log.flush()
+
+    def finish(index: int, part: SimTotals) -> None:
+        done[index] = part
+        if log is not None:
+            log.write(json.dumps({"chunk": index, "totals": part.to_dict()}) + "\n")
+            log.flush()
+            os.fsync(log.fileno())
+        if progress is not None:
+            progress(len(done), chunks)
+
+    try:
+        if workers == 1 or len(tasks) <= 1:
+            for task in tasks:
+                finish(*run_chunk(task))
+        elif tasks:
+            from multiprocessing import Pool
+            with Pool(workers) as pool:
+                for index, part in pool.imap_unordered(run_chunk, tasks):
+                    finish(index, part)
+    finally:
+        if log is not None:
+            log.close()
+
+    total = SimTotals()
+    for part in done.values():
+        total.merge(part)
+    return total
+
+
+def _truncate_torn_tail(path: str) -> None:
+    """Обрезать файл по последний перевод строки."""
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+
+
+def scaling(rounds: int, max_workers: int | None = None, seed: int = 0) -> list[tuple[int, float]]:
+    """Время одной и той же симуляции на 1..max_workers процессах.
+
+    Returns:
+        [(процессов, секунд), ...]; итоги всех прогонов совпадают.
+    """
+    import time
+
+    max_workers = max_workers or os.cpu_count() or 1
+    timings = []
+    reference = None
+    for workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        totals = run(rounds, seed=seed, workers=workers, chunk_rounds=max(rounds // (4 * max_workers), 1))
+        timings.append((workers, time.perf_counter() - start))
+        if reference is None:
+            reference = totals.to_dict()
+        elif totals.to_dict() != reference:
+            raise RuntimeError(f"итог на {workers} процессах отличается от итога на одном")
+    return timings
+
+
+def main() -> None:
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Параллельная Монте-Карло симуляция")
+    parser.add_argument("--rounds", type=int, default=10_000_000)
+    parser.add_argument("--decks", type=int, default=6)
+    parser.add_argument("--penetration", type=float, default=0.75)
+    parser.add_argument("--seed", type=int, default=0, help="главное зерно")
+    parser.add_argument("--workers", type=int, default=None, help="процессов (по умолчанию все ядра)")
+    parser.add_argument("--chunk", type=int, default=CHUNK_ROUNDS, help="раундов в куске")
+    parser.add_argument("--flat", action="store_true", help="ровная ставка вместо шкалы")
+    parser.add_argument("--ramp", default=None, help="файл шкалы ставок (bet_ramp.py)")
+    parser.add_argument("--checkpoint", default=None, help="файл контрольной точки")
+    parser.add_argument("--scaling", action="store_true",
+                        help="замерить эффективность на 1..N процессах")
+    args = parser.parse_args()
+
+    if args.scaling:
+        timings = scaling(args.rounds, args.workers, args.seed)
+        base = timings[0][1]
+        print(f"{'процессов':>9} {'время':>8} {'ускорение':>9} {'эффективность':>13}")
+        for workers, elapsed in timings:
+            speedup = base / elapsed
+            print(f"{workers:>9} {elapsed:>7.2f}с {speedup:>8.2f}x {speedup / workers * 100:>12.0f}%")
+        return
+
+    def progress(done: int, total: int) -> None:
+        print(f"\rкусков: {done}/{total}", end="", file=sys.stderr, flush=True)
+
+    start = time.perf_counter()
+    totals = run(args.rounds, args.decks, args.penetration, args.seed, args.workers,
+                 args.chunk, args.flat, args.ramp, args.checkpoint, progress)
+    elapsed = time.perf_counter() - start
+    print(file=sys.stderr)
+    print(totals.to_result().report())
+    print(f"Время:          {elapsed:.1f} с")
+    print(f"{'TC':>4} {'раундов':>14} {'преим.':>8} {'дисп.':>7}")
+    for i in range(TC_BUCKETS):
+        if totals.n[i]:
+            print(f"{TC_MIN + i:>+4d} {totals.n[i]:>14,d} {totals.mean(i) * 100:>+7.2f}% "
+                  f"{totals.variance(i):>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Правила стола, под которые считается базовая стратегия.
+
+Встроенные таблицы strategy.py составлены для одного набора правил;
+Rules описывает любой другой, а strategy_compiler выводит для него
+таблицы точным расчётом EV (ev_calculator) и кэширует их на диске по
+хэшу правил (Rules.key).
+"""
+
+import hashlib
+
+
+class Rules:
+    """Набор правил стола.
+
+    Attributes:
+        decks: колод в шу (1..8).
+        h17: дилер берёт на мягких 17 (иначе стоит — S17).
+        das: дабл после сплита.
+        surrender: поздняя сдача (половина ставки, только на двух картах).
+        split_hands: максимум рук после сплитов (2 — без пересплита).
+        resplit_aces: можно ли пересплитовать тузы.
+        peek: дилер проверяет блэкджек при открытых 10/Т.
+    """
+
+    __slots__ = ("decks", "h17", "das", "surrender", "split_hands", "resplit_aces", "peek")
+
+    def __init__(
+        self,
+        decks: int = 6,
+        h17: bool = False,
+        das: bool = True,
+        surrender: bool = False,
+        split_hands: int = 4,
+        resplit_aces: bool = False,
+        peek: bool = True,
+    ) -> None:
+        """
+        Raises:
+            ValueError: колод не 1..8 или рук после сплитов не 2..8.
+        """
+        if not 1 <= decks <= 8:
+            raise ValueError(f"колод должно быть от 1 до 8, а не {decks}")
+        if not 2 <= split_hands <= 8:
+            raise ValueError(f"рук после сплитов должно быть от 2 до 8, а не {split_hands}")
+        self.decks = int(decks)
+        self.h17 = bool(h17)
+        self.das = bool(das)
+        self.surrender = bool(surrender)
+        self.split_hands = int(split_hands)
+        self.resplit_aces = bool(resplit_aces)
+        self.peek = bool(peek)
+
+    def _fields(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def key(self) -> str:
+        """Хэш правил — ключ кэша скомпилированных таблиц."""
+        text = ";".join(f"{name}={int(getattr(self, name))}" for name in self.__slots__)
+        return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+    def with_decks(self, decks: int) -> "Rules":
+        """Те же правила с другим числом колод."""
+        rules = Rules(*self._fields())
+        rules.decks = Rules(decks).decks
+        return rules
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Rules) and self._fields() == other._fields()
+
+    def __hash__(self) -> int:
+        return hash(self._fields())
+
+    def __repr__(self) -> str:
+        args = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"Rules({args})"
+
+    def describe(self) -> str:
+        """Короткая запись правил, напр. '6D S17 DAS LS RSP4'."""
+        parts = [f"{self.decks}D", "H17" if self.h17 else "S17"]
+        if self.das:
+            parts.append("DAS")
+        if self.surrender:
+            parts.append("LS")
+        if self.split_hands > 2:
+            parts.append(f"RSP{self.split_hands}")
+        if self.resplit_aces:
+            parts.append("RSA")
+        if not self.peek:
+            parts.append("ENHC")
+        return " ".join(parts)
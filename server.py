@@ -0,0 +1,417 @@
+"""Локальный HTTP/WebSocket-сервер рекомендаций.
+
+Один движок (strategy, CardCounter, GameState) обслуживает все устройства
+за столом: webapp, телефоны, другие клиенты. Сервер на asyncio без
+сторонних зависимостей, соединения HTTP/1.1 держатся открытыми (keep-alive).
+
+У каждого клиента своя постоянная сессия (session_manager.TableSession).
+Клиент указывает её id заголовком X-Client-Id или параметром ?client=.
+Без id сессия живёт, пока открыто соединение.
+
+HTTP (JSON в ответах, тело запроса — JSON-объект):
+    GET  /health                                — проверка
+    GET  /recommend?player=8,7&dealer=10        — рекомендация без сессии
+    POST /recommend  {"player": [...], "dealer": "10", "can_double": true, "can_split": true,
+                      "true_count": 2.5}
+    GET  /state                                 — состояние сессии и рекомендация
+    POST /card       {"rank": "K"}              — карта в текущий режим ввода
+    POST /undo | /new_hand | /new_shoe
+    POST /mode       {"mode": "dealer" | "player" | "others"}
+    POST /decks      {"decks": 6}
+    POST /result     {"result": "win" | "loss" | "push", "doubled": false}
+
+WebSocket: GET /ws, затем текстовые сообщения {"op": "card", "rank": "K",
+"id": 1} — op как путь выше (без /); ответ — тот же JSON, что и по HTTP,
+с эхом "id".
+
+Запуск:
+    python server.py --port 8765
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+from itertools import count
+from urllib.parse import parse_qs, urlsplit
+
+from session_manager import SessionRegistry, TableSession
+from strategy import get_recommendation
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+MAX_SESSIONS = 10_000      # предел сессий; дольше всех неактивные закрываются
+IDLE_TIMEOUT = 300.0       # с, закрыть молчащее соединение
+MAX_BODY = 64 * 1024       # предел тела запроса и сообщения WebSocket
+MAX_DECKS = 8
+
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_WS_TEXT = 0x1
+_WS_CLOSE = 0x8
+_WS_PING = 0x9
+_WS_PONG = 0xA
+
+_REASONS = {
+    200: "OK", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large",
+}
+
+
+class RequestError(Exception):
+    """Ошибка запроса клиента: отдаётся как {"error": ...} с HTTP-статусом."""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _arg(args: dict, name: str):
+    if name not in args:
+        raise RequestError(f"нет параметра {name!r}")
+    return args[name]
+
+
+def _set_decks(session: TableSession, args: dict) -> None:
+    try:
+        decks = int(_arg(args, "decks"))
+    except (TypeError, ValueError):
+        raise RequestError("decks: ожидается целое число") from None
+    if not 1 <= decks <= MAX_DECKS:
+        raise RequestError(f"decks: от 1 до {MAX_DECKS}")
+    session.set_decks(decks)
+
+
+# Операции над сессией: имя → действие; ответ — всегда состояние сессии
+SESSION_OPS = {
+    "state": lambda s, a: None,
+    "card": lambda s, a: s.add_card(str(_arg(a, "rank"))),
+    "undo": lambda s, a: s.undo(),
+    "mode": lambda s, a: s.set_input_mode(str(_arg(a, "mode"))),
+    "new_hand": lambda s, a: s.new_hand(),
+    "new_shoe": lambda s, a: s.new_shoe(),
+    "decks": _set_decks,
+    "result": lambda s, a: s.record_result(str(_arg(a, "result")), _flag(a.get("doubled", False))),
+}
+
+
+def _as_list(value) -> list[str]:
+    if isinstance(value, str):
+        return [c for c in value.split(",") if c]
+    if isinstance(value, list):
+        return [str(c) for c in value]
+    raise RequestError("player: ожидается список карт")
+
+
+def _flag(value) -> bool:
+    """Булев параметр из JSON или строки запроса ('0', 'false', 'no' — ложь)."""
+    if isinstance(value, str):
+        return value.lower() not in ("0", "false", "no", "")
+    return bool(value)
+
+
+def recommend(args: dict) -> dict:
+    """Рекомендация без сессии по аргументам запроса."""
+    player = _as_list(_arg(args, "player"))
+    if len(player) < 2:
+        raise RequestError("player: нужно минимум две карты")
+    true_count = args.get("true_count")
+    if true_count is not None:
+        try:
+            true_count = float(true_count)
+        except (TypeError, ValueError):
+            raise RequestError("true_count: ожидается число") from None
+    return get_recommendation(
+        player,
+        str(_arg(args, "dealer")),
+        can_double=_flag(args.get("can_double", True)),
+        can_split=_flag(args.get("can_split", True)),
+        true_count=true_count,
+    )
+
+
+class RecommendationServer:
+    """Сервер рекомендаций над реестром сессий.
+
+    Args:
+        registry: реестр сессий (по умолчанию — новый на MAX_SESSIONS столов).
+        host, port: адрес прослушивания; port=0 — любой свободный.
+    """
+
+    def __init__(
+        self,
+        registry: SessionRegistry | None = None,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+    ) -> None:
+        self.registry = registry or SessionRegistry(max_sessions=MAX_SESSIONS)
+        self.host = host
+        self.port = port
+        self._server: asyncio.base_events.Server | None = None
+        self._conn_ids = count(1)
+
+    async def start(self) -> None:
+        """Начать приём соединений (self.port — фактический порт)."""
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, limit=MAX_BODY, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+
+    # -----------------------------------------------------------------
+    # Диспетчеризация (общая для HTTP и WebSocket)
+    # -----------------------------------------------------------------
+
+    def dispatch(self, client_id: str, op: str, args: dict) -> dict:
+        """Выполнить операцию и вернуть JSON-ответ.
+
+        Raises:
+            RequestError: неизвестная операция или неверные аргументы.
+        """
+        if op == "recommend":
+            return recommend(args)
+        action = SESSION_OPS.get(op)
+        if action is None:
+            raise RequestError(f"неизвестная операция: {op}", 404)
+        session = self.registry.open(client_id)
+        try:
+            action(session, args)
+        except ValueError as e:
+            raise RequestError(str(e)) from None
+        return {"state": session.state(), "recommendation": session.recommendation()}
+
+    # -----------------------------------------------------------------
+    # HTTP
+    # -----------------------------------------------------------------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        conn_id = f"conn-{next(self._conn_ids)}"
+        anonymous = False  # была сессия без id — закрыть вместе с соединением
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 413, {"error": "слишком большие заголовки"}, False)
+                    return
+                try:
+                    method, target, headers = _parse_head(head)
+                except ValueError:
+                    await self._send(writer, 400, {"error": "неверный запрос"}, False)
+                    return
+                url = urlsplit(target)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                client_id = headers.get("x-client-id") or query.pop("client", None)
+                if client_id is None:
+                    client_id = conn_id
+                    anonymous = True
+
+                if url.path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                    await self._websocket(reader, writer, headers, client_id)
+                    return
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, payload = await self._http(method, url.path, query, reader, headers, client_id)
+                await self._send(writer, status, payload, keep_alive)
+                if not keep_alive or status == 413:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            if anonymous:
+                self.registry.close(conn_id)
+            writer.close()
+
+    async def _http(self, method, path, query, reader, headers, client_id) -> tuple[int, dict | None]:
+        if method == "OPTIONS":
+            return 204, None
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            return 400, {"error": "неверный Content-Length"}
+        if length < 0:
+            return 400, {"error": "неверный Content-Length"}
+        if length > MAX_BODY:
+            return 413, {"error": "слишком большое тело запроса"}
+        body = await reader.readexactly(length) if length else b""
+
+        if path == "/health":
+            return 200, {"ok": True, "sessions": len(self.registry)}
+        op = path.lstrip("/")
+        if method == "GET" and op not in ("state", "recommend"):
+            return (405 if op in SESSION_OPS else 404), {"error": f"{method} {path}"}
+        if method not in ("GET", "POST"):
+            return 405, {"error": f"{method} {path}"}
+
+        args = dict(query)
+        if body:
+            try:
+                data = json.loads(body)
+            except ValueError:
+                return 400, {"error": "тело запроса — не JSON"}
+            if not isinstance(data, dict):
+                return 400, {"error": "тело запроса — не JSON-объект"}
+            args.update(data)
+        try:
+            return 200, self.dispatch(client_id, op, args)
+        except RequestError as e:
+            return e.status, {"error": str(e)}
+
+    @staticmethod
+    async def _send(writer, status: int, payload: dict | None, keep_alive: bool) -> None:
+        body = b"" if payload is None else _dumps(payload)
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Access-Control-Allow-Origin: *\r\n"
+            "Access-Control-Allow-Headers: Content-Type, X-Client-Id\r\n"
+            "Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    # -----------------------------------------------------------------
+    # WebSocket (RFC 6455: текстовые кадры, ping/pong, close)
+    # -----------------------------------------------------------------
+
+    async def _websocket(self, reader, writer, headers, client_id: str) -> None:
+        key = headers.get("sec-websocket-key")
+        if not key:
+            await self._send(writer, 400, {"error": "нет Sec-WebSocket-Key"}, False)
+            return
+        accept = base64.b64encode(hashlib.sha1(key.encode() + _WS_GUID).digest()).decode()
+        writer.write((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode("latin-1"))
+        await writer.drain()
+
+        while True:
+            try:
+                opcode, payload = await asyncio.wait_for(_read_frame(reader), IDLE_TIMEOUT)
+            except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError, ValueError):
+                return
+            if opcode == _WS_CLOSE:
+                writer.write(_frame(_WS_CLOSE, payload[:2]))
+                await writer.drain()
+                return
+            if opcode == _WS_PING:
+                writer.write(_frame(_WS_PONG, payload))
+                await writer.drain()
+                continue
+            if opcode != _WS_TEXT:
+                continue
+            writer.write(_frame(_WS_TEXT, _dumps(self._ws_message(client_id, payload))))
+            await writer.drain()
+
+    def _ws_message(self, client_id: str, payload: bytes) -> dict:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return {"error": "сообщение — не JSON"}
+        if not isinstance(message, dict):
+            return {"error": "сообщение — не JSON-объект"}
+        msg_id = message.pop("id", None)
+        try:
+            reply = self.dispatch(client_id, str(message.pop("op", "state")), message)
+        except RequestError as e:
+            reply = {"error": str(e)}
+        if msg_id is not None:
+            reply["id"] = msg_id
+        return reply
+
+
+def _dumps(payload: dict) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _parse_head(head: bytes) -> tuple[str, str, dict[str, str]]:
+    """Строка запроса и заголовки (имена в нижнем регистре)."""
+    lines = head.decode("latin-1").split("\r\n")
+    method, target, _ = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    return method, target, headers
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    """Прочитать сообщение WebSocket (фрагменты склеиваются)."""
+    message = b""
+    first_opcode = None
+    while True:
+        b0, b1 = await reader.readexactly(2)
+        opcode = b0 & 0x0F
+        length = b1 & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", await reader.readexactly(8))[0]
+        if length > MAX_BODY or len(message) + length > MAX_BODY:
+            raise ValueError("слишком большое сообщение")
+        mask = await reader.readexactly(4) if b1 & 0x80 else b""
+        data = await reader.readexactly(length)
+        if mask:
+            key = (mask * (length // 4 + 1))[:length]
+            data = (int.from_bytes(data, "little") ^ int.from_bytes(key, "little")).to_bytes(length, "little")
+        if opcode >= _WS_CLOSE:
+            return opcode, data  # управляющие кадры не фрагментируются
+        if first_opcode is None:
+            first_opcode = opcode
+        message += data
+        if b0 & 0x80:
+            return first_opcode, message
+
+
+def _frame(opcode: int, payload: bytes) -> bytes:
+    """Кадр сервер → клиент (без маски)."""
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 1 << 16:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return head + payload
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Локальный сервер рекомендаций блэкджека")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    args = parser.parse_args()
+
+    server = RecommendationServer(
+        SessionRegistry(max_sessions=args.max_sessions), args.host, args.port)
+
+    async def run() -> None:
+        await server.start()
+        print(f"Сервер рекомендаций: http://{server.host}:{server.port}  (ws://…/ws)")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+"""Реестр игровых сессий для многих столов одновременно.
+
+Каждый стол — независимая сессия: GameState, CardCounter и SessionStats
+(game.stats), плюс журнал событий (event_log), через который идут все
+изменения и отмена. Реестр держит тысячи таких сессий по id стола и не
+требует Qt.
+
+Сессия с SnapshotWriter (snapshot.py) после каждого изменения отдаёт
+фоновому потоку снимок состояния, а при запуске восстанавливается из
+снимка и доигрывает только хвост журнала после него.
+
+Асинхронный API (add_card, undo, recommendation, ...) рассчитан на один
+цикл asyncio: каждая операция выполняется целиком без await внутри,
+поэтому операции над одним столом не перемешиваются и блокировки не нужны.
+"""
+
+from collections import OrderedDict
+
+from card_counter import CardCounter
+from event_log import (
+    EVENT_CARD, EVENT_DECKS, EVENT_MODE, EVENT_NEW_HAND, EVENT_NEW_SHOE,
+    EVENT_RESULT, RESULTS, TARGETS, EventLog, apply_event, encode_result,
+)
+from game_state import GameState, card_byte, card_code
+from rules import Rules
+from snapshot import SNAPSHOT_TAIL, SnapshotWriter, dump, load, read, tail_crc
+from strategy import recommend_codes
+from strategy_compiler import request_table
+
+# Предел карт за одну раздачу: держит память сессии ограниченной
+MAX_HAND_CARDS = 64
+
+# События, после которых начинается новый шу / новая раздача
+_SHOE_EVENTS = (EVENT_NEW_SHOE, EVENT_DECKS)
+_HAND_EVENTS = (EVENT_NEW_HAND, EVENT_RESULT, EVENT_NEW_SHOE, EVENT_DECKS)
+
+
+class TableSession:
+    """Одна сессия за столом: состояние раздачи, счёт и статистика.
+
+    Все изменения идут через журнал событий (event_log): событие
+    дописывается в журнал и применяется к состоянию. Отмена карты —
+    удаление её события из журнала и пересборка текущего шу из его хвоста.
+
+    Attributes:
+        table_id: идентификатор стола.
+        game: текущая раздача и статистика сессии (game.stats).
+        counter: счётчик карт шу.
+        log: журнал событий стола.
+        snapshots: фоновая запись снимков или None.
+        restored: восстановлена ли сессия из снимка (а не всем журналом).
+        rules: правила стола (rules.Rules) для стратегии; число колод в
+            них следует за шу (см. set_rules).
+    """
+
+    __slots__ = ("table_id", "game", "counter", "log", "snapshots", "restored", "rules",
+                 "_shoe_start", "_hand_start", "_table", "_table_ready")
+
+    def __init__(self, table_id: str, decks: int = 6, log: EventLog | None = None,
+                 snapshots: SnapshotWriter | None = None, rules: Rules | None = None) -> None:
+        """
+        Args:
+            table_id: идентификатор стола.
+            decks: колод в шу для нового журнала.
+            log: журнал стола; непустой журнал воспроизводится
+                (продолжение сессии), по умолчанию — журнал в памяти.
+            snapshots: запись снимков; снимок из её файла, если он
+                соответствует журналу, заменяет воспроизведение.
+            rules: правила стола (см. set_rules), по умолчанию Rules(decks).
+        """
+        self.table_id = table_id
+        self.log = log if log is not None else EventLog()
+        self.snapshots = snapshots
+        self.restored = False
+        self.rules = rules or Rules(decks)
+        # Таблица действий под rules (последняя готовая) и готова ли она для
+        # текущих rules
+        self._table = None
+        self._table_ready = False
+        # Номера первых событий текущего шу и текущей раздачи в журнале
+        self._shoe_start = 0
+        self._hand_start = 0
+        if len(self.log):
+            self.restored = snapshots is not None and self._restore(read(snapshots.path))
+            if not self.restored:
+                self.game, self.counter = self.log.replay(decks=decks)
+                self._find_boundaries()
+        else:
+            self.game = GameState()
+            self.counter = CardCounter(total_decks=decks)
+            self._emit(EVENT_DECKS, value=decks)
+        if self.rules.decks != self.counter.total_decks:
+            self.rules = self.rules.with_decks(self.counter.total_decks)
+
+    @property
+    def stats(self):
+        return self.game.stats
+
+    def _emit(self, kind: int, arg: int = 0, value: int = 0) -> None:
+        """Записать событие в журнал и применить его."""
+        self.log.append(kind, arg, value)
+        self._apply(kind, arg, value, len(self.log))
+        if self.snapshots is not None:
+            self.snapshots.submit(self.snapshot())
+
+    def _apply(self, kind: int, arg: int, value: int, n: int) -> None:
+        """Применить событие номер n - 1 и сдвинуть границы шу и раздачи."""
+        apply_event(self.game, self.counter, kind, arg, value)
+        if kind in _HAND_EVENTS:
+            self._hand_start = n
+            if kind in _SHOE_EVENTS:
+                self._shoe_start = n
+                # Прошлые шу в памяти не нужны: их итог уже в game.stats
+                self.log.compact(n)
+                if kind == EVENT_DECKS and self.rules.decks != value:
+                    self.rules = self.rules.with_decks(value)
+                    self._table_ready = False
+
+    def snapshot(self) -> bytes:
+        """Снимок текущего состояния (snapshot.dump) с привязкой к журналу."""
+        n = len(self.log)
+        crc = tail_crc(self.log.raw(max(0, n - SNAPSHOT_TAIL), n))
+        return dump(n, crc, self._shoe_start, self._hand_start, self.game, self.counter)
+
+    def _restore(self, data: bytes | None) -> bool:
+        """Восстановиться из снимка и доиграть журнал после него.
+
+        Returns:
+            False, если снимка нет, он повреждён или не от этого журнала.
+        """
+        if data is None:
+            return False
+        try:
+            n, crc, shoe_start, hand_start, game, counter = load(data)
+        except ValueError:
+            return False
+        log = self.log
+        if n > len(log) or tail_crc(log.raw(max(0, n - SNAPSHOT_TAIL), n)) != crc:
+            return False
+        self.game, self.counter = game, counter
+        self._shoe_start, self._hand_start = shoe_start, hand_start
+        for i, (kind, arg, value) in enumerate(log.events(n), n + 1):
+            self._apply(kind, arg, value, i)
+        return True
+
+    def _find_boundaries(self) -> None:
+        """Найти начало текущего шу и раздачи, просматривая журнал с конца."""
+        log = self.log
+        self._hand_start = None
+        first = log.first
+        for i in range(len(log) - 1, first - 1, -1):
+            kind = log.event(i)[0]
+            if self._hand_start is None and kind in _HAND_EVENTS:
+                self._hand_start = i + 1
+            if kind in _SHOE_EVENTS:
+                self._shoe_start = i + 1
+                return
+        # Граница шу выброшена сжатием журнала (или её не было)
+        self._shoe_start = first
+        if self._hand_start is None:
+            self._hand_start = first
+
+    def add_card(self, rank: str) -> str:
+        """Ввести карту в текущий режим ввода и в счётчик.
+
+        Returns:
+            Куда добавлена карта: 'dealer', 'player' или 'others'.
+
+        Raises:
+            ValueError: в раздаче уже MAX_HAND_CARDS карт.
+        """
+        game = self.game
+        if len(game.dealer) + len(game.player) + len(game.others) >= MAX_HAND_CARDS:
+            raise ValueError(f"в раздаче уже {MAX_HAND_CARDS} карт — начните новую")
+        target = game.route()
+        self._emit(EVENT_CARD, TARGETS.index(target), card_byte(rank))
+        return target
+
+    def undo(self) -> bool:
+        """Отменить последнюю карту раздачи (и в счётчике).
+
+        Из журнала удаляется только событие этой карты (смены режима
+        после неё остаются), текущий шу пересобирается из оставшихся
+        событий.
+
+        Returns:
+            True если было что отменять.
+        """
+        log = self.log
+        for i in range(len(log) - 1, self._hand_start - 1, -1):
+            if log.event(i)[0] == EVENT_CARD:
+                break
+        else:
+            return False
+        log.delete(i)
+        self._rebuild()
+        if self.snapshots is not None:
+            self.snapshots.submit(self.snapshot())
+        return True
+
+    def _rebuild(self) -> None:
+        """Пересобрать счётчик и раздачу из хвоста журнала (текущий шу)."""
+        game, counter = self.game, self.counter
+        counter.reset_shoe()
+        for kind, _, value in self.log.events(self._shoe_start, self._hand_start):
+            if kind == EVENT_CARD:
+                counter.add_code(card_code(value))
+        game.new_hand()
+        for kind, arg, value in self.log.events(self._hand_start):
+            apply_event(game, counter, kind, arg, value)
+
+    def set_input_mode(self, mode: str) -> None:
+        """Переключить режим ввода ('dealer', 'player', 'others').
+
+        Raises:
+            ValueError: неизвестный режим.
+        """
+        if mode not in TARGETS:
+            raise ValueError(f"неизвестный режим ввода: {mode!r}")
+        self._emit(EVENT_MODE, TARGETS.index(mode))
+
+    def new_hand(self) -> None:
+        """Новая раздача — очистить карты, сохранить счёт."""
+        self._emit(EVENT_NEW_HAND)
+
+    def new_shoe(self) -> None:
+        """Новый шу — сброс счётчика и карт."""
+        self._emit(EVENT_NEW_SHOE)
+
+    def set_decks(self, n: int) -> None:
+        """Изменить количество колод (сбрасывает шу) и сразу запросить
+        таблицу стратегии под правила с n колодами."""
+        self._emit(EVENT_DECKS, value=n)
+        self._strategy_table()
+
+    def set_rules(self, rules) -> None:
+        """Играть по стратегии под правила стола.
+
+        Правила действуют только на этот стол; число колод берётся из шу
+        сессии и дальше следует за set_decks. Таблица загружается без
+        ожидания (strategy_compiler.request_table): пока она считается,
+        рекомендации идут по прежней таблице стола.
+
+        Args:
+            rules: rules.Rules или None — правила по умолчанию (Rules()).
+        """
+        self.rules = (rules or Rules()).with_decks(self.counter.total_decks)
+        self._table_ready = False
+
+    def _strategy_table(self) -> bytes | None:
+        """Таблица действий стола (None — пока не готова: активная таблица
+        strategy)."""
+        if not self._table_ready:
+            table = request_table(self.rules)
+            if table is not None:
+                self._table, self._table_ready = table, True
+        return self._table
+
+    def record_result(self, result: str, doubled: bool = False) -> None:
+        """Записать результат руки ('win'/'loss'/'push') и начать новую.
+
+        Ставка — рекомендованная при истинном счёте на момент ставки
+        (до карт этой раздачи); с ней рука попадает в агрегаты банкролла
+        SessionStats.
+
+        Args:
+            doubled: рука удвоена (выплата и ставка вдвое).
+        """
+        if result not in ("win", "loss", "push"):
+            raise ValueError(f"неизвестный результат: {result!r}")
+        game = self.game
+        if result == "win" and game.player.is_blackjack:
+            result, doubled = "blackjack", False
+        tc = self.counter.true_count_before(game.dealer.codes + game.player.codes + game.others.codes)
+        bet = self.counter.bet_for(tc)[1]
+        self._emit(EVENT_RESULT, RESULTS.index(result), encode_result(bet, doubled, tc))
+
+    def recommendation(self) -> dict | None:
+        """Рекомендация (базовая стратегия с отклонениями по истинному счёту
+        шу) или None, если карт мало."""
+        game = self.game
+        if not game.is_ready:
+            return None
+        return recommend_codes(
+            game.player.codes,
+            game.dealer.codes[0],
+            can_double=game.player.can_double,
+            can_split=game.player.can_split,
+            true_count=self.counter.true_count,
+            table=self._strategy_table(),
+        )
+
+    def state(self) -> dict:
+        """Снимок состояния для клиентов (только простые типы)."""
+        game = self.game
+        counter = self.counter
+        stats = game.stats
+        return {
+            "table_id": self.table_id,
+            "input_mode": game.input_mode,
+            "dealer": game.dealer.cards,
+            "player": game.player.cards,
+            "others": game.others_cards,
+            "running_count": counter.running_count,
+            "true_count": counter.true_count,
+            "decks_remaining": counter.decks_remaining,
+            "bet": counter.bet_recommendation()[1],
+            "hands_played": stats.hands_played,
+            "wins": stats.wins,
+            "losses": stats.losses,
+            "pushes": stats.pushes,
+            "net": stats.net,
+            "max_drawdown": stats.max_drawdown,
+        }
+
+
+class SessionRegistry:
+    """Реестр сессий по id стола.
+
+    Args:
+        decks: колод в шу для новых столов.
+        max_sessions: предел одновременно открытых столов; при превышении
+            закрывается стол, к которому дольше всех не обращались.
+        rules: правила новых столов (TableSession.set_rules), по умолчанию
+            Rules(decks) с числом колод стола.
+    """
+
+    def __init__(self, decks: int = 6, max_sessions: int | None = None,
+                 rules: Rules | None = None) -> None:
+        self.decks = decks
+        self.max_sessions = max_sessions
+        self.rules = rules
+        self._sessions: OrderedDict[str, TableSession] = OrderedDict()
+
+    def open(self, table_id: str, decks: int | None = None) -> TableSession:
+        """Вернуть сессию стола, создав её при необходимости."""
+        session = self._sessions.get(table_id)
+        if session is not None:
+            self._sessions.move_to_end(table_id)
+            return session
+        session = TableSession(table_id, decks or self.decks, rules=self.rules)
+        self._sessions[table_id] = session
+        if self.max_sessions is not None and len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return session
+
+    def get(self, table_id: str) -> TableSession:
+        """Сессия открытого стола.
+
+        Raises:
+            KeyError: стол не открыт.
+        """
+        session = self._sessions[table_id]
+        self._sessions.move_to_end(table_id)
+        return session
+
+    def close(self, table_id: str) -> None:
+        self._sessions.pop(table_id, None)
+
+    def table_ids(self) -> list[str]:
+        return list(self._sessions)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, table_id: str) -> bool:
+        return table_id in self._sessions
+
+    # -----------------------------------------------------------------
+    # Асинхронный API
+    # -----------------------------------------------------------------
+
+    async def add_card(self, table_id: str, rank: str) -> str:
+        return self.open(table_id).add_card(rank)
+
+    async def undo(self, table_id: str) -> bool:
+        return self.get(table_id).undo()
+
+    async def set_input_mode(self, table_id: str, mode: str) -> None:
+        self.get(table_id).set_input_mode(mode)
+
+    async def new_hand(self, table_id: str) -> None:
+        self.get(table_id).new_hand()
+
+    async def new_shoe(self, table_id: str) -> None:
+        self.get(table_id).new_shoe()
+
+    async def record_result(self, table_id: str, result: str, doubled: bool = False) -> None:
+        self.get(table_id).record_result(result, doubled)
+
+    async def recommendation(self, table_id: str) -> dict | None:
+        return self.get(table_id).recommendation()
+
+    async def state(self, table_id: str) -> dict:
+        return self.get(table_id).state()
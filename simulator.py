@@ -0,0 +1,402 @@
+"""Монте-Карло симулятор блэкджека.
+
+Раздаёт настоящие шу, играет за игрока по базовой стратегии, дилер стоит
+на всех 17 (S17), ставка — по CardCounter.bet_recommendation.
+
+Правила: блэкджек 3:2, дилер проверяет блэкджек (peek), дабл на любых
+двух картах, дабл после сплита, сплит до 4 рук, тузы сплитятся один раз
+и получают по одной карте. Поздняя сдача — если её даёт таблица (ACT_R
+на первых двух картах). Таблица под другие правила (rules.Rules)
+отвергается — check_rules.
+
+Внутренний цикл работает только с целыми значениями карт (2..11) и
+скомпилированной таблицей действий — без разбора строк и без словарей
+на каждую руку. Решения совпадают с get_recommendation: таблица — активная
+strategy.ACTION_TABLE (в том числе после set_rules) или переданная в table.
+
+Запуск:
+    python simulator.py --rounds 1000000 --decks 6
+"""
+
+import argparse
+import math
+import random
+import time
+from itertools import accumulate
+
+import strategy
+from card_counter import CardCounter, HI_LO_TAGS
+from game_state import SessionStats
+from rules import Rules
+from strategy import (
+    ACT_D, ACT_H, ACT_P, ACT_R, ACT_S, BUST_SLOT,
+    KIND_HARD, KIND_PAIR, KIND_SOFT, FLAG_DOUBLE, FLAG_SPLIT,
+    lookup_action,
+)
+
+# Максимум рук после сплитов
+MAX_HANDS = 4
+
+# Запас карт за подрезной картой — раунд всегда доигрывается
+_RESERVE_DECKS = 1
+
+
+def build_shoe(decks: int) -> list[int]:
+    """Несортированный шу: значения карт 2..11 (10 = десятки и картинки)."""
+    one_deck = [v for v in range(2, 10) for _ in range(4)] + [10] * 16 + [11] * 4
+    return one_deck * decks
+
+
+class SimulationResult:
+    """Итог симуляции.
+
+    Все денежные величины — в единицах минимальной ставки.
+
+    Attributes:
+        stats: исходы раундов в форме SessionStats.
+        rounds: сыграно раундов.
+        total_wagered: сумма начальных ставок (без даблов и сплитов).
+        net: чистый результат.
+        sum_sq: сумма квадратов результатов раундов (для дисперсии).
+    """
+
+    def __init__(self) -> None:
+        self.stats = SessionStats()
+        self.rounds: int = 0
+        self.total_wagered: float = 0.0
+        self.net: float = 0.0
+        self.sum_sq: float = 0.0
+
+    @property
+    def ev(self) -> float:
+        """Средний результат раунда."""
+        if self.rounds == 0:
+            return 0.0
+        return self.net / self.rounds
+
+    @property
+    def ev_per_unit(self) -> float:
+        """Доходность на единицу начальной ставки (преимущество игрока)."""
+        if self.total_wagered == 0:
+            return 0.0
+        return self.net / self.total_wagered
+
+    @property
+    def variance(self) -> float:
+        """Дисперсия результата раунда."""
+        if self.rounds < 2:
+            return 0.0
+        mean = self.ev
+        return (self.sum_sq - self.rounds * mean * mean) / (self.rounds - 1)
+
+    @property
+    def std_dev(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def n0(self) -> float:
+        """N0 — число раундов, за которое ожидание догоняет одно стандартное отклонение."""
+        ev = self.ev
+        if ev == 0:
+            return math.inf
+        return self.variance / (ev * ev)
+
+    def report(self) -> str:
+        """Текстовый отчёт для консоли."""
+        s = self.stats
+        played = max(s.hands_played, 1)
+        return "\n".join([
+            f"Раундов:        {self.rounds}",
+            f"EV/раунд:       {self.ev:+.5f} ед.",
+            f"EV/ставку:      {self.ev_per_unit * 100:+.3f}%",
+            f"Дисперсия:      {self.variance:.4f} (σ = {self.std_dev:.4f})",
+            f"N0:             {self.n0:,.0f} раундов",
+            f"Выигрыши:       {s.wins / played * 100:.2f}%"
+            f" (блэкджеков {s.blackjacks / played * 100:.2f}%)",
+            f"Проигрыши:      {s.losses / played * 100:.2f}%",
+            f"Ничьи:          {s.pushes / played * 100:.2f}%",
+            f"Даблы:          +{s.doubles_won} / -{s.doubles_lost}",
+        ])
+
+
+def check_rules(rules: Rules) -> None:
+    """Проверить, что симулятор играет по правилам `rules` (кроме колод).
+
+    Дилер и сплиты в симуляторе зашиты (S17, peek, DAS, сплит до MAX_HANDS
+    рук без пересплита тузов); сдача берётся из таблицы.
+
+    Raises:
+        ValueError: правила, которых симулятор не умеет.
+    """
+    problems = []
+    if rules.h17:
+        problems.append("H17")
+    if not rules.peek:
+        problems.append("без проверки блэкджека")
+    if not rules.das:
+        problems.append("без дабла после сплита")
+    if rules.split_hands != MAX_HANDS:
+        problems.append(f"сплит до {rules.split_hands} рук")
+    if rules.resplit_aces:
+        problems.append("пересплит тузов")
+    if problems:
+        raise ValueError(f"симулятор не играет по правилам {rules.describe()}: {', '.join(problems)}")
+
+
+def _dealer_total(up: int, hole: int, shoe: list[int], pos: int) -> tuple[int, int]:
+    """Доиграть руку дилера (S17).
+
+    Returns:
+        (итоговая сумма, новая позиция в шу); сумма > 21 — перебор.
+    """
+    aces = (up == 11) + (hole == 11)
+    hard = up + hole - 10 * aces
+    while True:
+        total = hard + 10 if aces and hard <= 11 else hard
+        if total >= 17:
+            return total, pos
+        v = shoe[pos]
+        pos += 1
+        if v == 11:
+            aces += 1
+            hard += 1
+        else:
+            hard += v
+
+
+def _play_player(
+    first: int, second: int, up: int, shoe: list[int], pos: int, table: bytes,
+) -> tuple[list[tuple[int, int]], int]:
+    """Сыграть руку игрока (со сплитами) по скомпилированной таблице.
+
+    Сдача (ACT_R) возможна только первым решением на двух картах; в
+    руках после сплита вместо неё — ЕЩЁ.
+
+    Returns:
+        ([(итоговая сумма, множитель ставки), ...], новая позиция в шу);
+        пустой список — игрок сдался.
+    """
+    done: list[tuple[int, int]] = []
+    pending = [(first, second, False)]
+    n_hands = 1
+
+    while pending:
+        c1, c2, split = pending.pop()
+        if c2 == 0:
+            c2 = shoe[pos]
+            pos += 1
+
+        if split and c1 == 11:
+            # Сплит тузов — по одной карте, без пересплита
+            done.append((11 + c2 if c2 != 11 else 12, 1))
+            continue
+
+        if c1 == c2 and n_hands < MAX_HANDS:
+            code = lookup_action(KIND_PAIR, c1, up, FLAG_DOUBLE | FLAG_SPLIT, table)
+            if code == ACT_P:
+                n_hands += 1
+                pending.append((c1, 0, True))
+                pending.append((c1, 0, True))
+                continue
+            if code == ACT_R and not split:
+                return [], pos
+
+        aces = (c1 == 11) + (c2 == 11)
+        hard = c1 + c2 - 10 * aces
+        flags = FLAG_DOUBLE
+        wager = 1
+        while True:
+            if aces and hard <= 11:
+                kind, total = KIND_SOFT, hard + 10
+            else:
+                kind, total = KIND_HARD, hard
+            if total >= 21:
+                break
+            code = lookup_action(kind, total, up, flags, table)
+            if code == ACT_S:
+                break
+            if code == ACT_R:
+                if flags and not split:
+                    return [], pos
+                code = ACT_H
+            v = shoe[pos]
+            pos += 1
+            if v == 11:
+                aces += 1
+                hard += 1
+            else:
+                hard += v
+            if code == ACT_D:
+                wager = 2
+                if aces and hard <= 11:
+                    hard += 10
+                total = hard
+                break
+            flags = 0
+        done.append((total if total <= 21 else BUST_SLOT, wager))
+
+    return done, pos
+
+
+def play_round(shoe: list[int], pos: int, stats: SessionStats | None = None,
+               table: bytes | None = None) -> tuple[float, int]:
+    """Сыграть один раунд с позиции `pos` шу ставкой в одну единицу.
+
+    Args:
+        stats: куда записать исход (None — не записывать).
+        table: таблица действий (None — активная strategy.ACTION_TABLE);
+            должна быть под правила симулятора (check_rules).
+
+    Returns:
+        (результат в единицах ставки, новая позиция в шу).
+    """
+    p1, up, p2, hole = shoe[pos], shoe[pos + 1], shoe[pos + 2], shoe[pos + 3]
+    pos += 4
+    player_bj = p1 + p2 == 21
+    dealer_bj = up + hole == 21
+
+    if player_bj or dealer_bj:
+        if player_bj and dealer_bj:
+            if stats is not None:
+                stats.record_push()
+            return 0.0, pos
+        if player_bj:
+            if stats is not None:
+                stats.record_blackjack()
+            return 1.5, pos
+        if stats is not None:
+            stats.record_loss()
+        return -1.0, pos
+
+    if table is None:
+        table = strategy.ACTION_TABLE
+    hands, pos = _play_player(p1, p2, up, shoe, pos, table)
+    if not hands:
+        # Сдача: теряется половина ставки, дилер не доигрывает
+        if stats is not None:
+            stats.record_loss()
+        return -0.5, pos
+    if any(total <= 21 for total, _ in hands):
+        dealer, pos = _dealer_total(up, hole, shoe, pos)
+    else:
+        dealer = 0  # все руки игрока сгорели — дилер не добирает
+
+    units = 0
+    for total, wager in hands:
+        if total > 21 or (dealer <= 21 and total < dealer):
+            units -= wager
+            if wager == 2 and stats is not None:
+                stats.doubles_lost += 1
+        elif dealer > 21 or total > dealer:
+            units += wager
+            if wager == 2 and stats is not None:
+                stats.doubles_won += 1
+    if stats is not None:
+        if units > 0:
+            stats.record_win()
+        elif units < 0:
+            stats.record_loss()
+        else:
+            stats.record_push()
+    return float(units), pos
+
+
+def simulate(
+    rounds: int,
+    decks: int = 6,
+    penetration: float = 0.75,
+    seed: int | None = None,
+    counter: CardCounter | None = None,
+    table: bytes | None = None,
+    rules: Rules | None = None,
+) -> SimulationResult:
+    """Сыграть `rounds` раундов один на один с дилером.
+
+    Args:
+        rounds: сколько раундов сыграть
+        decks: колод в шу
+        penetration: доля шу до подрезной карты
+        seed: зерно генератора (для воспроизводимости)
+        counter: счётчик для размера ставок (по умолчанию Hi-Lo на `decks` колод)
+        table: таблица действий (None — под `rules` или активная
+            strategy.ACTION_TABLE)
+        rules: правила, под которые построена таблица (None — правила
+            активной таблицы, strategy.get_rules); сверяются с check_rules
+
+    Raises:
+        ValueError: правила не те, по которым играет симулятор, или
+            таблица для другого числа колод.
+    """
+    if table is None:
+        if rules is not None:
+            from strategy_compiler import load_table
+            table = load_table(rules)
+        else:
+            table = strategy.ACTION_TABLE
+            rules = strategy.get_rules()
+    if rules is not None:
+        check_rules(rules)
+        if rules.decks != decks:
+            raise ValueError(f"таблица для {rules.decks} колод, а симуляция — для {decks}")
+    rng = random.Random(seed)
+    if counter is None:
+        counter = CardCounter(total_decks=decks)
+    result = SimulationResult()
+    stats = result.stats
+
+    base_shoe = build_shoe(decks)
+    reserve = build_shoe(_RESERVE_DECKS)
+    cut = int(len(base_shoe) * penetration)
+    shoe: list[int] = []
+    counts: list[int] = []
+    pos = cut  # заставляет перемешать перед первым раундом
+
+    net = 0.0
+    sum_sq = 0.0
+    wagered = 0.0
+    for _ in range(rounds):
+        if pos >= cut:
+            rng.shuffle(base_shoe)
+            rng.shuffle(reserve)
+            shoe = base_shoe + reserve
+            # Бегущий счёт Hi-Lo перед каждой позицией шу
+            counts = [0, *accumulate(HI_LO_TAGS[v] for v in shoe)]
+            pos = 0
+
+        counter.running_count = counts[pos]
+        counter.cards_dealt = pos
+        bet = counter.bet_recommendation()[1]
+        wagered += bet
+
+        units, pos = play_round(shoe, pos, stats, table)
+        outcome = units * bet
+        net += outcome
+        sum_sq += outcome * outcome
+
+    result.rounds = rounds
+    result.net = net
+    result.sum_sq = sum_sq
+    result.total_wagered = wagered
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Монте-Карло симулятор блэкджека")
+    parser.add_argument("--rounds", type=int, default=1_000_000)
+    parser.add_argument("--decks", type=int, default=6)
+    parser.add_argument("--penetration", type=float, default=0.75)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--surrender", action="store_true",
+                        help="поздняя сдача (таблица strategy_compiler под эти правила)")
+    args = parser.parse_args()
+
+    rules = Rules(args.decks, surrender=True) if args.surrender else None
+    start = time.perf_counter()
+    result = simulate(args.rounds, args.decks, args.penetration, args.seed, rules=rules)
+    elapsed = time.perf_counter() - start
+    print(result.report())
+    print(f"Время:          {elapsed:.1f} с ({args.rounds / elapsed:,.0f} раундов/с)")
+
+
+if __name__ == "__main__":
+    main()
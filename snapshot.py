@@ -0,0 +1,215 @@
+"""Снимки сессии: компактный бинарный слепок и фоновая запись.
+
+Журнал событий (event_log) остаётся источником истины, снимок — его
+контрольная точка: состояние CardCounter, GameState и SessionStats после
+первых N событий журнала. При запуске сессия берёт снимок и доигрывает
+только события после него, вместо воспроизведения всего журнала.
+Снимок подходит, только если журнал всё ещё содержит те же события:
+вместе с N хранится CRC последних SNAPSHOT_TAIL записей журнала.
+
+Формат: HEADER, тело, CRC32 тела (u32). Тело:
+    <u64 событий> <u32 CRC хвоста журнала> <u64 начало шу> <u64 начало раздачи>
+    счётчик: <u8 колод> <i64 бегущий счёт> <u32 карт вышло> <u8 побочные счёты>
+             <u8 длина> имена систем через запятую
+             <u16 длина> упакованные счёты систем (int, little-endian, со знаком)
+             24 байта остатка шу (12 × i16)
+    раздача: <u8 режим ввода> и три руки (дилер, игрок, чужие): <u8 длина> байты карт
+    статистика: до конца тела — SessionStats.to_bytes (исходы и агрегаты банкролла)
+
+SnapshotWriter пишет снимки в фоновом потоке: поток UI только отдаёт
+байты (микросекунды), частые обновления схлопываются в одну запись
+последнего состояния, файл заменяется атомарно (временный файл, fsync,
+os.replace) — обрыв в любой момент оставляет прежний целый снимок.
+"""
+
+import os
+import struct
+import threading
+import time
+import zlib
+
+from card_counter import CardCounter
+from event_log import TAIL_RECORDS
+from game_state import GameState, SessionStats
+
+HEADER = b"BJSNAP\x02\x00"  # сигнатура и версия формата
+
+# Сколько последних записей журнала сверяется со снимком: столько,
+# сколько журнал держит в памяти (снимок после события не читает файл)
+SNAPSHOT_TAIL = TAIL_RECORDS
+
+_POSITION = struct.Struct("<QIQQ")
+_COUNTER = struct.Struct("<BqIB")
+_CRC = struct.Struct("<I")
+_REMAINING_SIZE = 24
+_MODES = (GameState.INPUT_DEALER, GameState.INPUT_PLAYER, GameState.INPUT_OTHERS)
+
+
+def snapshot_path(log_path: str) -> str:
+    """Файл снимков рядом с журналом."""
+    return log_path + ".snap"
+
+
+def tail_crc(records: bytes) -> int:
+    """CRC последних записей журнала (байты записей подряд)."""
+    return zlib.crc32(records)
+
+
+def dump(n_events: int, crc: int, shoe_start: int, hand_start: int,
+         game: GameState, counter: CardCounter) -> bytes:
+    """Снимок состояния после `n_events` событий журнала."""
+    (decks, running, dealt, systems, side_counts, lanes, remaining, *_) = counter.__getstate__()
+    names = ",".join(systems).encode()
+    lanes_bytes = lanes.to_bytes((lanes.bit_length() + 8) // 8, "little", signed=True)
+    parts = [
+        _POSITION.pack(n_events, crc, shoe_start, hand_start),
+        _COUNTER.pack(decks, running, dealt, side_counts),
+        bytes((len(names),)), names,
+        struct.pack("<H", len(lanes_bytes)), lanes_bytes,
+        remaining,
+        bytes((_MODES.index(game.input_mode),)),
+    ]
+    for hand in (game.dealer, game.player, game.others):
+        cards = hand.card_bytes
+        parts += (bytes((len(cards),)), cards)
+    parts.append(game.stats.to_bytes())
+    body = b"".join(parts)
+    return HEADER + body + _CRC.pack(zlib.crc32(body))
+
+
+def load(data: bytes) -> tuple[int, int, int, int, GameState, CardCounter]:
+    """Разобрать снимок.
+
+    Returns:
+        (событий, CRC хвоста журнала, начало шу, начало раздачи, GameState, CardCounter)
+
+    Raises:
+        ValueError: не снимок, другая версия или повреждён.
+    """
+    if len(data) < len(HEADER) + _CRC.size or not data.startswith(HEADER):
+        raise ValueError("не снимок сессии или неподдерживаемая версия")
+    body = memoryview(data)[len(HEADER):-_CRC.size]
+    if zlib.crc32(body) != _CRC.unpack_from(data, len(data) - _CRC.size)[0]:
+        raise ValueError("снимок повреждён (CRC)")
+    try:
+        n_events, crc, shoe_start, hand_start = _POSITION.unpack_from(body)
+        pos = _POSITION.size
+        decks, running, dealt, side_counts = _COUNTER.unpack_from(body, pos)
+        pos += _COUNTER.size
+        size = body[pos]
+        names = bytes(body[pos + 1:pos + 1 + size]).decode()
+        pos += 1 + size
+        (size,) = struct.unpack_from("<H", body, pos)
+        lanes = int.from_bytes(body[pos + 2:pos + 2 + size], "little", signed=True)
+        pos += 2 + size
+        remaining = bytes(body[pos:pos + _REMAINING_SIZE])
+        pos += _REMAINING_SIZE
+
+        game = GameState()
+        game.input_mode = _MODES[body[pos]]
+        pos += 1
+        for hand in (game.dealer, game.player, game.others):
+            size = body[pos]
+            for byte in body[pos + 1:pos + 1 + size]:
+                hand.add_byte(byte)
+            pos += 1 + size
+        game.stats = SessionStats.from_bytes(bytes(body[pos:]))
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"снимок повреждён: {e}") from None
+
+    counter = CardCounter.__new__(CardCounter)
+    counter.__setstate__((decks, running, dealt, tuple(filter(None, names.split(","))),
+                          bool(side_counts), lanes, remaining, None, None))
+    return n_events, crc, shoe_start, hand_start, game, counter
+
+
+def read(path: str) -> bytes | None:
+    """Содержимое файла снимка или None, если его нет."""
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+class SnapshotWriter:
+    """Фоновая запись снимков с схлопыванием частых обновлений.
+
+    submit() только кладёт байты в ячейку «последний снимок» и будит
+    поток; поток ждёт `delay` секунд, чтобы пачка быстрых изменений дала
+    одну запись, и пишет последний снимок атомарно. Ошибка записи (нет
+    места, нет прав) не роняет приложение — она хранится в `error`, а
+    журнал событий по-прежнему содержит всё.
+
+    Attributes:
+        path: файл снимка.
+        writes: сколько раз снимок записан на диск.
+        error: последняя ошибка записи или None.
+    """
+
+    def __init__(self, path: str, delay: float = 0.05) -> None:
+        self.path = path
+        self.delay = delay
+        self.writes = 0
+        self.error: OSError | None = None
+        self._pending: bytes | None = None
+        self._submitted = 0
+        self._written = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, data: bytes) -> None:
+        """Поставить снимок в очередь (заменяет ещё не записанный)."""
+        with self._cond:
+            self._pending = data
+            self._submitted += 1
+            self._cond.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Дождаться записи всего отправленного.
+
+        Returns:
+            False, если не успели за `timeout` секунд.
+        """
+        with self._cond:
+            target = self._submitted
+            return self._cond.wait_for(lambda: self._written >= target, timeout)
+
+    def close(self) -> None:
+        """Записать последний снимок и остановить поток."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self) -> None:
+        cond = self._cond
+        while True:
+            with cond:
+                cond.wait_for(lambda: self._pending is not None or self._closed)
+                if self._pending is None:
+                    return
+                closing = self._closed
+            if not closing and self.delay:
+                time.sleep(self.delay)  # собрать пачку быстрых обновлений
+            with cond:
+                data, self._pending = self._pending, None
+                seq = self._submitted
+            try:
+                self._write(data)
+                self.writes += 1
+            except OSError as e:
+                self.error = e
+            with cond:
+                self._written = seq
+                cond.notify_all()
+
+    def _write(self, data: bytes) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
@@ -5,9 +5,28 @@
 - Мягких рук (soft hands, с тузом за 11)
 - Пар (splitting)
 
-Действия: H=ЕЩЁ, S=ХВАТИТ, D=ДАБЛ, P=СПЛИТ
+Действия: H=ЕЩЁ, S=ХВАТИТ, D=ДАБЛ, P=СПЛИТ, R=СДАТЬСЯ
+
+Встроенные таблицы — для одного набора правил (4-8 колод, S17, DAS);
+strategy_solver сверяет их и копию в webapp/index.html с точным расчётом.
+Под другие правила (rules.Rules) таблицу выводит strategy_compiler;
+set_rules делает её активной для всего процесса (get_recommendation,
+get_action, пакетный API), а параметр table у get_recommendation,
+get_action и lookup_action — только для одного вызова (у каждого стола
+свои правила, см. TableSession.set_rules).
+
+Отклонения по истинному счёту (Illustrious 18, Fab 4 или свой набор,
+set_deviations) сведены в массивы порогов той же формы, что таблица
+действий: проверка отклонения — чтение порога и одно сравнение.
 """
 
+from array import array
+from functools import lru_cache
+
+# numpy нужен только пакетному API и загружается при первом его вызове
+# (_numpy): импорт numpy дольше запуска всего остального приложения
+np = None
+
 # Карта дилера → индекс столбца (2..11, где 11 = туз)
 # Формат таблиц: {сумма_игрока: {карта_дилера: действие}}
 # H = Hit (ЕЩЁ), S = Stand (ХВАТИТ), D = Double (ДАБЛ), P = Split (СПЛИТ)
@@ -55,8 +74,8 @@ SOFT_TABLE: dict[int, dict[int, str]] = {
     16: {2: "H", 3: "H", 4: "D", 5: "D", 6: "D", 7: "H", 8: "H", 9: "H", 10: "H", 11: "H"},
     # A+6 (soft 17)
     17: {2: "H", 3: "D", 4: "D", 5: "D", 6: "D", 7: "H", 8: "H", 9: "H", 10: "H", 11: "H"},
-    # A+7 (soft 18): дабл 2-6, стоим 7-8, бьём 9-A
-    18: {2: "D", 3: "D", 4: "D", 5: "D", 6: "D", 7: "S", 8: "S", 9: "H", 10: "H", 11: "H"},
+    # A+7 (soft 18): дабл 3-6, стоим 2, 7-8, бьём 9-A
+    18: {2: "S", 3: "D", 4: "D", 5: "D", 6: "D", 7: "S", 8: "S", 9: "H", 10: "H", 11: "H"},
     # A+8 (soft 19): всегда ХВАТИТ
     19: {2: "S", 3: "S", 4: "S", 5: "S", 6: "S", 7: "S", 8: "S", 9: "S", 10: "S", 11: "S"},
     # A+9 (soft 20), A+10 (soft 21): ХВАТИТ
@@ -92,12 +111,126 @@ PAIR_TABLE: dict[int, dict[int, str]] = {
     11: {2: "P", 3: "P", 4: "P", 5: "P", 6: "P", 7: "P", 8: "P", 9: "P", 10: "P", 11: "P"},
 }
 
+# =====================================================================
+# Скомпилированная таблица действий
+# Три таблицы + флаги дабла/сплита сведены в один плоский массив,
+# индексируемый малыми целыми: (вид руки, сумма, карта дилера, флаги).
+# =====================================================================
+
+# Коды действий: индекс в ACTION_CODES (R — сдача, только в таблицах под правила)
+ACTION_CODES = ("H", "S", "D", "P", "R")
+ACT_H, ACT_S, ACT_D, ACT_P, ACT_R = range(5)
+
+# Вид руки
+KIND_HARD, KIND_SOFT, KIND_PAIR = range(3)
+
+# Флаги доступности
+FLAG_DOUBLE = 1
+FLAG_SPLIT = 2
+
+# Размерности: сумма 0..21 + 22 (перебор), дилер 0..11 (0 = неизвестная карта)
+_TOTALS = 23
+_DEALERS = 12
+_FLAGS = 4
+BUST_SLOT = 22
+
+
+def _table_action(kind: int, total: int, dealer_val: int, flags: int) -> str:
+    """Решение по исходным таблицам — та же логика, что в get_recommendation.
+
+    Для KIND_PAIR `total` — значение одной карты пары (2..11).
+    """
+    is_soft = kind == KIND_SOFT
+    if kind == KIND_PAIR:
+        if flags & FLAG_SPLIT and PAIR_TABLE.get(total, {}).get(dealer_val) == "P":
+            return "P"
+        # Пара без сплита играется как обычная сумма двух карт
+        is_soft = total == 11
+        total = 12 if is_soft else total * 2
+
+    if total >= BUST_SLOT:
+        return "S"
+    if is_soft and total in SOFT_TABLE:
+        action = SOFT_TABLE[total].get(dealer_val, "H")
+    elif total in HARD_TABLE:
+        action = HARD_TABLE[total].get(dealer_val, "H")
+    elif total >= 17:
+        action = "S"
+    else:
+        action = "H"
+
+    if action == "D" and not flags & FLAG_DOUBLE:
+        action = "H"
+    return action
+
+
+def _compile_action_table() -> bytes:
+    """Собрать плоскую таблицу кодов действий (один раз при импорте)."""
+    table = bytearray(3 * _TOTALS * _DEALERS * _FLAGS)
+    for kind in (KIND_HARD, KIND_SOFT, KIND_PAIR):
+        for total in range(_TOTALS):
+            for dealer_val in range(_DEALERS):
+                for flags in range(_FLAGS):
+                    idx = ((kind * _TOTALS + total) * _DEALERS + dealer_val) * _FLAGS + flags
+                    action = _table_action(kind, total, dealer_val, flags)
+                    table[idx] = ACTION_CODES.index(action)
+    return bytes(table)
+
+
+BUILTIN_ACTION_TABLE: bytes = _compile_action_table()
+
+# Активная таблица: встроенная или скомпилированная под правила (set_rules)
+ACTION_TABLE: bytes = BUILTIN_ACTION_TABLE
+_RULES = None
+_ACTION_ARRAY = None  # ACTION_TABLE как массив numpy, см. _numpy
+
+
+def set_rules(rules) -> None:
+    """Сделать активной стратегию под правила стола.
+
+    Args:
+        rules: rules.Rules — таблица берётся из strategy_compiler (кэш
+            на диске, при первом обращении — расчёт), None — встроенные
+            таблицы.
+    """
+    global ACTION_TABLE, _ACTION_ARRAY, _RULES
+    if rules is None:
+        table = BUILTIN_ACTION_TABLE
+    else:
+        from strategy_compiler import load_table
+        table = load_table(rules)
+    ACTION_TABLE = table
+    _ACTION_ARRAY = None
+    _RULES = rules
+    _compile_deviations()
+
+
+def get_rules():
+    """Правила активной стратегии (rules.Rules) или None — встроенные таблицы."""
+    return _RULES
+
+
+def _numpy():
+    """Загрузить numpy для пакетного API (один раз) и массив активной таблицы."""
+    global np, _ACTION_ARRAY
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("для пакетного API нужен numpy") from None
+        np = numpy
+    if _ACTION_ARRAY is None:
+        _ACTION_ARRAY = np.frombuffer(ACTION_TABLE, dtype=np.uint8)
+    return np
+
+
 # Названия действий на русском
 ACTION_NAMES = {
     "H": "ЕЩЁ",
     "S": "ХВАТИТ",
     "D": "ДАБЛ",
     "P": "СПЛИТ",
+    "R": "СДАТЬСЯ",
 }
 
 # Объяснения на русском
@@ -106,33 +239,98 @@ _EXPLANATIONS = {
     "S": "Рука достаточно сильная, стоим",
     "D": "Выгодная позиция — удваиваем ставку",
     "P": "Пару лучше разделить",
+    "R": "Выгоднее сдаться и сохранить половину ставки",
+}
+
+
+# =====================================================================
+# Коды рангов
+# Карта кодируется малым целым, равным её значению в блэкджеке:
+# 2..9, 10 (десятки и картинки), 11 (туз); 0 — нераспознанная карта.
+# =====================================================================
+
+RANK_UNKNOWN = 0
+RANK_CODES = tuple(range(2, 12))
+
+# Подпись кода для отображения
+RANK_LABELS = ("?", "?", "2", "3", "4", "5", "6", "7", "8", "9", "10", "A")
+
+# Написания рангов; первое совпадает с RANK_LABELS. Порядок — часть формата
+# байта карты (game_state.card_byte хранит номер написания), новые — в конец
+RANK_SPELLINGS: dict[int, tuple[str, ...]] = {
+    **{v: (str(v),) for v in range(2, 10)},
+    10: ("10", "J", "Q", "K", "В", "Д", "К", "T"),
+    11: ("A", "Т", "1", "11", "ACE"),  # туз (кириллическая Т)
+}
+_SUITS = ("", "♠", "♣", "♥", "♦")
+
+# Все написания → код, включая нижний регистр и масти из webapp ('A♠', '10♥')
+_RANK_CODES: dict[str, int] = {
+    spelling + suit: code
+    for code, spellings in RANK_SPELLINGS.items()
+    for rank in spellings
+    for spelling in (rank, rank.lower())
+    for suit in _SUITS
 }
 
+# Таблица для str.translate: убирает масти и пробелы
+_STRIP_TABLE = str.maketrans("", "", "".join(_SUITS) + " \t\n")
+
 
 def card_value(rank: str) -> int:
-    """Преобразовать ранг карты в числовое значение.
+    """Преобразовать ранг карты в числовое значение (код ранга).
 
     '2'-'9' → 2-9, '10','В','Д','К' → 10, 'Т' → 11 (туз).
+    Масти ('♠♣♥♦') и регистр не важны; нераспознанная карта → 0.
     """
-    rank = rank.upper().strip()
-    if rank in ("10", "В", "Д", "К", "J", "Q", "K", "T"):
-        return 10
-    if rank in ("Т", "A", "1", "ACE"):
-        return 11  # туз (кириллическая Т)
-    if rank.isdigit():
-        return int(rank)
-    return 0
+    code = _RANK_CODES.get(rank)
+    if code is None:
+        code = _RANK_CODES.get(normalize_rank(rank), RANK_UNKNOWN)
+    return code
 
 
-def hand_value(cards: list[str]) -> tuple[int, bool]:
-    """Вычислить сумму руки.
+def normalize_rank(rank: str) -> str:
+    """Написание ранга без масти и пробелов, в верхнем регистре ('в♠' → 'В')."""
+    return rank.translate(_STRIP_TABLE).upper()
 
-    Returns:
-        (total, is_soft) — сумма очков и мягкая ли рука.
+
+def parse_cards(cards: list[str]) -> list[int]:
+    """Карты → список кодов рангов."""
+    codes = _RANK_CODES
+    return [codes.get(c) or card_value(c) for c in cards]
+
+
+# Однобуквенные написания → символ с кодом ранга; масти и разделители убираются
+_RANK_CHAR_TABLE: dict[int, int | None] = {
+    ord(spelling): code for spelling, code in _RANK_CODES.items() if len(spelling) == 1
+}
+_RANK_CHAR_TABLE.update((ord(c), None) for c in "".join(_SUITS) + " \t\r\n,;")
+
+
+def parse_rank_string(text: str) -> bytes:
+    """Строка рангов подряд ('T9A5', '10 К Т 7') → байты кодов рангов.
+
+    Каждая буква — карта, '10' — десятка; пробелы, запятые и масти
+    пропускаются. Один проход str.translate, без разбора по картам.
+
+    Raises:
+        ValueError: в строке есть символ, не являющийся рангом.
     """
-    values = [card_value(c) for c in cards]
-    total = sum(values)
-    aces = values.count(11)
+    translated = text.replace("10", "T").translate(_RANK_CHAR_TABLE)
+    try:
+        codes = translated.encode("latin-1")
+    except UnicodeEncodeError:
+        codes = b"\xff"
+    if codes and max(codes) > 11:
+        bad = next(c for c in translated if ord(c) > 11)
+        raise ValueError(f"не ранг карты: {bad!r}")
+    return codes
+
+
+def hand_value_codes(codes: list[int]) -> tuple[int, bool]:
+    """Сумма руки по кодам рангов. См. hand_value."""
+    total = sum(codes)
+    aces = codes.count(11)
 
     # Понижаем тузы с 11 до 1 если перебор
     while total > 21 and aces > 0:
@@ -143,6 +341,15 @@ def hand_value(cards: list[str]) -> tuple[int, bool]:
     return total, is_soft
 
 
+def hand_value(cards: list[str]) -> tuple[int, bool]:
+    """Вычислить сумму руки.
+
+    Returns:
+        (total, is_soft) — сумма очков и мягкая ли рука.
+    """
+    return hand_value_codes(parse_cards(cards))
+
+
 def is_pair(cards: list[str]) -> bool:
     """Проверить, является ли рука парой (ровно 2 карты одного номинала)."""
     if len(cards) != 2:
@@ -150,11 +357,382 @@ def is_pair(cards: list[str]) -> bool:
     return card_value(cards[0]) == card_value(cards[1])
 
 
+def action_index(kind: int, total: int, dealer_val: int, flags: int) -> int:
+    """Индекс ячейки в ACTION_TABLE.
+
+    Args:
+        kind: KIND_HARD / KIND_SOFT / KIND_PAIR
+        total: сумма руки (для пары — значение карты), >21 → перебор
+        dealer_val: значение открытой карты дилера (2..11)
+        flags: комбинация FLAG_DOUBLE | FLAG_SPLIT
+    """
+    if total > BUST_SLOT:
+        total = BUST_SLOT
+    return ((kind * _TOTALS + total) * _DEALERS + dealer_val) * _FLAGS + flags
+
+
+def lookup_action(kind: int, total: int, dealer_val: int, flags: int,
+                  table: bytes | None = None) -> int:
+    """Код действия (ACT_H/ACT_S/ACT_D/ACT_P) по малым целым — без разбора строк.
+
+    table — таблица действий вместо активной (напр. strategy_compiler.load_table).
+    """
+    if total > BUST_SLOT:
+        total = BUST_SLOT
+    if table is None:
+        table = ACTION_TABLE
+    return table[((kind * _TOTALS + total) * _DEALERS + dealer_val) * _FLAGS + flags]
+
+
+def get_action(
+    player_cards: list[str],
+    dealer_upcard: str,
+    can_double: bool = True,
+    can_split: bool = True,
+    table: bytes | None = None,
+) -> str:
+    """Быстрый вариант get_recommendation: только буква действия.
+
+    Даёт то же действие, что и get_recommendation, но через
+    скомпилированную таблицу и без построения словаря результата.
+    table — таблица действий вместо активной.
+    """
+    if table is None:
+        table = ACTION_TABLE
+    codes = _RANK_CODES
+    d = codes.get(dealer_upcard)
+    if d is None:
+        d = card_value(dealer_upcard)
+    flags = FLAG_DOUBLE if can_double else 0
+
+    if len(player_cards) == 2:
+        # Частый случай — две карты: пара, блэкджек или обычная сумма
+        c0, c1 = player_cards
+        v0 = codes.get(c0)
+        if v0 is None:
+            v0 = card_value(c0)
+        v1 = codes.get(c1)
+        if v1 is None:
+            v1 = card_value(c1)
+        if v0 == v1:
+            if can_split:
+                flags |= FLAG_SPLIT
+            return ACTION_CODES[table[
+                ((KIND_PAIR * _TOTALS + v0) * _DEALERS + d) * _FLAGS + flags]]
+        aces = (v0 == 11) + (v1 == 11)
+        hard = v0 + v1 - 10 * aces
+    else:
+        hard = 0
+        aces = 0
+        for c in player_cards:
+            v = codes.get(c)
+            if v is None:
+                v = card_value(c)
+            if v == 11:
+                aces += 1
+                hard += 1
+            else:
+                hard += v
+
+    if aces and hard <= 11:
+        kind = KIND_SOFT
+        total = hard + 10
+    else:
+        kind = KIND_HARD
+        total = hard if hard < BUST_SLOT else BUST_SLOT
+    if total == 21 and len(player_cards) == 2:
+        return "S"  # блэкджек
+    return ACTION_CODES[table[((kind * _TOTALS + total) * _DEALERS + d) * _FLAGS + flags]]
+
+
+# =====================================================================
+# Отклонения по истинному счёту (индексная игра)
+# =====================================================================
+
+class Deviation:
+    """Отклонение от базовой стратегии по истинному счёту.
+
+    Рука против открытой карты дилера играется действием `action`, когда
+    истинный счёт не ниже индекса (above=True) или ниже него (above=False).
+    Отклонение заменяет только ЕЩЁ или ХВАТИТ базовой таблицы: дабл,
+    сплит и сдачу базовой стратегии оно не трогает. Дабл и сдача — только
+    на двух картах, сплит — только когда он доступен. Отклонения по
+    жёсткой сумме действуют и на пару, если её не сплитуют (8-8 → 16).
+
+    Attributes:
+        kind: KIND_HARD / KIND_SOFT / KIND_PAIR.
+        total: сумма руки (для пары — значение карты).
+        dealer: открытая карта дилера (2..11).
+        action: "H" / "S" / "D" / "P" / "R".
+        index: индекс — порог истинного счёта.
+        above: True — при TC ≥ index, False — при TC < index.
+    """
+
+    __slots__ = ("kind", "total", "dealer", "action", "index", "above")
+
+    def __init__(self, kind: int, total: int, dealer: int, action: str,
+                 index: float, above: bool = True) -> None:
+        if action not in ACTION_CODES:
+            raise ValueError(f"неизвестное действие: {action!r}")
+        self.kind = kind
+        self.total = total
+        self.dealer = dealer
+        self.action = action
+        self.index = index
+        self.above = above
+
+    def __repr__(self) -> str:
+        return (f"Deviation({self.kind}, {self.total}, {self.dealer}, {self.action!r}, "
+                f"{self.index!r}, above={self.above})")
+
+    def explanation(self) -> str:
+        """Объяснение для UI, напр. 'TC≥0: стоим с 16 против 10'."""
+        sign = "≥" if self.above else "<"
+        dealer = "A" if self.dealer == 11 else str(self.dealer)
+        if self.kind == KIND_PAIR:
+            hand = f"{RANK_LABELS[self.total]}-{RANK_LABELS[self.total]}"
+        elif self.kind == KIND_SOFT:
+            hand = f"soft {self.total}"
+        else:
+            hand = str(self.total)
+        verb = {"H": "берём с", "S": "стоим с", "D": "удваиваем",
+                "P": "разделяй", "R": "сдаёмся с"}[self.action]
+        return f"TC{sign}{self.index:g}: {verb} {hand} против {dealer}"
+
+
+# Illustrious 18 (Hi-Lo, многоколодный шу) без страховки — она не решение по руке
+ILLUSTRIOUS_18 = (
+    Deviation(KIND_HARD, 16, 10, "S", 0),
+    Deviation(KIND_HARD, 15, 10, "S", 4),
+    Deviation(KIND_PAIR, 10, 5, "P", 5),
+    Deviation(KIND_PAIR, 10, 6, "P", 4),
+    Deviation(KIND_HARD, 10, 10, "D", 4),
+    Deviation(KIND_HARD, 12, 3, "S", 2),
+    Deviation(KIND_HARD, 12, 2, "S", 3),
+    Deviation(KIND_HARD, 11, 11, "D", 1),
+    Deviation(KIND_HARD, 9, 2, "D", 1),
+    Deviation(KIND_HARD, 10, 11, "D", 4),
+    Deviation(KIND_HARD, 9, 7, "D", 3),
+    Deviation(KIND_HARD, 16, 9, "S", 5),
+    Deviation(KIND_HARD, 13, 2, "H", -1, above=False),
+    Deviation(KIND_HARD, 12, 4, "H", 0, above=False),
+    Deviation(KIND_HARD, 12, 5, "H", -2, above=False),
+    Deviation(KIND_HARD, 12, 6, "H", -1, above=False),
+    Deviation(KIND_HARD, 13, 3, "H", -2, above=False),
+)
+
+# Fab 4 — сдача по счёту; только для столов с поздней сдачей
+FAB_4 = (
+    Deviation(KIND_HARD, 14, 10, "R", 3),
+    Deviation(KIND_HARD, 15, 10, "R", 0),
+    Deviation(KIND_HARD, 15, 9, "R", 2),
+    Deviation(KIND_HARD, 15, 11, "R", 1),
+)
+
+_INF = float("inf")
+_N_CELLS = len(BUILTIN_ACTION_TABLE)
+
+_DEVIATIONS: tuple[Deviation, ...] = ILLUSTRIOUS_18
+# Пороги по ячейкам ACTION_TABLE: действие при TC ≥ _dev_above[i] / TC < _dev_below[i]
+_dev_above = array("d", [_INF]) * _N_CELLS
+_dev_below = array("d", [-_INF]) * _N_CELLS
+_dev_above_act = bytearray(_N_CELLS)
+_dev_below_act = bytearray(_N_CELLS)
+_dev_entries: dict[tuple[int, bool], Deviation] = {}   # (ячейка, above) → отклонение
+_DEV_ARRAYS = None  # те же массивы в numpy, см. _deviation_arrays
+# Те же пороги для таблиц, переданных параметром table: таблица → массивы
+_dev_by_table: dict[bytes, tuple] = {}
+
+
+def _deviation_cells(dev: Deviation):
+    """Ячейки ACTION_TABLE, к которым относится отклонение."""
+    cells = [(dev.kind, dev.total)]
+    if dev.kind == KIND_HARD and dev.total % 2 == 0 and 4 <= dev.total <= 20:
+        cells.append((KIND_PAIR, dev.total // 2))
+    for kind, total in cells:
+        for flags in range(_FLAGS):
+            if dev.action in ("D", "R") and not flags & FLAG_DOUBLE:
+                continue
+            if dev.action == "P" and not flags & FLAG_SPLIT:
+                continue
+            yield action_index(kind, total, dev.dealer, flags)
+
+
+def _fill_deviations(table: bytes, above, above_act, below, below_act, entries) -> None:
+    """Заполнить массивы порогов по набору отклонений и таблице `table`."""
+    for i in range(_N_CELLS):
+        above[i] = _INF
+        below[i] = -_INF
+    entries.clear()
+    for dev in _DEVIATIONS:
+        code = ACTION_CODES.index(dev.action)
+        for i in _deviation_cells(dev):
+            base = table[i]
+            if base not in (ACT_H, ACT_S) or base == code:
+                continue
+            if dev.above:
+                above[i] = dev.index
+                above_act[i] = code
+            else:
+                below[i] = dev.index
+                below_act[i] = code
+            entries[i, dev.above] = dev
+
+
+def _compile_deviations() -> None:
+    """Пересобрать массивы порогов по набору отклонений и активной таблице."""
+    global _DEV_ARRAYS
+    _fill_deviations(ACTION_TABLE, _dev_above, _dev_above_act, _dev_below, _dev_below_act, _dev_entries)
+    _dev_by_table.clear()
+    _DEV_ARRAYS = None
+
+
+def _deviations_for(table: bytes) -> tuple:
+    """Пороги отклонений (above, above_act, below, below_act, entries) для таблицы."""
+    if table is ACTION_TABLE:
+        return _dev_above, _dev_above_act, _dev_below, _dev_below_act, _dev_entries
+    arrays = _dev_by_table.get(table)
+    if arrays is None:
+        arrays = (array("d", [_INF]) * _N_CELLS, bytearray(_N_CELLS),
+                  array("d", [-_INF]) * _N_CELLS, bytearray(_N_CELLS), {})
+        _fill_deviations(table, *arrays)
+        _dev_by_table[table] = arrays
+    return arrays
+
+
+def set_deviations(deviations) -> None:
+    """Задать набор отклонений по счёту.
+
+    Args:
+        deviations: последовательность Deviation (напр. ILLUSTRIOUS_18 + FAB_4);
+            None или пустая — без отклонений.
+    """
+    global _DEVIATIONS
+    _DEVIATIONS = tuple(deviations or ())
+    _compile_deviations()
+
+
+def get_deviations() -> tuple[Deviation, ...]:
+    """Активный набор отклонений."""
+    return _DEVIATIONS
+
+
+def deviation_action(idx: int, true_count: float) -> int:
+    """Код действия для ячейки ACTION_TABLE с учётом отклонений по счёту."""
+    if true_count >= _dev_above[idx]:
+        return _dev_above_act[idx]
+    if true_count < _dev_below[idx]:
+        return _dev_below_act[idx]
+    return ACTION_TABLE[idx]
+
+
+def _deviation_arrays():
+    """Массивы порогов и действий отклонений в numpy (для пакетного API)."""
+    global _DEV_ARRAYS
+    if _DEV_ARRAYS is None:
+        np = _numpy()
+        _DEV_ARRAYS = (
+            np.frombuffer(_dev_above, dtype=np.float64),
+            np.frombuffer(_dev_above_act, dtype=np.uint8),
+            np.frombuffer(_dev_below, dtype=np.float64),
+            np.frombuffer(_dev_below_act, dtype=np.uint8),
+        )
+    return _DEV_ARRAYS
+
+
+_compile_deviations()
+
+
+def encode_hands(hands: list[list[str]], max_cards: int | None = None):
+    """Закодировать руки в матрицу значений карт для get_recommendations_batch.
+
+    Каждая строка — значения карт (2..11), прижатые влево и дополненные нулями.
+
+    Raises:
+        ValueError: нераспознанная карта или рука длиннее max_cards.
+    """
+    np = _numpy()
+    width = max_cards if max_cards is not None else max((len(h) for h in hands), default=0)
+    out = np.zeros((len(hands), width), dtype=np.uint8)
+    for i, hand in enumerate(hands):
+        if len(hand) > width:
+            raise ValueError(f"рука {hand!r} длиннее {width} карт")
+        for j, c in enumerate(hand):
+            v = card_value(c)
+            if v == RANK_UNKNOWN:
+                raise ValueError(f"неизвестная карта: {c!r}")
+            out[i, j] = v
+    return out
+
+
+def encode_cards(cards: list[str]):
+    """Закодировать список одиночных карт (напр. открытые карты дилера)."""
+    return encode_hands([[c] for c in cards], max_cards=1)[:, 0]
+
+
+def get_recommendations_batch(player_hands, dealer_upcards, can_double=True, can_split=True,
+                              true_counts=None):
+    """Пакетная рекомендация по базовой стратегии — один векторный проход.
+
+    Args:
+        player_hands: матрица (n, k) значений карт игрока (см. encode_hands),
+            0 — пустая ячейка, карты прижаты влево
+        dealer_upcards: вектор (n,) значений открытой карты дилера (2..11)
+        can_double: bool или вектор (n,) — доступен ли дабл
+        can_split: bool или вектор (n,) — доступен ли сплит
+        true_counts: число или вектор (n,) истинного счёта — с ним
+            применяются отклонения (set_deviations); None — без них
+
+    Returns:
+        Вектор (n,) кодов действий uint8 — индексы в ACTION_CODES.
+        Совпадает с get_recommendation(...)["action"] для каждой руки.
+    """
+    np = _numpy()
+    hands = np.asarray(player_hands, dtype=np.int16)
+    if hands.ndim != 2:
+        raise ValueError("player_hands должна быть матрицей (n, k)")
+    dealer = np.asarray(dealer_upcards, dtype=np.intp)
+
+    n_cards = np.count_nonzero(hands, axis=1)
+    total = hands.sum(axis=1)
+    aces = np.count_nonzero(hands == 11, axis=1)
+
+    # Понижение тузов с 11 до 1, как в hand_value: столько, сколько нужно
+    demote = np.minimum(np.maximum((total - 12) // 10, 0), aces)
+    total -= 10 * demote
+    is_soft = aces > demote
+
+    if hands.shape[1] >= 2:
+        pair = (n_cards == 2) & (hands[:, 0] == hands[:, 1])
+        first = hands[:, 0]
+    else:
+        pair = np.zeros(len(hands), dtype=bool)
+        first = np.zeros(len(hands), dtype=np.int16)
+
+    kind = np.where(pair, KIND_PAIR, np.where(is_soft, KIND_SOFT, KIND_HARD))
+    slot = np.where(pair, first, np.minimum(total, BUST_SLOT))
+    flags = (np.asarray(can_double, dtype=np.intp) * FLAG_DOUBLE
+             + (np.asarray(can_split, dtype=bool) & pair) * FLAG_SPLIT)
+
+    idx = ((kind * _TOTALS + slot) * _DEALERS + dealer) * _FLAGS + flags
+    actions = _ACTION_ARRAY[idx]
+    if true_counts is not None:
+        above, above_act, below, below_act = _deviation_arrays()
+        tc = np.asarray(true_counts, dtype=np.float64)
+        actions = np.where(tc >= above[idx], above_act[idx],
+                           np.where(tc < below[idx], below_act[idx], actions))
+    # Блэкджек (21 с двух карт) — всегда ХВАТИТ
+    actions[(n_cards == 2) & (total == 21)] = ACT_S
+    return actions
+
+
 def get_recommendation(
     player_cards: list[str],
     dealer_upcard: str,
     can_double: bool = True,
     can_split: bool = True,
+    true_count: float | None = None,
+    table: bytes | None = None,
 ) -> dict:
     """Получить рекомендацию по базовой стратегии.
 
@@ -163,24 +741,45 @@ def get_recommendation(
         dealer_upcard: ранг открытой карты дилера, напр. "10"
         can_double: доступен ли дабл (обычно только на первых 2 картах)
         can_split: доступен ли сплит
+        true_count: истинный счёт — с ним применяются отклонения по
+            счёту (set_deviations); None — чистая базовая стратегия
+        table: таблица действий вместо активной (напр. под правила
+            стола, strategy_compiler.load_table)
 
     Returns:
         dict с ключами:
-        - action: "H"/"S"/"D"/"P"
-        - action_ru: "ЕЩЁ"/"ХВАТИТ"/"ДАБЛ"/"СПЛИТ"
+        - action: "H"/"S"/"D"/"P"/"R"
+        - action_ru: "ЕЩЁ"/"ХВАТИТ"/"ДАБЛ"/"СПЛИТ"/"СДАТЬСЯ"
         - explanation: объяснение на русском
         - hand_total: сумма руки
         - is_soft: мягкая ли рука
         - is_pair_hand: пара ли
+        - deviation: сыграно ли отклонение по счёту
     """
-    dealer_val = card_value(dealer_upcard)
-    total, is_soft = hand_value(player_cards)
-    pair = is_pair(player_cards)
+    return recommend_codes(parse_cards(player_cards), card_value(dealer_upcard),
+                           can_double, can_split, true_count, table)
+
+
+def recommend_codes(
+    codes: list[int],
+    dealer_val: int,
+    can_double: bool = True,
+    can_split: bool = True,
+    true_count: float | None = None,
+    table: bytes | None = None,
+) -> dict:
+    """get_recommendation по кодам рангов (strategy.card_value) — без разбора строк.
+
+    Для вызывающих, у которых карты уже в кодах (Hand.codes, импорт
+    истории, симуляция); результат тот же, что у get_recommendation.
+    """
+    total, is_soft = hand_value_codes(codes)
+    pair = len(codes) == 2 and codes[0] == codes[1]
 
     action = "S"  # по умолчанию ХВАТИТ
 
     # 1. Блэкджек (21 с двух карт)
-    if total == 21 and len(player_cards) == 2:
+    if total == 21 and len(codes) == 2:
         action = "S"
         explanation = "Блэкджек! Поздравляю!"
         return {
@@ -190,6 +789,7 @@ def get_recommendation(
             "hand_total": total,
             "is_soft": is_soft,
             "is_pair_hand": pair,
+            "deviation": False,
         }
 
     # 2. Перебор
@@ -203,42 +803,43 @@ def get_recommendation(
             "hand_total": total,
             "is_soft": False,
             "is_pair_hand": False,
+            "deviation": False,
         }
 
-    # 3. Пара — проверяем таблицу сплитов
-    if pair and can_split and len(player_cards) == 2:
-        pair_val = card_value(player_cards[0])
-        pair_action = PAIR_TABLE.get(pair_val, {}).get(dealer_val)
-        if pair_action == "P":
-            action = "P"
-            explanation = _pair_explanation(pair_val, dealer_val)
-            return {
-                "action": action,
-                "action_ru": ACTION_NAMES[action],
-                "explanation": explanation,
-                "hand_total": total,
-                "is_soft": is_soft,
-                "is_pair_hand": True,
-            }
-        # Если таблица пар не говорит сплитить — переходим к hard/soft
-
-    # 4. Мягкая рука (есть туз = 11)
-    if is_soft and total in SOFT_TABLE:
-        action = SOFT_TABLE[total].get(dealer_val, "H")
-    # 5. Жёсткая рука
-    elif total in HARD_TABLE:
-        action = HARD_TABLE[total].get(dealer_val, "H")
-    elif total >= 17:
-        action = "S"
+    # 3. Решение по таблице (активной — встроенной или под правила, set_rules —
+    # или переданной в table):
+    # пара — по таблице сплитов, иначе по мягкой или жёсткой сумме;
+    # без дабла (>2 карт) ячейка таблицы уже даёт замену D
+    flags = FLAG_DOUBLE if can_double else 0
+    if pair and len(codes) == 2:
+        kind, slot = KIND_PAIR, codes[0]
+        if can_split:
+            flags |= FLAG_SPLIT
     else:
-        action = "H"
-
-    # Если дабл недоступен (>2 карт), заменяем D на H
-    if action == "D" and not can_double:
-        action = "H"
-
-    # Генерируем объяснение
-    explanation = _build_explanation(total, is_soft, dealer_val, action)
+        kind, slot = (KIND_SOFT if is_soft else KIND_HARD), total
+    idx = ((kind * _TOTALS + slot) * _DEALERS + dealer_val) * _FLAGS + flags
+    if table is None:
+        table = ACTION_TABLE
+    code = table[idx]
+
+    # 4. Отклонение по счёту: порог ячейки и одно сравнение
+    deviation = None
+    if true_count is not None:
+        above, above_act, below, below_act, entries = _deviations_for(table)
+        if true_count >= above[idx]:
+            code = above_act[idx]
+            deviation = entries[idx, True]
+        elif true_count < below[idx]:
+            code = below_act[idx]
+            deviation = entries[idx, False]
+    action = ACTION_CODES[code]
+
+    if deviation is not None:
+        explanation = deviation.explanation()
+    elif action == "P":
+        explanation = _pair_explanation(codes[0], dealer_val)
+    else:
+        explanation = _build_explanation(total, is_soft, dealer_val, action)
 
     return {
         "action": action,
@@ -246,10 +847,12 @@ def get_recommendation(
         "explanation": explanation,
         "hand_total": total,
         "is_soft": is_soft,
-        "is_pair_hand": pair and len(player_cards) == 2,
+        "is_pair_hand": pair and len(codes) == 2,
+        "deviation": deviation is not None,
     }
 
 
+@lru_cache(maxsize=None)
 def _pair_explanation(pair_val: int, dealer_val: int) -> str:
     """Объяснение для сплита."""
     names = {11: "тузы", 8: "восьмёрки", 9: "девятки", 7: "семёрки",
@@ -262,6 +865,7 @@ def _pair_explanation(pair_val: int, dealer_val: int) -> str:
     return f"Разделяй {name} против дилера {dealer_val}"
 
 
+@lru_cache(maxsize=None)
 def _build_explanation(total: int, is_soft: bool, dealer_val: int, action: str) -> str:
     """Построить объяснение решения."""
     hand_type = "Soft" if is_soft else "Hard"
@@ -278,4 +882,6 @@ def _build_explanation(total: int, is_soft: bool, dealer_val: int, action: str)
         return f"{hand_type} {total} vs {dealer_str} — рука слабая, берём"
     if action == "D":
         return f"{hand_type} {total} vs {dealer_str} — выгодная позиция, удваиваем!"
+    if action == "R":
+        return f"{hand_type} {total} vs {dealer_str} — сдаёмся, теряем только половину ставки"
     return f"{hand_type} {total} vs {dealer_str} → {action_word}"
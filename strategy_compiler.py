@@ -0,0 +1,165 @@
+"""Компилятор базовой стратегии под правила стола с кэшем на диске.
+
+Таблица действий (формат strategy.ACTION_TABLE) выводится точным расчётом
+EV для полного шу (strategy_solver.solve_evs): для каждой открытой карты
+дилера перебираются все начальные руки из двух карт, EV действий
+усредняются по вероятностям рук с одинаковой суммой (стратегия по сумме,
+как в обычных таблицах), пары решаются каждая отдельно. Ячейки без флага дабла — третья
+и следующие карты — выбирают только между ЕЩЁ и ХВАТИТ.
+
+Скомпилированная таблица пишется в кэш (CACHE_DIR) файлом с ключом
+Rules.key() и версией формата; повторная загрузка — чтение 3 КБ.
+request_table не ждёт ни расчёта, ни диска: недостающую таблицу читает
+или считает фоновый поток, а вызывающий (цикл asyncio, окно Qt,
+воспроизведение журнала) пока обходится прежней.
+При изменении расчёта нужно поднять CACHE_VERSION — старые файлы
+перестанут подходить.
+"""
+
+import os
+import tempfile
+import threading
+
+from rules import Rules
+from strategy import ACTION_CODES, BUILTIN_ACTION_TABLE, FLAG_DOUBLE, FLAG_SPLIT, KIND_PAIR, action_index
+
+CACHE_VERSION = 1
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".blackjack_assistant", "strategy_cache")
+
+_MAGIC = b"BJSTRAT"
+_HEADER = _MAGIC + bytes((CACHE_VERSION,))
+_TABLE_SIZE = len(BUILTIN_ACTION_TABLE)
+
+# Уже загруженные таблицы: ключ правил → таблица
+_loaded: dict[str, bytes] = {}
+# Ключи правил, таблицы для которых считаются в фоне (request_table),
+# и те, расчёт которых не удался (повторно не запускается до clear_loaded)
+_pending: set[str] = set()
+_failed: set[str] = set()
+_pending_lock = threading.Lock()
+
+
+def compile_table(rules: Rules, workers: int | None = 1, start_method: str | None = None) -> bytes:
+    """Вывести таблицу действий для правил (без кэша; секунды).
+
+    Args:
+        workers: процессов для strategy_solver.solve_evs (1 — в текущем процессе).
+        start_method: способ запуска процессов пула (см. solve_evs).
+    """
+    from strategy_solver import best_allowed, solve_evs
+
+    # Ячейки, которые расчёт не покрывает (неизвестная карта дилера,
+    # недостижимые суммы, перебор), остаются как во встроенной таблице
+    table = bytearray(BUILTIN_ACTION_TABLE)
+
+    two_cards = "SHDR"   # первые две карты: дабл и сдача доступны
+    more_cards = "SH"    # третья карта и дальше
+    for up, (by_total, pairs) in solve_evs(rules, workers=workers, start_method=start_method).items():
+        for (kind, total), evs in by_total.items():
+            for flags in range(4):
+                allowed = two_cards if flags & FLAG_DOUBLE else more_cards
+                table[action_index(kind, total, up, flags)] = ACTION_CODES.index(best_allowed(evs, allowed))
+        for value, evs in pairs.items():
+            for flags in range(4):
+                allowed = two_cards if flags & FLAG_DOUBLE else more_cards
+                if flags & FLAG_SPLIT:
+                    allowed = "P" + allowed
+                table[action_index(KIND_PAIR, value, up, flags)] = ACTION_CODES.index(best_allowed(evs, allowed))
+    return bytes(table)
+
+
+def _cache_path(rules: Rules, cache_dir: str) -> str:
+    return os.path.join(cache_dir, f"{rules.key()}.v{CACHE_VERSION}.bin")
+
+
+def _read_cache(path: str) -> bytes | None:
+    """Таблица из файла кэша или None (нет файла, другая версия, обрезан)."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) != len(_HEADER) + _TABLE_SIZE or not data.startswith(_HEADER):
+        return None
+    return data[len(_HEADER):]
+
+
+def _write_cache(path: str, table: bytes) -> None:
+    """Записать таблицу атомарно: временный файл и os.replace."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER + table)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_table(rules: Rules, cache_dir: str | None = None, workers: int | None = 1,
+               start_method: str | None = None) -> bytes:
+    """Таблица действий для правил: из памяти, из кэша на диске или расчётом.
+
+    Свежескомпилированная таблица сохраняется в кэш; ошибка записи
+    (нет прав, диск только для чтения) не мешает вернуть таблицу.
+
+    Args:
+        workers, start_method: пул процессов для расчёта (см. compile_table).
+    """
+    key = rules.key()
+    table = _loaded.get(key)
+    if table is not None:
+        return table
+    path = _cache_path(rules, cache_dir or CACHE_DIR)
+    table = _read_cache(path)
+    if table is None:
+        table = compile_table(rules, workers, start_method)
+        try:
+            _write_cache(path, table)
+        except OSError:
+            pass
+    _loaded[key] = table
+    return table
+
+
+def request_table(rules: Rules, cache_dir: str | None = None) -> bytes | None:
+    """Таблица для правил, если она уже загружена, иначе None.
+
+    Незагруженную таблицу фоновый поток читает из кэша на диске или
+    считает (пул процессов запускается через spawn: fork из потока в
+    процессе с Qt или asyncio может зависнуть); она появится в одном из
+    следующих вызовов. Вызов не обращается к диску и не ждёт расчёта;
+    после неудачного расчёта правила не пересчитываются до clear_loaded.
+    """
+    key = rules.key()
+    table = _loaded.get(key)
+    if table is not None or key in _pending or key in _failed:
+        return table
+    with _pending_lock:
+        if key not in _pending and key not in _failed:
+            _pending.add(key)
+            threading.Thread(target=_compile_pending, args=(rules, cache_dir, key),
+                             name=f"strategy-{key}", daemon=True).start()
+    return None
+
+
+def _compile_pending(rules: Rules, cache_dir: str | None, key: str) -> None:
+    """Тело фонового потока request_table."""
+    try:
+        load_table(rules, cache_dir, workers=None, start_method="spawn")
+    except Exception:
+        with _pending_lock:
+            _failed.add(key)
+        raise
+    finally:
+        with _pending_lock:
+            _pending.discard(key)
+
+
+def clear_loaded() -> None:
+    """Забыть загруженные таблицы (следующий load_table читает с диска)
+    и неудачные расчёты request_table."""
+    _loaded.clear()
+    _failed.clear()
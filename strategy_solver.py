@@ -0,0 +1,511 @@
+"""Точный решатель базовой стратегии: таблицы в форме strategy.py.
+
+Для каждой открытой карты дилера и каждой начальной руки считается EV
+действий — точно, для полного шу из `decks` колод (ev_calculator,
+стратегия по сумме с весами составов, как в strategy_compiler) или для
+бесконечной колоды, где вероятности карт не зависят от вышедших и EV
+зависит только от суммы. Лучшие действия сводятся в словари той же
+формы, что HARD_TABLE, SOFT_TABLE и PAIR_TABLE: {сумма: {карта дилера:
+действие}}, ячейки — решение на первых двух картах (дабл разрешён).
+
+Работа делится на задачи по открытым картам (суммы без пар) и по парам
+(открытая карта × ранг пары) и раздаётся пулу процессов; результат не
+зависит от числа процессов.
+
+Решатель сверяет и перегенерирует ручные таблицы strategy.py и их копию
+в webapp/index.html (HARD, SOFT, PAIRS и DECK_OVERRIDES для 1-2 колод).
+
+Запуск:
+    python strategy_solver.py --decks 8                  # таблицы и расхождения
+    python strategy_solver.py --decks 6 --check          # код 1, если таблицы расходятся
+    python strategy_solver.py --infinite --emit py       # исходник таблиц для strategy.py
+    python strategy_solver.py --emit js                  # HARD/SOFT/PAIRS и DECK_OVERRIDES
+"""
+
+import os
+import re
+from functools import lru_cache
+
+from rules import Rules
+from strategy import HARD_TABLE, KIND_HARD, KIND_SOFT, PAIR_TABLE, RANK_LABELS, SOFT_TABLE
+
+# Копия таблиц во веб-версии
+WEBAPP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "webapp", "index.html")
+
+UPCARDS = tuple(range(2, 12))
+
+# Действия на первых двух картах в порядке выбора при равенстве EV
+_TWO_CARDS = "SHDR"
+
+# Вероятности значений 2..9, 10, туз в бесконечной колоде
+_P_INF = (4 / 52,) * 8 + (16 / 52, 4 / 52)
+_TEN, _ACE = 8, 9
+
+
+def best_allowed(evs: dict[str, float], allowed: str) -> str:
+    """Действие с наибольшим EV среди разрешённых (порядок — при равенстве)."""
+    return max((a for a in allowed if a in evs), key=evs.get)
+
+
+def _options(rules: Rules) -> dict:
+    return dict(h17=rules.h17, das=rules.das, surrender=rules.surrender,
+                peek=rules.peek, split_hands=rules.split_hands,
+                resplit_aces=rules.resplit_aces)
+
+
+# ---------------------------------------------------------------------
+# Полный шу: ev_calculator
+# ---------------------------------------------------------------------
+
+def _shoe_total_evs(rules: Rules, up: int) -> dict[tuple[int, int], dict[str, float]]:
+    """EV действий по суммам против открытой карты `up` для шу из rules.decks колод.
+
+    EV рук из двух карт (кроме пар и блэкджека) с одной суммой усредняются
+    по вероятностям рук — стратегия по сумме.
+
+    Returns:
+        {(вид, сумма): {действие: EV}}
+    """
+    # ev_calculator тянет numpy — нужен только при расчёте
+    from ev_calculator import action_evs, shoe_composition
+
+    comp = list(shoe_composition(rules.decks, [RANK_LABELS[up]]))
+    options = _options(rules)
+    sums: dict[tuple[int, int], dict[str, float]] = {}
+    for a in range(2, 12):
+        for b in range(a + 1, 12):
+            if a == 10 and b == 11:
+                continue  # блэкджек — решать нечего
+            ia, ib = a - 2, b - 2
+            weight = 2 * comp[ia] * comp[ib]
+            if weight <= 0:
+                continue
+            rest = comp[:]
+            rest[ia] -= 1
+            rest[ib] -= 1
+            evs = action_evs([RANK_LABELS[a], RANK_LABELS[b]], RANK_LABELS[up], tuple(rest),
+                             can_split=False, **options)
+            key = (KIND_SOFT, a + 11) if b == 11 else (KIND_HARD, a + b)
+            acc = sums.setdefault(key, {"w": 0.0})
+            acc["w"] += weight
+            for action, ev in evs.items():
+                acc[action] = acc.get(action, 0.0) + weight * ev
+    out = {}
+    for key, acc in sums.items():
+        weight = acc.pop("w")
+        out[key] = {a: ev / weight for a, ev in acc.items()}
+    return out
+
+
+def _shoe_pair_evs(rules: Rules, up: int, value: int) -> dict[str, float] | None:
+    """EV действий пары `value` против `up` для шу (None — пары не собрать)."""
+    from ev_calculator import action_evs, shoe_composition
+
+    comp = list(shoe_composition(rules.decks, [RANK_LABELS[up]]))
+    i = value - 2
+    if comp[i] < 2:
+        return None
+    comp[i] -= 2
+    label = RANK_LABELS[value]
+    return action_evs([label, label], RANK_LABELS[up], tuple(comp), **_options(rules))
+
+
+# ---------------------------------------------------------------------
+# Бесконечная колода
+# ---------------------------------------------------------------------
+
+def _total(hard: int, soft: bool) -> int:
+    return hard + 10 if soft and hard <= 11 else hard
+
+
+def _add(hard: int, soft: bool, i: int) -> tuple[int, bool]:
+    """Рука (жёсткая сумма, есть туз) после карты с индексом `i`."""
+    return hard + (1 if i == _ACE else i + 2), soft or i == _ACE
+
+
+@lru_cache(maxsize=None)
+def _dealer_from(hard: int, soft: bool, h17: bool) -> tuple[float, ...]:
+    """Итоги дилера (17..21, перебор) от руки (hard, soft) в бесконечной колоде."""
+    total = _total(hard, soft)
+    dist = [0.0] * 6
+    if total > 21:
+        dist[5] = 1.0
+    elif total >= 17 and not (h17 and total == 17 and soft and hard <= 11):
+        dist[total - 17] = 1.0
+    else:
+        for i, p in enumerate(_P_INF):
+            for k, q in enumerate(_dealer_from(*_add(hard, soft, i), h17)):
+                dist[k] += p * q
+    return tuple(dist)
+
+
+def _hole_index(up: int) -> int:
+    """Индекс карты, дающей дилеру блэкджек к открытой `up` (или -1)."""
+    return _ACE if up == 10 else _TEN if up == 11 else -1
+
+
+def _dealer_infinite(up: int, h17: bool) -> tuple[float, ...]:
+    """Итоги дилера при открытой `up`; при 10/Т — при условии «нет блэкджека»."""
+    hole = _hole_index(up)
+    norm = 1 - _P_INF[hole] if hole >= 0 else 1.0
+    start = (1, True) if up == 11 else (up, False)
+    dist = [0.0] * 6
+    for i, p in enumerate(_P_INF):
+        if i == hole:
+            continue
+        for k, q in enumerate(_dealer_from(*_add(*start, i), h17)):
+            dist[k] += p / norm * q
+    return tuple(dist)
+
+
+class _InfiniteDeck:
+    """EV действий игрока в бесконечной колоде против одной открытой карты."""
+
+    __slots__ = ("rules", "up", "dist", "_hit")
+
+    def __init__(self, rules: Rules, up: int) -> None:
+        self.rules = rules
+        self.up = up
+        self.dist = _dealer_infinite(up, rules.h17)
+        self._hit: dict[tuple[int, bool], float] = {}
+
+    def stand(self, total: int) -> float:
+        if total > 21:
+            return -1.0
+        dist = self.dist
+        ev = dist[5]
+        for k in range(5):
+            if total > 17 + k:
+                ev += dist[k]
+            elif total < 17 + k:
+                ev -= dist[k]
+        return ev
+
+    def best_after(self, hard: int, soft: bool) -> float:
+        """EV лучшего из ЕЩЁ/ХВАТИТ для руки (hard, soft)."""
+        total = _total(hard, soft)
+        if total > 21:
+            return -1.0
+        best = self.stand(total)
+        if total < 21:
+            best = max(best, self.hit(hard, soft))
+        return best
+
+    def hit(self, hard: int, soft: bool) -> float:
+        key = (hard, soft)
+        ev = self._hit.get(key)
+        if ev is None:
+            ev = sum(p * self.best_after(*_add(hard, soft, i)) for i, p in enumerate(_P_INF))
+            self._hit[key] = ev
+        return ev
+
+    def double(self, hard: int, soft: bool) -> float:
+        return 2 * sum(p * self.stand(_total(*_add(hard, soft, i))) for i, p in enumerate(_P_INF))
+
+    def split(self, value: int) -> float:
+        """EV сплита пары `value` с пересплитом по правилам (как ev_calculator)."""
+        from ev_calculator import _resplit_value
+
+        rules = self.rules
+        start = (1, True) if value == 11 else (value, False)
+        pair_index = _ACE if value == 11 else value - 2
+        other = paired = 0.0
+        for i, p in enumerate(_P_INF):
+            hard, soft = _add(*start, i)
+            total = _total(hard, soft)
+            best = self.stand(total)
+            if value != 11:  # тузы после сплита — одна карта
+                if total < 21:
+                    best = max(best, self.hit(hard, soft))
+                if rules.das:
+                    best = max(best, self.double(hard, soft))
+            if i == pair_index:
+                paired = best
+            else:
+                other += p * best
+        max_hands = rules.split_hands if value != 11 or rules.resplit_aces else 2
+        return _resplit_value(other, paired, _P_INF[pair_index], max_hands)
+
+    def action_evs(self, hard: int, soft: bool, pair: int = 0) -> dict[str, float]:
+        """EV действий на первых двух картах (пара — с вариантом СПЛИТ)."""
+        rules = self.rules
+        total = _total(hard, soft)
+        evs = {"S": self.stand(total)}
+        if total < 21:
+            evs["H"] = self.hit(hard, soft)
+            evs["D"] = self.double(hard, soft)
+        if pair:
+            evs["P"] = self.split(pair)
+        if rules.surrender:
+            evs["R"] = -0.5
+        hole = _hole_index(self.up)
+        if not rules.peek and hole >= 0:
+            p = _P_INF[hole]
+            for action, ev in evs.items():
+                evs[action] = (1 - p) * ev - p * (2 if action in ("D", "P") else 1)
+        return evs
+
+
+def _infinite_total_evs(rules: Rules, up: int) -> dict[tuple[int, int], dict[str, float]]:
+    deck = _InfiniteDeck(rules, up)
+    out = {(KIND_HARD, total): deck.action_evs(total, False) for total in HARD_TABLE}
+    out.update({(KIND_SOFT, total): deck.action_evs(total - 10, True) for total in SOFT_TABLE})
+    return out
+
+
+def _infinite_pair_evs(rules: Rules, up: int, value: int) -> dict[str, float]:
+    deck = _InfiniteDeck(rules, up)
+    return deck.action_evs(2 if value == 11 else 2 * value, value == 11, pair=value)
+
+
+# ---------------------------------------------------------------------
+# Пул задач
+# ---------------------------------------------------------------------
+
+def _solve_task(task: tuple) -> tuple:
+    """Задача пула: (правила, бесконечная ли колода, открытая карта, ранг пары или 0)."""
+    rules, infinite, up, value = task
+    if value:
+        evs = (_infinite_pair_evs if infinite else _shoe_pair_evs)(rules, up, value)
+    else:
+        evs = (_infinite_total_evs if infinite else _shoe_total_evs)(rules, up)
+    return up, value, evs
+
+
+def solve_evs(rules: Rules, infinite: bool = False, workers: int | None = None,
+              start_method: str | None = None) -> dict[int, tuple[dict, dict]]:
+    """EV действий для всех открытых карт.
+
+    Args:
+        infinite: бесконечная колода (rules.decks не учитывается).
+        workers: процессов (None — все ядра, 1 — в текущем процессе).
+        start_method: способ запуска процессов пула (multiprocessing.get_context;
+            "spawn" — при вызове не из главного потока), None — по умолчанию.
+
+    Returns:
+        {открытая карта: ({(вид, сумма): {действие: EV}}, {ранг пары: {действие: EV}})}
+    """
+    tasks = [(rules, infinite, up, 0) for up in UPCARDS]
+    tasks += [(rules, infinite, up, value) for up in UPCARDS for value in PAIR_TABLE]
+    out = {up: ({}, {}) for up in UPCARDS}
+
+    def collect(up: int, value: int, evs) -> None:
+        if value:
+            if evs is not None:
+                out[up][1][value] = evs
+        else:
+            out[up][0].update(evs)
+
+    # Бесконечная колода считается за миллисекунды — пул только мешает
+    if workers == 1 or infinite:
+        for task in tasks:
+            collect(*_solve_task(task))
+    else:
+        import multiprocessing
+        with multiprocessing.get_context(start_method).Pool(workers) as pool:
+            for result in pool.imap_unordered(_solve_task, tasks):
+                collect(*result)
+    return out
+
+
+# ---------------------------------------------------------------------
+# Таблицы
+# ---------------------------------------------------------------------
+
+def tables_from_evs(evs: dict[int, tuple[dict, dict]]) -> tuple[dict, dict, dict]:
+    """Лучшие действия на первых двух картах в форме HARD_TABLE, SOFT_TABLE, PAIR_TABLE.
+
+    Пара — «P», если сплит лучше всего, иначе лучшее действие без сплита.
+    Сумма без рук из двух разных карт (жёсткие 20 — только 10-10) берёт EV
+    пары без сплита; 21 без блэкджека — ХВАТИТ.
+    """
+    hard = {total: {} for total in HARD_TABLE}
+    soft = {total: {} for total in SOFT_TABLE}
+    pairs = {value: {} for value in PAIR_TABLE}
+    for up, (by_total, by_pair) in evs.items():
+        for kind, table in ((KIND_HARD, hard), (KIND_SOFT, soft)):
+            for total, row in table.items():
+                cell = by_total.get((kind, total))
+                if cell is None and kind == KIND_HARD and total % 2 == 0:
+                    cell = by_pair.get(total // 2)
+                row[up] = "S" if cell is None else best_allowed(cell, _TWO_CARDS)
+        for value, row in pairs.items():
+            cell = by_pair.get(value)
+            row[up] = "S" if cell is None else best_allowed(cell, "P" + _TWO_CARDS)
+    return hard, soft, pairs
+
+
+def solve(rules: Rules | None = None, infinite: bool = False,
+          workers: int | None = None) -> tuple[dict, dict, dict]:
+    """Таблицы (hard, soft, pairs) для правил — см. solve_evs и tables_from_evs."""
+    return tables_from_evs(solve_evs(rules or Rules(), infinite, workers))
+
+
+def builtin_tables() -> tuple[dict, dict, dict]:
+    """Ручные таблицы strategy.py."""
+    return HARD_TABLE, SOFT_TABLE, PAIR_TABLE
+
+
+def diff_tables(expected: tuple[dict, dict, dict],
+                actual: tuple[dict, dict, dict]) -> list[tuple[str, int, int, str, str]]:
+    """Расхождения таблиц: [(таблица, сумма, карта дилера, ожидалось, есть)].
+
+    Строки и ячейки, которых нет в `actual`, считаются расхождением («—»).
+    """
+    out = []
+    for name, solved, table in zip(("hard", "soft", "pair"), expected, actual):
+        for total, row in solved.items():
+            have = table.get(total, {})
+            for up, action in row.items():
+                if have.get(up) != action:
+                    out.append((name, total, up, action, have.get(up, "—")))
+    return out
+
+
+def render(tables: tuple[dict, dict, dict]) -> str:
+    """Таблицы сеткой для консоли."""
+    header = "        " + " ".join(f"{'A' if up == 11 else up:>2}" for up in UPCARDS)
+    lines = []
+    for name, table in zip(("hard", "soft", "pair"), tables):
+        lines.append(header)
+        for total, row in table.items():
+            label = f"{'A' if total == 11 else total}" if name == "pair" else str(total)
+            lines.append(f"{name} {label:>3}" + "".join(f"{row.get(up, '?'):>3}" for up in UPCARDS))
+    return "\n".join(lines)
+
+
+def _row_py(total: int, row: dict) -> str:
+    cells = ", ".join(f'{up}: "{row[up]}"' for up in UPCARDS)
+    return f"    {f'{total}:':<4}{{{cells}}},"
+
+
+def format_python(tables: tuple[dict, dict, dict]) -> str:
+    """Исходник HARD_TABLE, SOFT_TABLE, PAIR_TABLE для strategy.py."""
+    blocks = []
+    for name, table in zip(("HARD_TABLE", "SOFT_TABLE", "PAIR_TABLE"), tables):
+        rows = "\n".join(_row_py(total, row) for total, row in table.items())
+        blocks.append(f"{name}: dict[int, dict[int, str]] = {{\n{rows}\n}}")
+    return "\n\n".join(blocks)
+
+
+def _row_js(total: int, row: dict) -> str:
+    return f"    {total}:{{" + ",".join(f"{up}:'{row[up]}'" for up in UPCARDS) + "},"
+
+
+def format_js(tables: tuple[dict, dict, dict],
+              overrides: dict[int, tuple[dict, dict, dict]] | None = None) -> str:
+    """Исходник HARD, SOFT, PAIRS (и DECK_OVERRIDES) для webapp/index.html.
+
+    Args:
+        overrides: {колод: таблицы} — отличия от `tables` пишутся в
+            DECK_OVERRIDES; у пар веб-версия понимает только «P».
+    """
+    blocks = []
+    for name, table in zip(("HARD", "SOFT", "PAIRS"), tables):
+        rows = "\n".join(_row_js(total, row) for total, row in table.items())
+        blocks.append(f"const {name} = {{\n{rows}\n}};")
+    if overrides:
+        lines = []
+        for decks, other in sorted(overrides.items()):
+            parts = []
+            for key, base, table in zip(("hard", "soft", "pairs"), tables, other):
+                cells = [
+                    f"'{total}_{up}':'{action}'"
+                    for total, row in table.items() for up, action in row.items()
+                    if action != base[total][up] and (key != "pairs" or action == "P")
+                ]
+                parts.append(f"{key}:{{{','.join(cells)}}}")
+            lines.append(f"    {decks}: {{ {', '.join(parts)} }}")
+        blocks.append("const DECK_OVERRIDES = {\n" + ",\n".join(lines) + "\n};")
+    return "\n\n".join(blocks)
+
+
+_JS_TABLE = r"const {name} = \{{(.*?)\n\}};"
+_JS_ROW = re.compile(r"(\d+):\{([^{}]*)\}")
+_JS_CELL = re.compile(r"(\d+):'(\w)'")
+_JS_OVERRIDE = re.compile(r"(\d+): \{ hard:\{([^}]*)\}, soft:\{([^}]*)\}, pairs:\{([^}]*)\} \}")
+_JS_OVERRIDE_CELL = re.compile(r"'(\d+)_(\d+)':'(\w)'")
+
+
+def read_js_tables(path: str = WEBAPP_PATH, decks: int | None = None) -> tuple[dict, dict, dict]:
+    """Таблицы веб-версии (с DECK_OVERRIDES для `decks` колод, как в getRecommendation).
+
+    Raises:
+        ValueError: в файле нет HARD, SOFT или PAIRS.
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    tables = []
+    for name in ("HARD", "SOFT", "PAIRS"):
+        match = re.search(_JS_TABLE.format(name=name), text, re.S)
+        if match is None:
+            raise ValueError(f"{path}: не найдена таблица {name}")
+        tables.append({
+            int(total): {int(up): action for up, action in _JS_CELL.findall(cells)}
+            for total, cells in _JS_ROW.findall(match.group(1))
+        })
+    if decks is not None:
+        for match in _JS_OVERRIDE.finditer(text):
+            if int(match.group(1)) != decks:
+                continue
+            for table, cells in zip(tables, match.groups()[1:]):
+                for total, up, action in _JS_OVERRIDE_CELL.findall(cells):
+                    table.setdefault(int(total), {})[int(up)] = action
+    return tables[0], tables[1], tables[2]
+
+
+def main() -> None:
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Точный решатель базовой стратегии")
+    parser.add_argument("--decks", type=int, default=6, help="колод в шу")
+    parser.add_argument("--infinite", action="store_true", help="бесконечная колода")
+    parser.add_argument("--workers", type=int, default=None, help="процессов (по умолчанию все ядра)")
+    parser.add_argument("--check", action="store_true",
+                        help="код выхода 1, если таблицы strategy.py или веб-версии расходятся с расчётом")
+    parser.add_argument("--emit", choices=("py", "js"), default=None,
+                        help="напечатать исходник таблиц (js — с DECK_OVERRIDES для 1-2 колод)")
+    parser.add_argument("--js", default=WEBAPP_PATH, help="файл веб-версии для сверки")
+    table_rules = parser.add_argument_group("правила стола")
+    table_rules.add_argument("--h17", action="store_true", help="дилер берёт на мягких 17")
+    table_rules.add_argument("--no-das", action="store_true", help="без дабла после сплита")
+    table_rules.add_argument("--surrender", action="store_true", help="поздняя сдача")
+    table_rules.add_argument("--split-hands", type=int, default=4, help="максимум рук после сплитов")
+    table_rules.add_argument("--resplit-aces", action="store_true", help="пересплит тузов")
+    table_rules.add_argument("--no-peek", action="store_true", help="дилер не проверяет блэкджек")
+    args = parser.parse_args()
+
+    rules = Rules(decks=args.decks, h17=args.h17, das=not args.no_das, surrender=args.surrender,
+                  split_hands=args.split_hands, resplit_aces=args.resplit_aces, peek=not args.no_peek)
+    start = time.perf_counter()
+    tables = solve(rules, args.infinite, args.workers)
+    elapsed = time.perf_counter() - start
+
+    if args.emit == "py":
+        print(format_python(tables))
+        return
+    if args.emit == "js":
+        overrides = {d: solve(rules.with_decks(d), False, args.workers) for d in (1, 2)}
+        print(format_js(tables, overrides))
+        return
+
+    print(f"Правила: {'бесконечная колода' if args.infinite else rules.describe()}"
+          f" — решено за {elapsed:.2f} с")
+    print(render(tables))
+    js_decks = None if args.infinite else rules.decks
+    differences = 0
+    for source, current in (("strategy.py", builtin_tables()),
+                            (os.path.basename(args.js), read_js_tables(args.js, js_decks))):
+        diff = diff_tables(tables, current)
+        differences += len(diff)
+        print(f"{source}: {'совпадает' if not diff else f'расхождений {len(diff)}'}")
+        for name, total, up, solved, have in diff:
+            print(f"  {name} {total} vs {'A' if up == 11 else up}: {have} → {solved}")
+    if args.check and differences:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()